@@ -0,0 +1,32 @@
+# Generated by Django 5.1.3 on 2026-10-18 08:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_appointment_veterinarian'),
+        ('pets', '0004_medical_record_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['owner', '-scheduled_at'], name='appointment_owner_i_a3427c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['owner', 'status', '-scheduled_at'], name='appointment_owner_i_b3676b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['pet', '-scheduled_at'], name='appointment_pet_id_06159f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['status', 'scheduled_at'], name='appointment_status_eec9f6_idx'),
+        ),
+    ]
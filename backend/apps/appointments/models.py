@@ -19,6 +19,14 @@ class Appointment(models.Model):
 
 	owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='appointments')
 	pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name='appointments')
+	veterinarian = models.ForeignKey(
+		User,
+		on_delete=models.SET_NULL,
+		null=True,
+		blank=True,
+		related_name='vet_appointments',
+		limit_choices_to={'is_staff': True},
+	)
 	scheduled_at = models.DateTimeField()
 	reason = models.CharField(max_length=255)
 	status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_SCHEDULED)
@@ -28,6 +36,17 @@ class Appointment(models.Model):
 
 	class Meta:
 		ordering = ['-scheduled_at']
+		indexes = [
+			# Agenda de un veterinario: rango sobre scheduled_at (ver services.availability)
+			models.Index(fields=['veterinarian', 'scheduled_at']),
+			# Listado del dueño, con o sin filtro de estado, y citas de una mascota;
+			# todos ordenados por -scheduled_at sin ordenar en memoria
+			models.Index(fields=['owner', '-scheduled_at']),
+			models.Index(fields=['owner', 'status', '-scheduled_at']),
+			models.Index(fields=['pet', '-scheduled_at']),
+			# Listado de staff y dashboard: status / status__in con rango de fechas
+			models.Index(fields=['status', 'scheduled_at']),
+		]
 
 	def __str__(self):
 		return f"{self.pet.name} - {self.scheduled_at:%Y-%m-%d %H:%M}"
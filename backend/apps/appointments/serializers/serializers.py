@@ -1,26 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 
 from apps.appointments.models import Appointment
+from apps.appointments.services import (
+	first_free_veterinarian,
+	has_conflict,
+	is_slot_start,
+	veterinarians,
+)
+
+User = get_user_model()
+
+
+def validate_slot(scheduled_at):
+	"""Una cita programada debe caer en un turno futuro del horario"""
+	if scheduled_at <= timezone.now():
+		raise serializers.ValidationError({'scheduled_at': 'La cita debe agendarse en una fecha futura.'})
+	if not is_slot_start(scheduled_at):
+		raise serializers.ValidationError(
+			{'scheduled_at': 'El horario no coincide con un turno de atención.'}
+		)
+
+
+def lock_veterinarian(veterinarian, scheduled_at):
+	"""
+	Bloquea la agenda del veterinario (o del primero libre si la cita no
+	tiene uno) dentro de la transacción en curso y lo devuelve
+	"""
+	veterinarian = veterinarian or first_free_veterinarian(scheduled_at)
+	if veterinarian is None:
+		raise serializers.ValidationError(
+			{'scheduled_at': 'No hay veterinarios disponibles en ese horario.'}
+		)
+	User.objects.select_for_update().get(pk=veterinarian.pk)
+	return veterinarian
 
 
 class AppointmentSerializer(serializers.ModelSerializer):
 	owner_username = serializers.CharField(source='owner.username', read_only=True)
 	pet_name = serializers.CharField(source='pet.name', read_only=True)
+	veterinarian_username = serializers.CharField(
+		source='veterinarian.username', read_only=True, allow_null=True
+	)
 
 	class Meta:
 		model = Appointment
 		fields = [
 			'id', 'owner', 'owner_username', 'pet', 'pet_name',
+			'veterinarian', 'veterinarian_username',
 			'scheduled_at', 'reason', 'status', 'notes',
 			'created_at', 'updated_at',
 		]
-		read_only_fields = ['id', 'owner', 'created_at', 'updated_at']
+		read_only_fields = ['id', 'owner', 'veterinarian', 'created_at', 'updated_at']
+
+	def validate(self, attrs):
+		if self.instance is not None and self.needs_slot_check(attrs):
+			validate_slot(attrs.get('scheduled_at', self.instance.scheduled_at))
+		return attrs
+
+	def needs_slot_check(self, attrs):
+		"""Reprogramar o reactivar una cita pasa por los mismos controles que crearla"""
+		if attrs.get('status', self.instance.status) != Appointment.STATUS_SCHEDULED:
+			return False
+		return (
+			self.instance.status != Appointment.STATUS_SCHEDULED
+			or attrs.get('scheduled_at', self.instance.scheduled_at) != self.instance.scheduled_at
+		)
+
+	def update(self, instance, validated_data):
+		if not self.needs_slot_check(validated_data):
+			return super().update(instance, validated_data)
+
+		with transaction.atomic():
+			scheduled_at = validated_data.get('scheduled_at', instance.scheduled_at)
+			validated_data['veterinarian'] = lock_veterinarian(instance.veterinarian, scheduled_at)
+			appointment = super().update(instance, validated_data)
+			if has_conflict(appointment):
+				raise serializers.ValidationError({'scheduled_at': 'El horario ya no está disponible.'})
+		return appointment
 
 
 class AppointmentCreateSerializer(serializers.ModelSerializer):
+	veterinarian = serializers.PrimaryKeyRelatedField(
+		queryset=veterinarians(), required=False, allow_null=True
+	)
+
 	class Meta:
 		model = Appointment
-		fields = ['pet', 'scheduled_at', 'reason', 'status', 'notes']
+		fields = ['pet', 'veterinarian', 'scheduled_at', 'reason', 'status', 'notes']
 
 	def validate(self, attrs):
 		request = self.context.get('request')
@@ -28,4 +97,26 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
 			pet = attrs.get('pet')
 			if pet and pet.owner_id != request.user.id:
 				raise serializers.ValidationError('Solo puedes agendar citas para tus mascotas.')
+		if self.is_scheduled(attrs):
+			validate_slot(attrs.get('scheduled_at'))
 		return attrs
+
+	@staticmethod
+	def is_scheduled(attrs):
+		return attrs.get('status', Appointment.STATUS_SCHEDULED) == Appointment.STATUS_SCHEDULED
+
+	def create(self, validated_data):
+		if not self.is_scheduled(validated_data):
+			return super().create(validated_data)
+
+		# Bloquear al veterinario serializa las reservas simultáneas de su
+		# agenda; la cita se inserta y se vuelve a comprobar el choque antes
+		# de confirmar, así que dos reservas del mismo turno no pasan a la vez
+		with transaction.atomic():
+			validated_data['veterinarian'] = lock_veterinarian(
+				validated_data.get('veterinarian'), validated_data['scheduled_at']
+			)
+			appointment = super().create(validated_data)
+			if has_conflict(appointment):
+				raise serializers.ValidationError({'scheduled_at': 'El horario ya no está disponible.'})
+		return appointment
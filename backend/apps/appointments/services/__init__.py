@@ -0,0 +1,23 @@
+from .availability import (
+	IntervalIndex,
+	booked_rows,
+	day_slots,
+	first_free_veterinarian,
+	free_slots,
+	has_conflict,
+	is_slot_start,
+	slot_minutes,
+	veterinarians,
+)
+
+__all__ = [
+	'IntervalIndex',
+	'booked_rows',
+	'day_slots',
+	'first_free_veterinarian',
+	'free_slots',
+	'has_conflict',
+	'is_slot_start',
+	'slot_minutes',
+	'veterinarians',
+]
@@ -0,0 +1,158 @@
+import bisect
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.appointments.models import Appointment
+
+User = get_user_model()
+
+WORKING_HOURS = {
+	0: [('09:00', '13:00'), ('15:00', '19:00')],
+	1: [('09:00', '13:00'), ('15:00', '19:00')],
+	2: [('09:00', '13:00'), ('15:00', '19:00')],
+	3: [('09:00', '13:00'), ('15:00', '19:00')],
+	4: [('09:00', '13:00'), ('15:00', '19:00')],
+	5: [('09:00', '13:00')],
+}
+SLOT_MINUTES = 30
+
+
+def working_hours():
+	return getattr(settings, 'APPOINTMENT_WORKING_HOURS', WORKING_HOURS)
+
+
+def slot_minutes():
+	return getattr(settings, 'APPOINTMENT_SLOT_MINUTES', SLOT_MINUTES)
+
+
+def slot_length():
+	return timedelta(minutes=slot_minutes())
+
+
+def veterinarians():
+	"""Los veterinarios son los usuarios staff activos"""
+	return User.objects.filter(is_staff=True, is_active=True).order_by('id')
+
+
+def day_slots(day):
+	"""Inicios de turno del día (hora local) según el horario de atención"""
+	tz = timezone.get_current_timezone()
+	length = slot_length()
+	slots = []
+	for opens, closes in working_hours().get(day.weekday(), []):
+		start = timezone.make_aware(datetime.combine(day, time.fromisoformat(opens)), tz)
+		end = timezone.make_aware(datetime.combine(day, time.fromisoformat(closes)), tz)
+		while start + length <= end:
+			slots.append(start)
+			start += length
+	return slots
+
+
+def is_slot_start(value):
+	"""True si value es el inicio exacto de un turno de su día"""
+	local = timezone.localtime(value)
+	return local in day_slots(local.date())
+
+
+class IntervalIndex:
+	"""
+	Índice de intervalos por veterinario. Todas las citas duran un turno, así
+	que basta con sus inicios ordenados: las que se cruzan con
+	[start, start + duración) son las que empiezan en
+	(start - duración, start + duración) y se encuentran con dos búsquedas
+	binarias. Las citas sin veterinario quedan bajo la clave None.
+	"""
+
+	def __init__(self, length):
+		self.length = length
+		# {veterinarian_id | None: [inicio, ...]}
+		self.starts = {}
+
+	def add(self, key, start):
+		bisect.insort(self.starts.setdefault(key, []), start)
+
+	def count(self, key, start):
+		starts = self.starts.get(key, [])
+		lo = bisect.bisect_right(starts, start - self.length)
+		hi = bisect.bisect_left(starts, start + self.length)
+		return hi - lo
+
+	def overlaps(self, key, start):
+		return self.count(key, start) > 0
+
+
+def booked_rows(start, end, length=None):
+	"""(veterinarian_id, scheduled_at) de las citas programadas que se cruzan con [start, end)"""
+	length = length or slot_length()
+	return Appointment.objects.filter(
+		status=Appointment.STATUS_SCHEDULED,
+		scheduled_at__gt=start - length,
+		scheduled_at__lt=end,
+	).values_list('veterinarian_id', 'scheduled_at')
+
+
+def booked_index(start, end, length=None):
+	"""
+	Citas programadas que se cruzan con [start, end), leídas con una sola
+	consulta por rango sobre scheduled_at
+	"""
+	length = length or slot_length()
+	index = IntervalIndex(length)
+	for veterinarian_id, scheduled_at in booked_rows(start, end, length):
+		index.add(veterinarian_id, scheduled_at)
+	return index
+
+
+def free_slots(day, veterinarian=None, now=None):
+	"""
+	Turnos libres del día. Para cada turno devuelve los veterinarios libres
+	y cuántas citas más admite; sin veterinario indicado, las citas que no
+	tienen uno asignado descuentan capacidad del total. Los turnos ya
+	pasados no se ofrecen.
+	"""
+	slots = day_slots(day)
+	if not slots:
+		return []
+	now = now or timezone.now()
+	length = slot_length()
+	if veterinarian is not None:
+		vet_ids = [veterinarian.pk]
+	else:
+		vet_ids = list(veterinarians().values_list('id', flat=True))
+	index = booked_index(slots[0], slots[-1] + length, length)
+
+	result = []
+	for start in slots:
+		if start <= now:
+			continue
+		free = [vet_id for vet_id in vet_ids if not index.overlaps(vet_id, start)]
+		available = len(free)
+		if veterinarian is None:
+			available -= index.count(None, start)
+		if available > 0:
+			result.append({'start': start, 'veterinarians': free, 'available': available})
+	return result
+
+
+def first_free_veterinarian(start):
+	"""Primer veterinario libre en el turno que empieza en start, o None"""
+	length = slot_length()
+	index = booked_index(start, start + length, length)
+	free = [vet for vet in veterinarians() if not index.overlaps(vet.pk, start)]
+	if len(free) - index.count(None, start) <= 0:
+		return None
+	return free[0]
+
+
+def has_conflict(appointment):
+	"""True si otra cita programada del mismo veterinario se cruza con esta"""
+	length = slot_length()
+	return Appointment.objects.filter(
+		veterinarian_id=appointment.veterinarian_id,
+		status=Appointment.STATUS_SCHEDULED,
+		scheduled_at__gt=appointment.scheduled_at - length,
+		scheduled_at__lt=appointment.scheduled_at + length,
+	).exclude(pk=appointment.pk).exists()
@@ -3,7 +3,10 @@ from rest_framework import status
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta, time
+from rest_framework.exceptions import ValidationError
 from apps.appointments.models import Appointment
+from apps.appointments.serializers import AppointmentCreateSerializer
+from apps.appointments.services import day_slots
 from apps.pets.models import Pet
 
 
@@ -156,3 +159,163 @@ class AppointmentIntegrationTests(APITestCase):
         # Verificar que se canceló (no se eliminó)
         appointment.refresh_from_db()
         self.assertEqual(appointment.status, 'CANCELLED')
+
+
+class AppointmentAvailabilityTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='testpass123')
+        self.vet_a = User.objects.create_user(username='vet_a', password='testpass123', is_staff=True)
+        self.vet_b = User.objects.create_user(username='vet_b', password='testpass123', is_staff=True)
+        self.pet = Pet.objects.create(owner=self.user, name='Max', species='dog', age=3)
+        self.client.force_authenticate(user=self.user)
+
+        # Próximo lunes con al menos una semana de margen
+        today = timezone.localdate()
+        self.day = today + timedelta(days=7 + (7 - today.weekday()) % 7)
+        self.slots = day_slots(self.day)
+
+    def book(self, start, veterinarian=None):
+        data = {
+            'pet': self.pet.id,
+            'scheduled_at': start.isoformat(),
+            'reason': 'Consulta',
+        }
+        if veterinarian is not None:
+            data['veterinarian'] = veterinarian.id
+        return self.client.post('/api/appointments/', data, format='json')
+
+    def availability(self, **params):
+        return self.client.get('/api/appointments/availability/', {'date': self.day.isoformat(), **params})
+
+    def test_availability_lists_working_hours(self):
+        """Sin citas, cada turno del horario tiene a todos los veterinarios libres"""
+        response = self.availability()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['slot_minutes'], 30)
+        # Lunes: 09-13 y 15-19 en turnos de 30 minutos
+        self.assertEqual(len(response.data['slots']), 16)
+        first = response.data['slots'][0]
+        self.assertEqual(first['start'], self.slots[0].isoformat())
+        self.assertEqual(first['veterinarians'], [self.vet_a.id, self.vet_b.id])
+        self.assertEqual(first['available'], 2)
+
+    def test_availability_subtracts_booked_slots(self):
+        """Un turno tomado por un veterinario solo ofrece al otro"""
+        Appointment.objects.create(
+            owner=self.user, pet=self.pet, veterinarian=self.vet_a,
+            scheduled_at=self.slots[0], reason='Consulta'
+        )
+        Appointment.objects.create(
+            owner=self.user, pet=self.pet, veterinarian=self.vet_b,
+            scheduled_at=self.slots[1], reason='Consulta', status=Appointment.STATUS_CANCELLED
+        )
+        slots = {slot['start']: slot for slot in self.availability().data['slots']}
+        self.assertEqual(slots[self.slots[0].isoformat()]['veterinarians'], [self.vet_b.id])
+        self.assertEqual(slots[self.slots[1].isoformat()]['available'], 2)
+
+        response = self.availability(veterinarian=self.vet_a.id)
+        starts = [slot['start'] for slot in response.data['slots']]
+        self.assertNotIn(self.slots[0].isoformat(), starts)
+
+    def test_availability_validates_params(self):
+        self.assertEqual(
+            self.client.get('/api/appointments/availability/').status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(
+            self.availability(veterinarian=self.user.id).status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    def test_availability_rejects_impossible_date(self):
+        response = self.client.get('/api/appointments/availability/', {'date': '2030-13-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('date', response.data)
+
+    def test_availability_closed_day(self):
+        """El domingo no hay atención"""
+        response = self.client.get(
+            '/api/appointments/availability/',
+            {'date': (self.day - timedelta(days=1)).isoformat()}
+        )
+        self.assertEqual(response.data['slots'], [])
+
+    def test_create_assigns_free_veterinarian(self):
+        first = self.book(self.slots[0])
+        second = self.book(self.slots[0])
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        vets = set(Appointment.objects.values_list('veterinarian_id', flat=True))
+        self.assertEqual(vets, {self.vet_a.id, self.vet_b.id})
+
+        # Con los dos veterinarios ocupados el turno ya no se puede tomar
+        response = self.book(self.slots[0])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('scheduled_at', response.data)
+        self.assertEqual(Appointment.objects.count(), 2)
+
+    def test_create_rejects_conflict(self):
+        """Un turno ya tomado por el veterinario elegido no se vuelve a reservar"""
+        self.assertEqual(self.book(self.slots[0], self.vet_a).status_code, status.HTTP_201_CREATED)
+        response = self.book(self.slots[0], self.vet_a)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Appointment.objects.filter(veterinarian=self.vet_a).count(), 1)
+
+    def test_conflict_recheck_rolls_back(self):
+        """Si otra reserva gana la carrera, la cita insertada se revierte"""
+        serializer = AppointmentCreateSerializer(data={
+            'pet': self.pet.id,
+            'veterinarian': self.vet_a.id,
+            'scheduled_at': self.slots[0].isoformat(),
+            'reason': 'Consulta',
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        # La reserva concurrente llega entre la validación y el guardado
+        Appointment.objects.create(
+            owner=self.user, pet=self.pet, veterinarian=self.vet_a,
+            scheduled_at=self.slots[0] + timedelta(minutes=10), reason='Consulta'
+        )
+        with self.assertRaises(ValidationError):
+            serializer.save(owner=self.user)
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_create_rejects_off_grid_and_past(self):
+        off_grid = self.book(self.slots[0] + timedelta(minutes=10))
+        self.assertEqual(off_grid.status_code, status.HTTP_400_BAD_REQUEST)
+        closed = self.book(self.slots[0] - timedelta(hours=2))
+        self.assertEqual(closed.status_code, status.HTTP_400_BAD_REQUEST)
+        past = self.book(self.slots[0] - timedelta(days=14))
+        self.assertEqual(past.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_reschedule_checks_slot_and_conflicts(self):
+        """Cambiar scheduled_at por PATCH pasa por los mismos controles que crear"""
+        self.assertEqual(self.book(self.slots[0], self.vet_a).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.book(self.slots[2], self.vet_a).status_code, status.HTTP_201_CREATED)
+        appointment = Appointment.objects.get(scheduled_at=self.slots[2])
+        url = f'/api/appointments/{appointment.id}/'
+
+        for scheduled_at in (self.slots[0], self.slots[3] + timedelta(minutes=10), self.slots[0] - timedelta(days=14)):
+            response = self.client.patch(url, {'scheduled_at': scheduled_at.isoformat()}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('scheduled_at', response.data)
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.scheduled_at, self.slots[2])
+
+        response = self.client.patch(url, {'scheduled_at': self.slots[3].isoformat()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.scheduled_at, self.slots[3])
+
+    def test_reactivating_cancelled_appointment_checks_conflicts(self):
+        self.assertEqual(self.book(self.slots[0], self.vet_a).status_code, status.HTTP_201_CREATED)
+        cancelled = Appointment.objects.create(
+            owner=self.user, pet=self.pet, veterinarian=self.vet_a,
+            scheduled_at=self.slots[0], reason='Consulta', status=Appointment.STATUS_CANCELLED
+        )
+        response = self.client.patch(
+            f'/api/appointments/{cancelled.id}/', {'status': Appointment.STATUS_SCHEDULED}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, Appointment.STATUS_CANCELLED)
@@ -1,8 +1,13 @@
 from django.urls import path
 
-from apps.appointments.views import AppointmentListCreateView, AppointmentDetailView
+from apps.appointments.views import (
+    AppointmentListCreateView,
+    AppointmentDetailView,
+    AvailabilityView,
+)
 
 urlpatterns = [
     path('', AppointmentListCreateView.as_view(), name='appointment-list-create'),
+    path('availability/', AvailabilityView.as_view(), name='appointment-availability'),
     path('<int:pk>/', AppointmentDetailView.as_view(), name='appointment-detail'),
 ]
@@ -1,5 +1,8 @@
-from rest_framework import generics, filters
+from rest_framework import generics, filters, status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.utils.dateparse import parse_date
 from django_filters.rest_framework import DjangoFilterBackend
 
 from apps.appointments.models import Appointment
@@ -7,6 +10,7 @@ from apps.appointments.serializers import (
 	AppointmentSerializer,
 	AppointmentCreateSerializer,
 )
+from apps.appointments.services import free_slots, slot_minutes, veterinarians
 
 
 class AppointmentListCreateView(generics.ListCreateAPIView):
@@ -19,8 +23,8 @@ class AppointmentListCreateView(generics.ListCreateAPIView):
 	def get_queryset(self):
 		user = self.request.user
 		if user.is_staff:
-			return Appointment.objects.select_related('owner', 'pet')
-		return Appointment.objects.select_related('owner', 'pet').filter(owner=user)
+			return Appointment.objects.select_related('owner', 'pet', 'veterinarian')
+		return Appointment.objects.select_related('owner', 'pet', 'veterinarian').filter(owner=user)
 
 	def get_serializer_class(self):
 		if self.request.method == 'POST':
@@ -38,5 +42,51 @@ class AppointmentDetailView(generics.RetrieveUpdateDestroyAPIView):
 	def get_queryset(self):
 		user = self.request.user
 		if user.is_staff:
-			return Appointment.objects.select_related('owner', 'pet')
-		return Appointment.objects.select_related('owner', 'pet').filter(owner=user)
+			return Appointment.objects.select_related('owner', 'pet', 'veterinarian')
+		return Appointment.objects.select_related('owner', 'pet', 'veterinarian').filter(owner=user)
+
+
+class AvailabilityView(APIView):
+	"""
+	Turnos libres de un día: GET ?date=AAAA-MM-DD[&veterinarian=<id>].
+	Las citas del día se leen con una sola consulta por rango sobre
+	scheduled_at y los choques se resuelven en memoria.
+	"""
+	permission_classes = [IsAuthenticated]
+
+	def get(self, request):
+		try:
+			day = parse_date(request.query_params.get('date') or '')
+		except ValueError:
+			# Bien formada pero imposible, como 2030-13-01
+			day = None
+		if day is None:
+			return Response(
+				{'date': 'Indica la fecha con formato AAAA-MM-DD.'},
+				status=status.HTTP_400_BAD_REQUEST
+			)
+
+		veterinarian = None
+		veterinarian_id = request.query_params.get('veterinarian')
+		if veterinarian_id:
+			if veterinarian_id.isdigit():
+				veterinarian = veterinarians().filter(pk=veterinarian_id).first()
+			if veterinarian is None:
+				return Response(
+					{'veterinarian': 'Veterinario no encontrado.'},
+					status=status.HTTP_400_BAD_REQUEST
+				)
+
+		slots = free_slots(day, veterinarian)
+		return Response({
+			'date': day.isoformat(),
+			'slot_minutes': slot_minutes(),
+			'slots': [
+				{
+					'start': slot['start'].isoformat(),
+					'veterinarians': slot['veterinarians'],
+					'available': slot['available'],
+				}
+				for slot in slots
+			],
+		})
@@ -2,7 +2,18 @@ import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import User
+from django.db import transaction
 from apps.chat.models import ChatRoom, ChatMessage
+from apps.chat.services import (
+    get_message_writer,
+    get_presence_registry,
+    increment_unread,
+    mark_read_up_to,
+    read_receipt_event,
+    record_read,
+    reset_unread,
+    write_behind_enabled,
+)
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
@@ -21,9 +32,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
         
-        # Verificar que el usuario tenga acceso a esta sala
-        has_access = await self.check_room_access()
-        if not has_access:
+        # Verificar que el usuario tenga acceso a esta sala. La membresía y el
+        # estado quedan cacheados en el consumer para no releer la sala en
+        # cada mensaje
+        self.room = await self.load_room()
+        if self.room is None:
             await self.close()
             return
         
@@ -35,11 +48,29 @@ class ChatConsumer(AsyncWebsocketConsumer):
         
         await self.accept()
         
+        # Presencia: avisar a la sala y enviar el estado del otro participante
+        presence = get_presence_registry()
+        await presence.connect(self.user.id, self.channel_name)
+        await self.broadcast_presence(online=True)
+        self.peer_online = presence.is_online(self.room['recipient_id'])
+        await self.send(text_data=json.dumps({
+            'type': 'presence',
+            'user_id': self.room['recipient_id'],
+            'online': self.peer_online
+        }))
+        
         # Marcar mensajes como leídos cuando se conecta
-        await self.mark_messages_as_read()
+        await self.read_up_to(None)
     
     async def disconnect(self, close_code):
         """Desconecta del WebSocket"""
+        if getattr(self, 'room', None) is not None:
+            presence = get_presence_registry()
+            await presence.disconnect(self.user.id, self.channel_name)
+            # Con otra pestaña abierta el usuario sigue en línea
+            if not presence.is_online(self.user.id):
+                await self.broadcast_presence(online=False)
+        
         if hasattr(self, 'room_group_name'):
             await self.channel_layer.group_discard(
                 self.room_group_name,
@@ -62,8 +93,21 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     }))
                     return
                 
-                # Guardar mensaje en la base de datos
-                message_obj = await self.save_message(message_text)
+                if not self.room['is_active']:
+                    await self.send(text_data=json.dumps({
+                        'type': 'error',
+                        'message': 'La sala está cerrada'
+                    }))
+                    return
+                
+                # Guardar mensaje en la base de datos, o encolarlo en el
+                # escritor diferido y difundirlo con un id provisional
+                if write_behind_enabled():
+                    message_obj = get_message_writer().enqueue(
+                        self.room_id, self.user.id, self.room['recipient_id'], message_text
+                    )
+                else:
+                    message_obj = await self.save_message(message_text)
                 
                 if message_obj:
                     # Enviar mensaje al room group
@@ -76,10 +120,33 @@ class ChatConsumer(AsyncWebsocketConsumer):
                             'sender_username': self.user.username,
                             'message_id': message_obj['id'],
                             'timestamp': message_obj['timestamp'],
-                            'is_read': False
+                            'is_read': False,
+                            'provisional': write_behind_enabled()
                         }
                     )
             
+            elif message_type == 'heartbeat':
+                # Mantiene la presencia viva; no toca la base de datos
+                await get_presence_registry().heartbeat(self.user.id, self.channel_name)
+                await self.refresh_peer_presence()
+            
+            elif message_type == 'typing':
+                await self.channel_layer.group_send(
+                    self.room_group_name,
+                    {
+                        'type': 'typing',
+                        'user_id': self.user.id,
+                        'is_typing': bool(data.get('is_typing', True))
+                    }
+                )
+            
+            elif message_type == 'mark_read_up_to':
+                # Confirmación de lectura por lotes: todo hasta message_id
+                message_id = data.get('message_id')
+                if message_id is not None and not isinstance(message_id, int):
+                    raise ValueError('message_id debe ser el id de un mensaje')
+                await self.read_up_to(message_id)
+            
             elif message_type == 'mark_as_read':
                 message_id = data.get('message_id')
                 if message_id:
@@ -114,7 +181,24 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'sender_username': event['sender_username'],
             'message_id': event['message_id'],
             'timestamp': event['timestamp'],
-            'is_read': event['is_read']
+            'is_read': event['is_read'],
+            'provisional': event.get('provisional', False)
+        }))
+    
+    async def message_persisted(self, event):
+        """Informa el id definitivo de un mensaje escrito en diferido"""
+        await self.send(text_data=json.dumps({
+            'type': 'message_persisted',
+            'provisional_id': event['provisional_id'],
+            'message_id': event['message_id'],
+            'timestamp': event['timestamp']
+        }))
+    
+    async def message_failed(self, event):
+        """Informa que un mensaje escrito en diferido no se pudo guardar"""
+        await self.send(text_data=json.dumps({
+            'type': 'message_failed',
+            'provisional_id': event['provisional_id']
         }))
     
     async def message_read(self, event):
@@ -124,27 +208,107 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'message_id': event['message_id']
         }))
     
+    async def messages_read(self, event):
+        """Notifica que el otro participante leyó hasta un mensaje"""
+        await self.send(text_data=json.dumps({
+            'type': 'messages_read',
+            'reader_id': event['reader_id'],
+            'up_to': event['up_to']
+        }))
+    
+    async def read_up_to(self, message_id):
+        """Un UPDATE sobre la sala y un solo evento con la marca de agua"""
+        updated, up_to = await database_sync_to_async(mark_read_up_to)(
+            self.room_id, self.user.id, message_id
+        )
+        if updated:
+            await self.channel_layer.group_send(
+                self.room_group_name,
+                read_receipt_event(self.user.id, up_to)
+            )
+    
+    async def presence(self, event):
+        """Informa que el otro participante se conectó o desconectó"""
+        if event['user_id'] == self.user.id:
+            return
+        self.peer_online = event['online']
+        await self.send(text_data=json.dumps({
+            'type': 'presence',
+            'user_id': event['user_id'],
+            'online': event['online']
+        }))
+    
+    async def refresh_peer_presence(self):
+        """
+        Una conexión que deja de latir sin cerrarse no avisa a nadie: con
+        cada latido propio se vuelve a consultar al otro participante y se
+        informa si caducó (o volvió) desde el último estado enviado
+        """
+        online = get_presence_registry().is_online(self.room['recipient_id'])
+        if online == self.peer_online:
+            return
+        self.peer_online = online
+        await self.send(text_data=json.dumps({
+            'type': 'presence',
+            'user_id': self.room['recipient_id'],
+            'online': online
+        }))
+    
+    async def typing(self, event):
+        """Indicador de escritura del otro participante"""
+        if event['user_id'] == self.user.id:
+            return
+        await self.send(text_data=json.dumps({
+            'type': 'typing',
+            'user_id': event['user_id'],
+            'is_typing': event['is_typing']
+        }))
+    
+    async def broadcast_presence(self, online):
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                'type': 'presence',
+                'user_id': self.user.id,
+                'online': online
+            }
+        )
+    
+    async def room_state(self, event):
+        """Actualiza el estado cacheado cuando la sala se abre o se cierra"""
+        self.room['is_active'] = event['is_active']
+        await self.send(text_data=json.dumps({
+            'type': 'room_state',
+            'is_active': event['is_active']
+        }))
+    
     @database_sync_to_async
-    def check_room_access(self):
-        """Verifica que el usuario tenga acceso a la sala"""
-        try:
-            room = ChatRoom.objects.get(id=self.room_id)
-            return room.user == self.user or room.veterinarian == self.user
-        except ChatRoom.DoesNotExist:
-            return False
+    def load_room(self):
+        """
+        Carga en una consulta los participantes y el estado de la sala.
+        Devuelve None si la sala no existe o el usuario no participa en ella.
+        """
+        room = ChatRoom.objects.filter(id=self.room_id).values(
+            'user_id', 'veterinarian_id', 'is_active'
+        ).first()
+        if room is None or self.user.id not in (room['user_id'], room['veterinarian_id']):
+            return None
+        room['recipient_id'] = (
+            room['veterinarian_id'] if room['user_id'] == self.user.id else room['user_id']
+        )
+        return room
     
     @database_sync_to_async
     def save_message(self, message_text):
         """Guarda el mensaje en la base de datos"""
         try:
-            room = ChatRoom.objects.get(id=self.room_id)
             message = ChatMessage.objects.create(
-                room=room,
+                room_id=self.room_id,
                 sender=self.user,
                 message=message_text
             )
-            # Actualizar timestamp de la sala
-            room.save(update_fields=['updated_at'])
+            # Sumar el mensaje al contador de no leídos del destinatario
+            increment_unread(self.room['recipient_id'])
             
             return {
                 'id': message.id,
@@ -154,25 +318,15 @@ class ChatConsumer(AsyncWebsocketConsumer):
             print(f"Error saving message: {e}")
             return None
     
-    @database_sync_to_async
-    def mark_messages_as_read(self):
-        """Marca todos los mensajes recibidos como leídos"""
-        try:
-            room = ChatRoom.objects.get(id=self.room_id)
-            # Marcar como leídos los mensajes que NO son del usuario actual
-            ChatMessage.objects.filter(
-                room=room,
-                is_read=False
-            ).exclude(sender=self.user).update(is_read=True)
-        except Exception as e:
-            print(f"Error marking messages as read: {e}")
-    
     @database_sync_to_async
     def mark_message_read(self, message_id):
         """Marca un mensaje específico como leído"""
-        try:
-            message = ChatMessage.objects.get(id=message_id)
-            if message.sender != self.user:
-                message.mark_as_read()
-        except ChatMessage.DoesNotExist:
-            pass
+        with transaction.atomic():
+            updated = ChatMessage.objects.filter(
+                id=message_id,
+                room_id=self.room_id,
+                is_read=False
+            ).exclude(sender=self.user).update(is_read=True)
+            record_read(self.room_id, updated, reader_id=self.user.id)
+        if updated:
+            reset_unread(self.user.id)
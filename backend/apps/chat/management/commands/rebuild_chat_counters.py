@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from apps.chat.models import ChatRoom
+from apps.chat.services import rebuild_room_counters, reset_unread
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye desde los mensajes el último mensaje y los contadores de '
+        'no leídos desnormalizados en ChatRoom.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--room',
+            type=int,
+            action='append',
+            help='Id de sala a reparar (se puede repetir); por defecto todas',
+        )
+
+    def handle(self, *args, **options):
+        rooms = ChatRoom.objects.all()
+        if options['room']:
+            rooms = rooms.filter(pk__in=options['room'])
+
+        updated = rebuild_room_counters(rooms)
+        # Los contadores globales cacheados se recalculan en la próxima lectura
+        participants = rooms.values_list('user_id', 'veterinarian_id')
+        reset_unread(*{user_id for pair in participants for user_id in pair})
+
+        self.stdout.write(self.style.SUCCESS(f'{updated} salas reconstruidas'))
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.3 on 2026-10-18 08:27
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+
+
+def fill_counters(apps, schema_editor):
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    ChatMessage = apps.get_model('chat', 'ChatMessage')
+    messages = ChatMessage.objects.filter(room=OuterRef('pk'))
+    last_message = messages.order_by('-timestamp', '-id')
+
+    def unread_from_other(participant):
+        return Coalesce(
+            Subquery(
+                messages.filter(is_read=False).exclude(sender=OuterRef(participant))
+                .values('room').annotate(total=Count('id')).values('total')[:1]
+            ),
+            Value(0),
+        )
+
+    ChatRoom.objects.update(
+        last_message_preview=Coalesce(Substr(Subquery(last_message.values('message')[:1]), 1, 255), Value('')),
+        last_message_at=Subquery(last_message.values('timestamp')[:1]),
+        user_unread_count=unread_from_other('user'),
+        veterinarian_unread_count=unread_from_other('veterinarian'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Fecha del último mensaje'),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_preview',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Último mensaje'),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='user_unread_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='No leídos del usuario'),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='veterinarian_unread_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='No leídos del veterinario'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
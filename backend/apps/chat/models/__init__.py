@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 
@@ -21,6 +21,11 @@ class ChatRoom(models.Model):
         limit_choices_to={'is_staff': True}
     )
     is_active = models.BooleanField(default=True, verbose_name='Activa')
+    # Datos desnormalizados que mantienen apps.chat.services.counters
+    last_message_preview = models.CharField(max_length=255, blank=True, verbose_name='Último mensaje')
+    last_message_at = models.DateTimeField(null=True, blank=True, verbose_name='Fecha del último mensaje')
+    user_unread_count = models.PositiveIntegerField(default=0, verbose_name='No leídos del usuario')
+    veterinarian_unread_count = models.PositiveIntegerField(default=0, verbose_name='No leídos del veterinario')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Última actualización')
     
@@ -52,6 +57,12 @@ class ChatRoom(models.Model):
     def unread_count(self):
         """Cuenta mensajes no leídos para el usuario"""
         return self.messages.filter(sender=self.veterinarian, is_read=False).count()
+    
+    def unread_count_for(self, user):
+        """No leídos del participante según el contador desnormalizado"""
+        if user.id == self.veterinarian_id:
+            return self.veterinarian_unread_count
+        return self.user_unread_count
 
 
 class ChatMessage(models.Model):
@@ -87,8 +98,22 @@ class ChatMessage(models.Model):
     def __str__(self):
         return f"{self.sender.username}: {self.message[:50]}"
     
+    def save(self, *args, **kwargs):
+        # Los mensajes nuevos actualizan los datos desnormalizados de la sala
+        # en la misma transacción que el INSERT
+        if self.pk is not None:
+            return super().save(*args, **kwargs)
+        
+        from apps.chat.services.counters import record_messages
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            record_messages(self.room_id, [self])
+    
     def mark_as_read(self):
         """Marca el mensaje como leído"""
         if not self.is_read:
-            self.is_read = True
-            self.save(update_fields=['is_read'])
+            from apps.chat.services.counters import record_read
+            with transaction.atomic():
+                self.is_read = True
+                self.save(update_fields=['is_read'])
+                record_read(self.room_id, 1, sender_id=self.sender_id)
@@ -0,0 +1,46 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import remove_query_param
+
+from core.pagination import KeysetPagination
+
+
+class ChatMessagePagination(KeysetPagination):
+    """
+    Keyset sobre (timestamp, id) para el historial de una sala.
+
+    Además del cursor acepta anclas por id de mensaje:
+    ?before=<id> devuelve los mensajes inmediatamente anteriores y
+    ?after=<id> los posteriores. Sin parámetros devuelve la página más
+    reciente; en todos los casos los resultados van en orden cronológico.
+    """
+    anchor_query_params = (('before', True), ('after', False))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.queryset = queryset
+        results = super().paginate_queryset(queryset, request, view)
+        # Los enlaces siguen solo con el cursor
+        for param, _ in self.anchor_query_params:
+            self.base_url = remove_query_param(self.base_url, param)
+        return results
+
+    def decode_cursor(self, request):
+        if request.query_params.get(self.cursor_query_param):
+            return super().decode_cursor(request)
+
+        for param, reverse in self.anchor_query_params:
+            anchor = request.query_params.get(param)
+            if anchor:
+                return self.anchor_position(anchor), reverse
+        return None, True
+
+    def anchor_position(self, anchor):
+        try:
+            anchor = int(anchor)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        position = self.queryset.filter(pk=anchor).values_list(
+            *[field.attname for field in self.fields]
+        ).first()
+        if position is None:
+            raise NotFound('Mensaje no encontrado')
+        return list(position)
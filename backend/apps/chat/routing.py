@@ -1,6 +1,8 @@
 from django.urls import re_path
 from apps.chat.consumers import ChatConsumer
+from apps.notifications.consumers import NotificationConsumer
 
 websocket_urlpatterns = [
     re_path(r'ws/chat/(?P<room_id>\d+)/$', ChatConsumer.as_asgi()),
+    re_path(r'ws/notifications/$', NotificationConsumer.as_asgi()),
 ]
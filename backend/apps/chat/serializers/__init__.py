@@ -1,6 +1,11 @@
 from rest_framework import serializers
 from apps.chat.models import ChatRoom, ChatMessage
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.urls import reverse
+
+# Mensajes incluidos en el detalle de una sala
+ROOM_DETAIL_MESSAGES = 50
 
 
 class UserMinimalSerializer(serializers.ModelSerializer):
@@ -37,7 +42,7 @@ class ChatRoomSerializer(serializers.ModelSerializer):
     veterinarian_name = serializers.SerializerMethodField()
     last_message_text = serializers.SerializerMethodField()
     last_message_time = serializers.SerializerMethodField()
-    unread_count = serializers.IntegerField(read_only=True)
+    unread_count = serializers.SerializerMethodField()
     room_name = serializers.CharField(read_only=True)
     
     class Meta:
@@ -56,16 +61,22 @@ class ChatRoomSerializer(serializers.ModelSerializer):
         return obj.veterinarian.username
     
     def get_last_message_text(self, obj):
-        """Obtiene el texto del último mensaje"""
-        last_msg = obj.last_message
-        if last_msg:
-            return last_msg.message[:50] + ('...' if len(last_msg.message) > 50 else '')
-        return None
+        """Obtiene el texto del último mensaje desde la sala desnormalizada"""
+        if obj.last_message_at is None:
+            return None
+        text = obj.last_message_preview
+        return text[:50] + ('...' if len(text) > 50 else '')
     
     def get_last_message_time(self, obj):
         """Obtiene la fecha del último mensaje"""
-        last_msg = obj.last_message
-        return last_msg.timestamp.isoformat() if last_msg else None
+        return obj.last_message_at.isoformat() if obj.last_message_at else None
+    
+    def get_unread_count(self, obj):
+        """Mensajes no leídos enviados por el otro participante"""
+        request = self.context.get('request')
+        if request is None:
+            return obj.unread_count
+        return obj.unread_count_for(request.user)
 
 
 class ChatRoomCreateSerializer(serializers.ModelSerializer):
@@ -110,8 +121,12 @@ class ChatRoomCreateSerializer(serializers.ModelSerializer):
 
 
 class ChatRoomDetailSerializer(serializers.ModelSerializer):
-    """Serializer detallado para sala de chat con mensajes"""
-    messages = ChatMessageSerializer(many=True, read_only=True)
+    """
+    Serializer detallado para sala de chat con los últimos mensajes.
+    El historial anterior se pide a messages_previous bajo demanda.
+    """
+    messages = serializers.SerializerMethodField()
+    messages_previous = serializers.SerializerMethodField()
     user_info = UserMinimalSerializer(source='user', read_only=True)
     veterinarian_info = UserMinimalSerializer(source='veterinarian', read_only=True)
     room_name = serializers.CharField(read_only=True)
@@ -120,6 +135,29 @@ class ChatRoomDetailSerializer(serializers.ModelSerializer):
         model = ChatRoom
         fields = [
             'id', 'user_info', 'veterinarian_info', 'is_active',
-            'room_name', 'messages', 'created_at', 'updated_at'
+            'room_name', 'messages', 'messages_previous', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    def get_latest_messages(self, obj):
+        """Últimos N mensajes en orden cronológico y si hay más antiguos"""
+        if not hasattr(obj, '_latest_messages'):
+            limit = getattr(settings, 'CHAT_ROOM_DETAIL_MESSAGES', ROOM_DETAIL_MESSAGES)
+            latest = list(
+                obj.messages.select_related('sender').order_by('-timestamp', '-id')[:limit + 1]
+            )
+            has_more = len(latest) > limit
+            obj._latest_messages = (latest[:limit][::-1], has_more)
+        return obj._latest_messages
+    
+    def get_messages(self, obj):
+        messages, _ = self.get_latest_messages(obj)
+        return ChatMessageSerializer(messages, many=True, context=self.context).data
+    
+    def get_messages_previous(self, obj):
+        messages, has_more = self.get_latest_messages(obj)
+        if not has_more:
+            return None
+        url = f"{reverse('chat-messages', kwargs={'room_id': obj.id})}?before={messages[0].id}"
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,37 @@
+from .unread import (
+    count_unread_messages,
+    get_unread_count,
+    increment_unread,
+    reset_unread,
+)
+from .counters import rebuild_room_counters, record_messages, record_read
+from .presence import PresenceRegistry, SharedPresenceRegistry, get_presence_registry
+from .receipts import broadcast_read_receipt, mark_read_up_to, read_receipt_event
+from .rooms import broadcast_room_state
+from .writer import (
+    MessageWriter,
+    flush_message_writers,
+    get_message_writer,
+    write_behind_enabled,
+)
+
+__all__ = [
+    'count_unread_messages',
+    'get_unread_count',
+    'increment_unread',
+    'reset_unread',
+    'rebuild_room_counters',
+    'record_messages',
+    'record_read',
+    'PresenceRegistry',
+    'SharedPresenceRegistry',
+    'get_presence_registry',
+    'broadcast_read_receipt',
+    'mark_read_up_to',
+    'read_receipt_event',
+    'broadcast_room_state',
+    'MessageWriter',
+    'flush_message_writers',
+    'get_message_writer',
+    'write_behind_enabled',
+]
@@ -0,0 +1,95 @@
+from collections import Counter
+
+from django.db.models import Case, Count, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest, Substr
+from django.utils import timezone
+
+from apps.chat.models import ChatMessage, ChatRoom
+
+PREVIEW_LENGTH = 255
+
+
+def record_messages(room_id, messages):
+    """
+    Aplica a la sala, con un solo UPDATE, el efecto de mensajes nuevos:
+    último mensaje (si es más reciente que el guardado) y +N en el contador
+    de no leídos del participante que no los envió.
+    """
+    if not messages:
+        return
+    # La sala se escribe de todos modos: updated_at va en el mismo UPDATE
+    now = timezone.now()
+    last = max(messages, key=lambda message: (message.timestamp, message.pk))
+    unread_by_sender = Counter(message.sender_id for message in messages if not message.is_read)
+
+    is_newer = Q(last_message_at__isnull=True) | Q(last_message_at__lte=last.timestamp)
+    changes = {
+        'updated_at': now,
+        'last_message_preview': Case(
+            When(is_newer, then=Value(last.message[:PREVIEW_LENGTH])),
+            default=F('last_message_preview'),
+        ),
+        'last_message_at': Case(
+            When(is_newer, then=Value(last.timestamp)),
+            default=F('last_message_at'),
+        ),
+    }
+    # Cada mensaje suma al contador del participante que no es el remitente
+    for field, participant in (('user_unread_count', 'user_id'), ('veterinarian_unread_count', 'veterinarian_id')):
+        increment = Value(0)
+        for sender_id, count in unread_by_sender.items():
+            increment = increment + Case(
+                When(**{participant: sender_id}, then=Value(0)),
+                default=Value(count),
+                output_field=IntegerField(),
+            )
+        changes[field] = ExpressionWrapper(F(field) + increment, output_field=IntegerField())
+    ChatRoom.objects.filter(pk=room_id).update(**changes)
+
+
+def record_read(room_id, count, reader_id=None, sender_id=None):
+    """
+    Resta count del contador del lector (o, si solo se conoce el remitente,
+    del participante que no lo es), sin bajar de cero.
+    """
+    if not count:
+        return
+    changes = {}
+    for field, participant in (('user_unread_count', 'user_id'), ('veterinarian_unread_count', 'veterinarian_id')):
+        is_reader = Q(**{participant: reader_id}) if reader_id is not None else ~Q(**{participant: sender_id})
+        remaining = ExpressionWrapper(F(field) - count, output_field=IntegerField())
+        changes[field] = Case(
+            When(is_reader, then=Greatest(remaining, Value(0))),
+            default=F(field),
+            output_field=IntegerField(),
+        )
+    ChatRoom.objects.filter(pk=room_id).update(**changes)
+
+
+def rebuild_room_counters(rooms=None):
+    """
+    Recalcula desde ChatMessage el último mensaje y los contadores de las
+    salas indicadas (todas por defecto) con un solo UPDATE. Devuelve las
+    salas actualizadas.
+    """
+    rooms = ChatRoom.objects.all() if rooms is None else rooms
+    messages = ChatMessage.objects.filter(room=OuterRef('pk'))
+    last_message = messages.order_by('-timestamp', '-id')
+
+    def unread_from_other(participant):
+        return Coalesce(
+            Subquery(
+                messages.filter(is_read=False).exclude(sender=OuterRef(participant))
+                .values('room').annotate(total=Count('id')).values('total')[:1]
+            ),
+            Value(0),
+        )
+
+    return rooms.update(
+        last_message_preview=Coalesce(
+            Substr(Subquery(last_message.values('message')[:1]), 1, PREVIEW_LENGTH), Value('')
+        ),
+        last_message_at=Subquery(last_message.values('timestamp')[:1]),
+        user_unread_count=unread_from_other('user'),
+        veterinarian_unread_count=unread_from_other('veterinarian'),
+    )
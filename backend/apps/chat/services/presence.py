@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+import uuid
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PRESENCE_TIMEOUT = 60
+PRESENCE_GROUP = 'chat_presence'
+
+
+def presence_timeout():
+    return getattr(settings, 'CHAT_PRESENCE_TIMEOUT', PRESENCE_TIMEOUT)
+
+
+class PresenceRegistry:
+    """
+    Registro de presencia en memoria del proceso.
+
+    Guarda por usuario sus conexiones abiertas y la hora del último latido
+    de cada una. Un usuario está en línea mientras tenga alguna conexión con
+    un latido más reciente que CHAT_PRESENCE_TIMEOUT segundos; las
+    conexiones que se cortan sin disconnect caducan solas. Nunca se escribe
+    en la base de datos.
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        # {user_id: {channel_name: último latido}}
+        self.connections = {}
+
+    def get_timeout(self):
+        return self.timeout if self.timeout is not None else presence_timeout()
+
+    def _touch(self, user_id, channel_name, now=None):
+        self.connections.setdefault(user_id, {})[channel_name] = now or time.monotonic()
+
+    def _remove(self, user_id, channel_name):
+        channels = self.connections.get(user_id)
+        if channels is not None:
+            channels.pop(channel_name, None)
+            if not channels:
+                del self.connections[user_id]
+
+    async def connect(self, user_id, channel_name):
+        self._touch(user_id, channel_name)
+
+    async def heartbeat(self, user_id, channel_name):
+        self._touch(user_id, channel_name)
+
+    async def disconnect(self, user_id, channel_name):
+        self._remove(user_id, channel_name)
+
+    def is_online(self, user_id, now=None):
+        limit = (now or time.monotonic()) - self.get_timeout()
+        channels = self.connections.get(user_id, {})
+        for channel_name, last_seen in list(channels.items()):
+            if last_seen < limit:
+                self._remove(user_id, channel_name)
+        return bool(self.connections.get(user_id))
+
+    def online(self, user_ids):
+        """Subconjunto de user_ids que está en línea"""
+        return {user_id for user_id in user_ids if self.is_online(user_id)}
+
+
+class SharedPresenceRegistry(PresenceRegistry):
+    """
+    Modo compartido para varios workers: cada cambio local se publica en el
+    grupo chat_presence del channel layer y cada proceso escucha ese grupo
+    con un canal propio para replicar la presencia de los demás. Como los
+    latidos también se publican, las réplicas caducan igual que las locales.
+    """
+
+    def __init__(self, timeout=None):
+        super().__init__(timeout)
+        self.worker_id = uuid.uuid4().hex
+        self._listener = None
+        self._listener_loop = None
+
+    async def connect(self, user_id, channel_name):
+        await super().connect(user_id, channel_name)
+        await self.publish(user_id, channel_name, online=True)
+
+    async def heartbeat(self, user_id, channel_name):
+        await super().heartbeat(user_id, channel_name)
+        await self.publish(user_id, channel_name, online=True)
+
+    async def disconnect(self, user_id, channel_name):
+        await super().disconnect(user_id, channel_name)
+        await self.publish(user_id, channel_name, online=False)
+
+    async def publish(self, user_id, channel_name, online):
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        await self.ensure_listener(channel_layer)
+        await channel_layer.group_send(PRESENCE_GROUP, {
+            'type': 'presence.update',
+            'worker': self.worker_id,
+            'user_id': user_id,
+            'channel': channel_name,
+            'online': online,
+        })
+
+    async def ensure_listener(self, channel_layer):
+        loop = asyncio.get_running_loop()
+        if self._listener is not None and not self._listener.done() and self._listener_loop is loop:
+            return
+        channel_name = await channel_layer.new_channel()
+        await channel_layer.group_add(PRESENCE_GROUP, channel_name)
+        self._listener_loop = loop
+        self._listener = loop.create_task(self.listen(channel_layer, channel_name))
+
+    async def listen(self, channel_layer, channel_name):
+        try:
+            while True:
+                message = await channel_layer.receive(channel_name)
+                self.apply(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception('Se detuvo la réplica de presencia')
+
+    def apply(self, message):
+        """Aplica una actualización publicada por otro worker"""
+        if message.get('type') != 'presence.update' or message.get('worker') == self.worker_id:
+            return
+        # La clave incluye el worker para no chocar con conexiones locales
+        key = f"{message['worker']}:{message['channel']}"
+        if message['online']:
+            self._touch(message['user_id'], key)
+        else:
+            self._remove(message['user_id'], key)
+
+
+_registry = None
+
+
+def get_presence_registry():
+    """Registro del proceso; compartido si CHAT_PRESENCE_SHARED está activo"""
+    global _registry
+    if _registry is None:
+        shared = getattr(settings, 'CHAT_PRESENCE_SHARED', False)
+        _registry = SharedPresenceRegistry() if shared else PresenceRegistry()
+    return _registry
@@ -0,0 +1,47 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import Max
+
+from apps.chat.models import ChatMessage
+from apps.chat.services.counters import record_read
+from apps.chat.services.unread import reset_unread
+
+
+def mark_read_up_to(room_id, reader_id, up_to=None):
+    """
+    Marca como leídos, con un solo UPDATE, los mensajes de la sala que el
+    otro participante envió hasta el id up_to inclusive (o hasta el último
+    si no se indica). Devuelve (mensajes actualizados, marca de agua).
+    """
+    if up_to is None:
+        up_to = ChatMessage.objects.filter(room_id=room_id).aggregate(last=Max('id'))['last']
+        if up_to is None:
+            return 0, None
+
+    with transaction.atomic():
+        updated = ChatMessage.objects.filter(
+            room_id=room_id,
+            id__lte=up_to,
+            is_read=False
+        ).exclude(sender_id=reader_id).update(is_read=True)
+        record_read(room_id, updated, reader_id=reader_id)
+    if updated:
+        reset_unread(reader_id)
+    return updated, up_to
+
+
+def read_receipt_event(reader_id, up_to):
+    """Evento único de confirmación de lectura: todo hasta up_to está leído"""
+    return {
+        'type': 'messages_read',
+        'reader_id': reader_id,
+        'up_to': up_to,
+    }
+
+
+def broadcast_read_receipt(room_id, reader_id, up_to):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(f'chat_{room_id}', read_receipt_event(reader_id, up_to))
@@ -0,0 +1,16 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+
+def broadcast_room_state(room):
+    """Avisa a los consumers conectados que cambió el estado de la sala"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(
+        room.room_name,
+        {
+            'type': 'room_state',
+            'is_active': room.is_active,
+        }
+    )
@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.db.models import Case, F, Q, Sum, When
+
+from apps.chat.models import ChatRoom
+
+UNREAD_CACHE_TIMEOUT = 60 * 5
+
+
+def unread_cache_key(user_id):
+    return f'chat:unread:{user_id}'
+
+
+def count_unread_messages(user):
+    """
+    Suma en una sola consulta los contadores desnormalizados de no leídos
+    del usuario en sus salas activas
+    """
+    total = ChatRoom.objects.filter(
+        Q(user=user) | Q(veterinarian=user),
+        is_active=True,
+    ).aggregate(total=Sum(Case(
+        When(veterinarian=user, then=F('veterinarian_unread_count')),
+        default=F('user_unread_count'),
+    )))['total']
+    return total or 0
+
+
+def get_unread_count(user):
+    """Devuelve el contador cacheado; si no existe lo recalcula desde la BD"""
+    key = unread_cache_key(user.id)
+    count = cache.get(key)
+    if count is None:
+        count = count_unread_messages(user)
+        cache.set(key, count, UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def increment_unread(user_id, delta=1):
+    """
+    Incrementa el contador cacheado del destinatario. Si no está en caché no
+    hace nada: la próxima lectura lo recalcula.
+    """
+    try:
+        cache.incr(unread_cache_key(user_id), delta)
+    except ValueError:
+        pass
+
+
+def reset_unread(*user_ids):
+    """Invalida el contador tras marcar mensajes como leídos o cerrar una sala"""
+    cache.delete_many([unread_cache_key(user_id) for user_id in user_ids])
@@ -0,0 +1,276 @@
+import asyncio
+import atexit
+import logging
+import uuid
+import weakref
+from collections import Counter, deque
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from apps.chat.models import ChatMessage
+from apps.chat.services.counters import record_messages
+from apps.chat.services.unread import increment_unread
+from core.channel_layers import group_send_batch
+
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND_INTERVAL_MS = 50
+WRITE_BEHIND_BATCH_SIZE = 100
+WRITE_BEHIND_MAX_ATTEMPTS = 3
+# Mensajes descartados que se conservan en memoria para inspección
+DEAD_LETTER_LIMIT = 1000
+
+
+def write_behind_enabled():
+    return getattr(settings, 'CHAT_WRITE_BEHIND', False)
+
+
+class MessageWriter:
+    """
+    Escritor diferido (write-behind) de mensajes de chat.
+
+    El consumer encola el mensaje, recibe un id provisional y lo difunde en
+    el acto; el escritor lo guarda con bulk_create cuando pasan
+    CHAT_WRITE_BEHIND_INTERVAL_MS milisegundos desde el primero pendiente o
+    se juntan CHAT_WRITE_BEHIND_BATCH_SIZE mensajes, lo que ocurra antes.
+    Después avisa a cada sala con un evento message_persisted que asocia el
+    id provisional con el definitivo.
+
+    Los lotes se escriben de a uno y en el orden de llegada, así que los ids
+    definitivos respetan el orden en que el proceso recibió los mensajes.
+
+    Si un lote falla se parte en mitades hasta aislar los mensajes que fallan
+    solos; el resto se guarda igual, salvo los posteriores de la misma sala,
+    que se retienen para no recibir un id anterior al del mensaje fallido.
+    Los fallidos y los retenidos vuelven al inicio de la cola en su orden.
+    Tras CHAT_WRITE_BEHIND_MAX_ATTEMPTS intentos un mensaje se descarta:
+    queda en el log, en dead_letters y la sala recibe un evento
+    message_failed con su id provisional.
+    """
+
+    def __init__(self, interval_ms=None, batch_size=None, max_attempts=None):
+        self.interval = (interval_ms or getattr(
+            settings, 'CHAT_WRITE_BEHIND_INTERVAL_MS', WRITE_BEHIND_INTERVAL_MS
+        )) / 1000
+        self.batch_size = batch_size or getattr(settings, 'CHAT_WRITE_BEHIND_BATCH_SIZE', WRITE_BEHIND_BATCH_SIZE)
+        self.max_attempts = max_attempts or getattr(
+            settings, 'CHAT_WRITE_BEHIND_MAX_ATTEMPTS', WRITE_BEHIND_MAX_ATTEMPTS
+        )
+        self.pending = []
+        self.dead_letters = deque(maxlen=DEAD_LETTER_LIMIT)
+        self._lock = asyncio.Lock()
+        self._timer = None
+        self._tasks = set()
+
+    def enqueue(self, room_id, sender_id, recipient_id, message):
+        """Encola un mensaje y devuelve su id provisional y timestamp"""
+        entry = {
+            'provisional_id': f'p-{uuid.uuid4().hex}',
+            'room_id': room_id,
+            'sender_id': sender_id,
+            'recipient_id': recipient_id,
+            'message': message,
+            'timestamp': timezone.now(),
+        }
+        self.pending.append(entry)
+
+        loop = asyncio.get_running_loop()
+        if len(self.pending) >= self.batch_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.interval, self._start_flush)
+        return {
+            'id': entry['provisional_id'],
+            'timestamp': entry['timestamp'].isoformat(),
+        }
+
+    async def flush(self):
+        """Escribe todo lo pendiente; devuelve cuántos mensajes guardó"""
+        async with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch, self.pending = self.pending, []
+            if not batch:
+                return 0
+            try:
+                persisted, failed, held = await database_sync_to_async(self.write_isolating)(batch)
+            except Exception:
+                logger.exception('No se pudo guardar un lote de %s mensajes de chat', len(batch))
+                persisted, failed, held = [], batch, []
+            retry, dead = self.count_attempts(failed)
+            requeue = {entry['provisional_id'] for entry in retry + held}
+            if requeue:
+                self.pending[:0] = [entry for entry in batch if entry['provisional_id'] in requeue]
+                self._timer = asyncio.get_running_loop().call_later(self.interval, self._start_flush)
+        await self.announce(persisted)
+        await self.announce_failed(dead)
+        return len(persisted)
+
+    def _start_flush(self):
+        # Se guarda la referencia para que la tarea no se recolecte a medias
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def flush_sync(self):
+        """Variante síncrona para el cierre del proceso, sin event loop"""
+        batch, self.pending = self.pending, []
+        if batch:
+            close_old_connections()
+            # Al cerrar no hay reintento posible: lo que falla se descarta y
+            # lo retenido detrás se vuelve a intentar sin él
+            while batch:
+                _, failed, batch = self.write_isolating(batch)
+                for entry in failed:
+                    self.dead_letter(entry)
+
+    def count_attempts(self, failed):
+        """Separa los mensajes fallidos en reintentables y descartados"""
+        retry, dead = [], []
+        for entry in failed:
+            entry['attempts'] = entry.get('attempts', 0) + 1
+            if entry['attempts'] >= self.max_attempts:
+                self.dead_letter(entry)
+                dead.append(entry)
+            else:
+                retry.append(entry)
+        return retry, dead
+
+    def dead_letter(self, entry):
+        logger.error(
+            'Mensaje de chat descartado tras %s intentos: sala %s, remitente %s, id provisional %s: %r',
+            entry.get('attempts', 1), entry['room_id'], entry['sender_id'],
+            entry['provisional_id'], entry['message'],
+        )
+        self.dead_letters.append(entry)
+
+    def write_isolating(self, batch, blocked=None):
+        """
+        Escribe el lote y, si falla, cada mitad por separado hasta aislar los
+        mensajes que fallan solos. Las mitades se escriben en orden y una sala
+        con un mensaje fallido queda bloqueada: sus mensajes posteriores no se
+        escriben. Devuelve (guardados, fallidos, retenidos).
+        """
+        blocked = set() if blocked is None else blocked
+        held = [entry for entry in batch if entry['room_id'] in blocked]
+        batch = [entry for entry in batch if entry['room_id'] not in blocked]
+        if not batch:
+            return [], [], held
+        try:
+            return self.write(batch), [], held
+        except Exception:
+            if len(batch) == 1:
+                logger.warning(
+                    'No se pudo guardar el mensaje de chat %s', batch[0]['provisional_id'], exc_info=True
+                )
+                blocked.add(batch[0]['room_id'])
+                return [], batch, held
+        middle = len(batch) // 2
+        left, left_failed, left_held = self.write_isolating(batch[:middle], blocked)
+        right, right_failed, right_held = self.write_isolating(batch[middle:], blocked)
+        return left + right, left_failed + right_failed, held + left_held + right_held
+
+    @staticmethod
+    def write(batch):
+        with transaction.atomic():
+            # bulk_create no pasa por ChatMessage.save: los datos de cada sala
+            # (y su updated_at) se actualizan aquí, un UPDATE por sala del lote
+            messages = ChatMessage.objects.bulk_create([
+                ChatMessage(room_id=entry['room_id'], sender_id=entry['sender_id'], message=entry['message'])
+                for entry in batch
+            ])
+            by_room = {}
+            for message in messages:
+                by_room.setdefault(message.room_id, []).append(message)
+            for room_id, room_messages in by_room.items():
+                record_messages(room_id, room_messages)
+        for recipient_id, count in Counter(entry['recipient_id'] for entry in batch).items():
+            increment_unread(recipient_id, count)
+
+        return [
+            {
+                'room_id': entry['room_id'],
+                'provisional_id': entry['provisional_id'],
+                'message_id': message.pk,
+                'timestamp': message.timestamp.isoformat(),
+            }
+            for entry, message in zip(batch, messages)
+        ]
+
+    async def announce(self, persisted):
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        by_room = {}
+        for item in persisted:
+            by_room.setdefault(item['room_id'], []).append({
+                'type': 'message_persisted',
+                'provisional_id': item['provisional_id'],
+                'message_id': item['message_id'],
+                'timestamp': item['timestamp'],
+            })
+        for room_id, events in by_room.items():
+            await group_send_batch(channel_layer, f'chat_{room_id}', events)
+
+    async def announce_failed(self, dead):
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        by_room = {}
+        for entry in dead:
+            by_room.setdefault(entry['room_id'], []).append({
+                'type': 'message_failed',
+                'provisional_id': entry['provisional_id'],
+            })
+        for room_id, events in by_room.items():
+            await group_send_batch(channel_layer, f'chat_{room_id}', events)
+
+
+# Un escritor por event loop del proceso
+_writers = weakref.WeakKeyDictionary()
+
+
+def get_message_writer():
+    loop = asyncio.get_running_loop()
+    writer = _writers.get(loop)
+    if writer is None:
+        writer = _writers[loop] = MessageWriter()
+    return writer
+
+
+async def flush_message_writers():
+    """Vacía el escritor del loop actual (cierre ordenado del servidor)"""
+    writer = _writers.get(asyncio.get_running_loop())
+    if writer is not None:
+        await writer.flush()
+
+
+@atexit.register
+def _flush_on_exit():
+    # Último recurso si el servidor se detiene sin el evento lifespan
+    for writer in list(_writers.values()):
+        try:
+            writer.flush_sync()
+        except Exception:
+            logger.exception('No se pudieron guardar los mensajes pendientes al cerrar')
+    _writers.clear()
+
+
+async def lifespan_app(scope, receive, send):
+    """
+    Aplicación ASGI para el protocolo lifespan: al apagar el servidor guarda
+    los mensajes que el escritor diferido aún tenga en memoria.
+    """
+    while True:
+        event = await receive()
+        if event['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif event['type'] == 'lifespan.shutdown':
+            await flush_message_writers()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
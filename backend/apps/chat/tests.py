@@ -1,3 +1,113 @@
-from django.test import TestCase
+import asyncio
+import os
+import sqlite3
+import tempfile
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.exceptions import ChannelFull
+from django.test import SimpleTestCase
+
+from core.channel_layers import SQLiteChannelLayer, group_send_batch
+
+
+class SQLiteChannelLayerTests(SimpleTestCase):
+    """Tests del channel layer local compartido entre procesos"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        # Dos instancias sobre el mismo archivo simulan dos workers
+        self.worker_a = SQLiteChannelLayer(path=self.path, poll_interval=0.001)
+        self.worker_b = SQLiteChannelLayer(path=self.path, poll_interval=0.001)
+
+    def tearDown(self):
+        async_to_sync(self.worker_a.close)()
+        async_to_sync(self.worker_b.close)()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_group_send_crosses_workers(self):
+        async def scenario():
+            channel = await self.worker_a.new_channel()
+            await self.worker_a.group_add('chat_1', channel)
+            await self.worker_b.group_send('chat_1', {'type': 'chat.message', 'message': 'Hola'})
+            return await asyncio.wait_for(self.worker_a.receive(channel), timeout=2)
+
+        message = async_to_sync(scenario)()
+        self.assertEqual(message, {'type': 'chat.message', 'message': 'Hola'})
+
+    def test_concurrent_group_sends_are_batched_in_order(self):
+        async def scenario():
+            channels = [await self.worker_a.new_channel() for _ in range(3)]
+            for channel in channels:
+                await self.worker_a.group_add('chat_2', channel)
+            await asyncio.gather(*(
+                self.worker_b.group_send('chat_2', {'type': 'chat.message', 'n': n}) for n in range(5)
+            ))
+            await group_send_batch(self.worker_b, 'chat_2', [{'type': 'chat.message', 'n': 5}])
+            return [
+                [(await self.worker_a.receive(channel))['n'] for _ in range(6)]
+                for channel in channels
+            ]
+
+        for received in async_to_sync(scenario)():
+            self.assertEqual(received, [0, 1, 2, 3, 4, 5])
+
+    def test_idle_receive_does_not_take_write_lock(self):
+        writes = []
+        execute = self.worker_a._execute
+
+        def counting_execute(operation, *args):
+            writes.append(operation.__name__)
+            return execute(operation, *args)
+
+        self.worker_a._execute = counting_execute
+
+        async def scenario():
+            channel = await self.worker_a.new_channel()
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(self.worker_a.receive(channel), timeout=0.05)
+            idle_writes = list(writes)
+            await self.worker_b.send(channel, {'type': 'ping'})
+            message = await asyncio.wait_for(self.worker_a.receive(channel), timeout=2)
+            return idle_writes, message
+
+        idle_writes, message = async_to_sync(scenario)()
+        self.assertEqual(idle_writes, [])
+        self.assertEqual(message, {'type': 'ping'})
+        self.assertEqual(writes, ['_dequeue'])
+
+    def test_close_closes_worker_thread_connections(self):
+        async def scenario():
+            channel = await self.worker_a.new_channel()
+            await self.worker_a.send(channel, {'type': 'ping'})
+            await self.worker_a.receive(channel)
+            connections = list(self.worker_a._connections)
+            await self.worker_a.close()
+            return connections
+
+        connections = async_to_sync(scenario)()
+        # La del hilo que creó el layer y al menos una de un hilo del pool
+        self.assertGreaterEqual(len(connections), 2)
+        self.assertEqual(self.worker_a._connections, [])
+        for connection in connections:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                connection.execute('SELECT 1')
+
+    def test_group_discard_and_capacity(self):
+        layer = SQLiteChannelLayer(path=self.path, capacity=1)
+
+        async def scenario():
+            channel = await layer.new_channel()
+            await layer.group_add('chat_3', channel)
+            await layer.group_discard('chat_3', channel)
+            await layer.group_send('chat_3', {'type': 'chat.message'})
+            await layer.send(channel, {'type': 'first'})
+            with self.assertRaises(ChannelFull):
+                await layer.send(channel, {'type': 'second'})
+            message = await layer.receive(channel)
+            await layer.close()
+            return message
+
+        self.assertEqual(async_to_sync(scenario)(), {'type': 'first'})
@@ -1,8 +1,32 @@
-from django.test import TestCase
+import asyncio
+import time
+from io import StringIO
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from rest_framework.test import APITestCase
 from rest_framework import status
 from apps.chat.models import ChatRoom, ChatMessage
+from apps.chat.routing import websocket_urlpatterns
+from apps.chat.services import (
+    MessageWriter,
+    PresenceRegistry,
+    SharedPresenceRegistry,
+    get_message_writer,
+    get_presence_registry,
+    get_unread_count,
+    increment_unread,
+    mark_read_up_to,
+)
 
 
 class ChatIntegrationTests(APITestCase):
@@ -12,6 +36,8 @@ class ChatIntegrationTests(APITestCase):
     
     def setUp(self):
         """Configuración inicial para los tests"""
+        cache.clear()
+        
         # Crear usuarios de prueba
         self.user1 = User.objects.create_user(
             username='client1',
@@ -129,6 +155,24 @@ class ChatIntegrationTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)  # Solo room1
     
+    def test_list_chat_rooms_constant_queries(self):
+        """Test que el listado de salas no hace consultas por cada sala"""
+        for i in range(5):
+            client = User.objects.create_user(username=f'client_extra{i}', password='testpass123')
+            room = ChatRoom.objects.create(user=client, veterinarian=self.vet1)
+            ChatMessage.objects.create(room=room, sender=client, message=f'Consulta {i}')
+        
+        self.client.force_authenticate(user=self.vet1)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/chat/rooms/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 6)
+        room1 = next(room for room in response.data if room['id'] == self.room1.id)
+        self.assertEqual(room1['last_message_text'], 'Hola, dime en qué puedo ayudarte')
+        # Para el veterinario solo cuenta el mensaje no leído del cliente
+        self.assertEqual(room1['unread_count'], 1)
+    
     def test_get_chat_room_detail(self):
         """Test que obtiene detalles de una sala con mensajes"""
         self.client.force_authenticate(user=self.user1)
@@ -159,11 +203,57 @@ class ChatIntegrationTests(APITestCase):
         response = self.client.get(f'/api/chat/rooms/{self.room1.id}/messages/')
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
         
         # Verificar orden cronológico
-        self.assertEqual(response.data[0]['id'], self.message1.id)
-        self.assertEqual(response.data[1]['id'], self.message2.id)
+        self.assertEqual(response.data['results'][0]['id'], self.message1.id)
+        self.assertEqual(response.data['results'][1]['id'], self.message2.id)
+    
+    @override_settings(CHAT_ROOM_DETAIL_MESSAGES=3)
+    def test_chat_room_detail_returns_latest_messages(self):
+        """Test que el detalle trae solo los últimos mensajes y un enlace al historial"""
+        extra = [
+            ChatMessage.objects.create(room=self.room1, sender=self.user1, message=f'Extra {i}')
+            for i in range(3)
+        ]
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.get(f'/api/chat/rooms/{self.room1.id}/')
+        
+        self.assertEqual([m['id'] for m in response.data['messages']], [m.id for m in extra])
+        self.assertIn(f'before={extra[0].id}', response.data['messages_previous'])
+        
+        older = self.client.get(response.data['messages_previous'])
+        self.assertEqual(
+            [m['id'] for m in older.data['results']],
+            [self.message1.id, self.message2.id]
+        )
+        self.assertIsNone(older.data['previous'])
+    
+    def test_list_chat_messages_before_and_after(self):
+        """Test del paginado por anclas before/after sobre (timestamp, id)"""
+        extra = [
+            ChatMessage.objects.create(room=self.room1, sender=self.user1, message=f'Extra {i}')
+            for i in range(4)
+        ]
+        # Mismo timestamp para todos: el desempate por id mantiene el orden
+        ChatMessage.objects.filter(room=self.room1).update(timestamp=self.message1.timestamp)
+        ids = [self.message1.id, self.message2.id] + [m.id for m in extra]
+        self.client.force_authenticate(user=self.user1)
+        url = f'/api/chat/rooms/{self.room1.id}/messages/'
+        
+        latest = self.client.get(url, {'page_size': 2})
+        self.assertEqual([m['id'] for m in latest.data['results']], ids[-2:])
+        self.assertIsNone(latest.data['next'])
+        
+        before = self.client.get(url, {'page_size': 2, 'before': ids[4]})
+        self.assertEqual([m['id'] for m in before.data['results']], ids[2:4])
+        
+        after = self.client.get(url, {'page_size': 2, 'after': ids[1]})
+        self.assertEqual([m['id'] for m in after.data['results']], ids[2:4])
+        self.assertNotIn('after=', after.data['next'])
+        
+        missing = self.client.get(url, {'before': 999999})
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
     
     def test_mark_messages_as_read(self):
         """Test que marca mensajes como leídos"""
@@ -181,6 +271,20 @@ class ChatIntegrationTests(APITestCase):
         self.message2.refresh_from_db()
         self.assertTrue(self.message2.is_read)
     
+    def test_mark_messages_as_read_up_to(self):
+        """Test que marca como leídos solo hasta el mensaje indicado"""
+        later = ChatMessage.objects.create(room=self.room1, sender=self.vet1, message='Otro mensaje')
+        self.client.force_authenticate(user=self.user1)
+        
+        response = self.client.post(
+            f'/api/chat/rooms/{self.room1.id}/mark-as-read/', {'up_to': self.message2.id}, format='json'
+        )
+        
+        self.assertEqual(response.data['updated_count'], 1)
+        self.assertEqual(response.data['up_to'], self.message2.id)
+        later.refresh_from_db()
+        self.assertFalse(later.is_read)
+    
     def test_unread_messages_count(self):
         """Test que cuenta mensajes no leídos"""
         self.client.force_authenticate(user=self.user1)
@@ -190,6 +294,35 @@ class ChatIntegrationTests(APITestCase):
         self.assertIn('unread_count', response.data)
         self.assertEqual(response.data['unread_count'], 1)  # Solo message2
     
+    def test_unread_messages_count_for_veterinarian(self):
+        """Test que el veterinario cuenta solo los mensajes del cliente"""
+        self.client.force_authenticate(user=self.vet1)
+        response = self.client.get('/api/chat/unread-count/')
+        self.assertEqual(response.data['unread_count'], 1)  # Solo message1
+    
+    def test_unread_messages_count_is_cached(self):
+        """Test que el contador se calcula una vez y luego sale de caché"""
+        self.client.force_authenticate(user=self.user1)
+        with self.assertNumQueries(1):
+            self.client.get('/api/chat/unread-count/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/chat/unread-count/')
+        self.assertEqual(response.data['unread_count'], 1)
+        
+        # El consumer incrementa el contador del destinatario al guardar
+        increment_unread(self.user1.id)
+        response = self.client.get('/api/chat/unread-count/')
+        self.assertEqual(response.data['unread_count'], 2)
+    
+    def test_mark_as_read_clears_cached_count(self):
+        """Test que marcar como leídos invalida el contador cacheado"""
+        self.client.force_authenticate(user=self.user1)
+        self.client.get('/api/chat/unread-count/')
+        self.client.post(f'/api/chat/rooms/{self.room1.id}/mark-as-read/')
+        
+        response = self.client.get('/api/chat/unread-count/')
+        self.assertEqual(response.data['unread_count'], 0)
+    
     def test_close_chat_room(self):
         """Test que cierra una sala de chat"""
         self.client.force_authenticate(user=self.user1)
@@ -224,6 +357,61 @@ class ChatIntegrationTests(APITestCase):
         self.assertEqual(len(response.data), 1)  # Solo la nueva
 
 
+class ChatRoomCounterTests(TestCase):
+    """Tests de los datos desnormalizados de la sala"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='counter_user', password='pass')
+        self.vet = User.objects.create_user(username='counter_vet', password='pass', is_staff=True)
+        self.room = ChatRoom.objects.create(user=self.user, veterinarian=self.vet)
+    
+    def test_new_messages_update_room(self):
+        ChatMessage.objects.create(room=self.room, sender=self.user, message='Consulta')
+        ChatMessage.objects.create(room=self.room, sender=self.vet, message='Respuesta 1')
+        last = ChatMessage.objects.create(room=self.room, sender=self.vet, message='Respuesta 2')
+        
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.last_message_preview, 'Respuesta 2')
+        self.assertEqual(self.room.last_message_at, last.timestamp)
+        self.assertEqual(self.room.unread_count_for(self.user), 2)
+        self.assertEqual(self.room.unread_count_for(self.vet), 1)
+    
+    def test_reading_decrements_counters(self):
+        first = ChatMessage.objects.create(room=self.room, sender=self.vet, message='Uno')
+        ChatMessage.objects.create(room=self.room, sender=self.vet, message='Dos')
+        ChatMessage.objects.create(room=self.room, sender=self.vet, message='Tres')
+        
+        first.mark_as_read()
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.user_unread_count, 2)
+        
+        mark_read_up_to(self.room.id, self.user.id)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.user_unread_count, 0)
+    
+    def test_unread_badge_reads_counters(self):
+        ChatMessage.objects.create(room=self.room, sender=self.vet, message='Hola')
+        other_vet = User.objects.create_user(username='counter_vet2', password='pass', is_staff=True)
+        other_room = ChatRoom.objects.create(user=self.user, veterinarian=other_vet)
+        ChatMessage.objects.create(room=other_room, sender=other_vet, message='Hola')
+        
+        self.assertEqual(get_unread_count(self.user), 2)
+    
+    def test_rebuild_command_repairs_drift(self):
+        ChatMessage.objects.create(room=self.room, sender=self.vet, message='Hola')
+        ChatMessage.objects.create(room=self.room, sender=self.user, message='Buenas')
+        ChatRoom.objects.filter(pk=self.room.pk).update(
+            last_message_preview='', last_message_at=None, user_unread_count=9, veterinarian_unread_count=9
+        )
+        
+        call_command('rebuild_chat_counters', stdout=StringIO())
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.last_message_preview, 'Buenas')
+        self.assertEqual(self.room.user_unread_count, 1)
+        self.assertEqual(self.room.veterinarian_unread_count, 1)
+
+
 class ChatModelTests(TestCase):
     """Tests para los modelos de Chat"""
     
@@ -260,3 +448,341 @@ class ChatModelTests(TestCase):
         self.assertFalse(message.is_read)
         message.mark_as_read()
         self.assertTrue(message.is_read)
+
+
+class ChatConsumerTests(TransactionTestCase):
+    """Tests del consumer de chat con la sala cacheada en la conexión"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='ws_user', password='pass')
+        self.vet = User.objects.create_user(username='ws_vet', password='pass', is_staff=True)
+        self.other = User.objects.create_user(username='ws_other', password='pass')
+        self.room = ChatRoom.objects.create(user=self.user, veterinarian=self.vet)
+    
+    def communicator(self, user, room_id=None):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f'/ws/chat/{room_id or self.room.id}/'
+        )
+        communicator.scope['user'] = user
+        return communicator
+    
+    async def connect(self, communicator):
+        """Conecta y descarta el estado de presencia inicial"""
+        await communicator.connect()
+        snapshot = await communicator.receive_json_from()
+        self.assertEqual(snapshot['type'], 'presence')
+        return snapshot
+    
+    def test_rejects_non_participant(self):
+        async def scenario():
+            communicator = self.communicator(self.other)
+            connected, _ = await communicator.connect()
+            await communicator.disconnect()
+            return connected
+        
+        self.assertFalse(async_to_sync(scenario)())
+    
+    def test_messages_do_not_reload_room(self):
+        async def scenario():
+            communicator = self.communicator(self.user)
+            await self.connect(communicator)
+            replies = []
+            for text in ('uno', 'dos', 'tres'):
+                await communicator.send_json_to({'type': 'chat_message', 'message': text})
+                replies.append(await communicator.receive_json_from())
+            await communicator.disconnect()
+            return replies
+        
+        with CaptureQueriesContext(connection) as queries:
+            replies = async_to_sync(scenario)()
+        
+        self.assertEqual([reply['message'] for reply in replies], ['uno', 'dos', 'tres'])
+        room_selects = [q for q in queries if q['sql'].startswith('SELECT') and 'chat_chatroom' in q['sql']]
+        room_updates = [q for q in queries if q['sql'].startswith('UPDATE "chat_chatroom"')]
+        self.assertEqual(len(room_selects), 1)  # Solo al conectar
+        # Un UPDATE por mensaje: contadores, último mensaje y updated_at juntos
+        self.assertEqual(len(room_updates), 3)
+        self.assertEqual(ChatMessage.objects.filter(room=self.room).count(), 3)
+    
+    def test_closed_room_refuses_messages(self):
+        async def scenario():
+            communicator = self.communicator(self.user)
+            await self.connect(communicator)
+            await communicator.send_json_to({'type': 'chat_message', 'message': 'hola'})
+            first = await communicator.receive_json_from()
+            # Cerrar la sala desde la API avisa a los consumers conectados
+            await get_channel_layer().group_send(self.room.room_name, {'type': 'room_state', 'is_active': False})
+            state = await communicator.receive_json_from()
+            await communicator.send_json_to({'type': 'chat_message', 'message': 'otra vez'})
+            error = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return first, state, error
+        
+        first, state, error = async_to_sync(scenario)()
+        self.assertEqual(first['message'], 'hola')
+        self.assertEqual(state, {'type': 'room_state', 'is_active': False})
+        self.assertEqual(error['type'], 'error')
+        self.assertEqual(ChatMessage.objects.filter(room=self.room).count(), 1)
+    
+    def test_mark_read_up_to_frame_broadcasts_high_water_mark(self):
+        messages = [
+            ChatMessage.objects.create(room=self.room, sender=self.vet, message=f'msg {n}') for n in range(5)
+        ]
+        
+        async def scenario():
+            vet = self.communicator(self.vet)
+            await self.connect(vet)
+            user = self.communicator(self.user)
+            # Al conectar se leen todos los pendientes: un solo evento
+            await self.connect(user)
+            self.assertEqual(await vet.receive_json_from(), {'type': 'presence', 'user_id': self.user.id, 'online': True})
+            on_connect = await vet.receive_json_from()
+            
+            await database_sync_to_async(ChatMessage.objects.filter(room=self.room).update)(is_read=False)
+            await user.send_json_to({'type': 'mark_read_up_to', 'message_id': messages[2].id})
+            on_frame = await vet.receive_json_from()
+            nothing_else = await vet.receive_nothing()
+            await user.disconnect()
+            await vet.disconnect()
+            return on_connect, on_frame, nothing_else
+        
+        on_connect, on_frame, nothing_else = async_to_sync(scenario)()
+        self.assertEqual(on_connect, {'type': 'messages_read', 'reader_id': self.user.id, 'up_to': messages[-1].id})
+        self.assertEqual(on_frame['up_to'], messages[2].id)
+        self.assertTrue(nothing_else)
+        self.assertEqual(ChatMessage.objects.filter(room=self.room, is_read=True).count(), 3)
+
+    
+    def test_presence_and_typing(self):
+        async def scenario():
+            user = self.communicator(self.user)
+            offline = await self.connect(user)
+            vet = self.communicator(self.vet)
+            online = await self.connect(vet)
+            joined = await user.receive_json_from()
+            
+            await vet.send_json_to({'type': 'typing', 'is_typing': True})
+            typing = await user.receive_json_from()
+            no_echo = await vet.receive_nothing()
+            
+            await vet.send_json_to({'type': 'heartbeat'})
+            await vet.disconnect()
+            left = await user.receive_json_from()
+            await user.disconnect()
+            return offline, online, joined, typing, no_echo, left
+        
+        with CaptureQueriesContext(connection) as queries:
+            offline, online, joined, typing, no_echo, left = async_to_sync(scenario)()
+        
+        self.assertEqual(offline, {'type': 'presence', 'user_id': self.vet.id, 'online': False})
+        self.assertEqual(online, {'type': 'presence', 'user_id': self.user.id, 'online': True})
+        self.assertEqual(joined, {'type': 'presence', 'user_id': self.vet.id, 'online': True})
+        self.assertEqual(typing, {'type': 'typing', 'user_id': self.vet.id, 'is_typing': True})
+        self.assertTrue(no_echo)
+        self.assertEqual(left, {'type': 'presence', 'user_id': self.vet.id, 'online': False})
+        # La presencia no se escribe en la base de datos
+        self.assertFalse([q for q in queries if 'presence' in q['sql'].lower()])
+
+    
+    def test_expired_heartbeat_pushes_offline(self):
+        """El otro participante se entera de que dejó de latir con su propio latido"""
+        async def scenario():
+            user = self.communicator(self.user)
+            await self.connect(user)
+            vet = self.communicator(self.vet)
+            await self.connect(vet)
+            joined = await user.receive_json_from()
+            
+            # La conexión del veterinario sigue abierta pero ya no late
+            registry = get_presence_registry()
+            for channel_name in registry.connections[self.vet.id]:
+                registry.connections[self.vet.id][channel_name] -= registry.get_timeout() + 1
+            await user.send_json_to({'type': 'heartbeat'})
+            expired = await user.receive_json_from()
+            await user.send_json_to({'type': 'heartbeat'})
+            once = await user.receive_nothing()
+            
+            await vet.send_json_to({'type': 'heartbeat'})
+            await user.send_json_to({'type': 'heartbeat'})
+            back = await user.receive_json_from()
+            await vet.disconnect()
+            await user.disconnect()
+            return joined, expired, once, back
+        
+        joined, expired, once, back = async_to_sync(scenario)()
+        self.assertTrue(joined['online'])
+        self.assertEqual(expired, {'type': 'presence', 'user_id': self.vet.id, 'online': False})
+        self.assertTrue(once)
+        self.assertEqual(back, {'type': 'presence', 'user_id': self.vet.id, 'online': True})
+
+
+class PresenceRegistryTests(TestCase):
+    """Tests del registro de presencia en memoria"""
+    
+    def test_heartbeat_expiry(self):
+        registry = PresenceRegistry(timeout=10)
+        async_to_sync(registry.connect)(1, 'canal-a')
+        now = time.monotonic()
+        self.assertTrue(registry.is_online(1, now=now + 5))
+        self.assertFalse(registry.is_online(1, now=now + 11))
+        self.assertEqual(registry.connections, {})
+    
+    def test_user_stays_online_while_any_connection_lives(self):
+        registry = PresenceRegistry(timeout=10)
+        async_to_sync(registry.connect)(1, 'canal-a')
+        async_to_sync(registry.connect)(1, 'canal-b')
+        async_to_sync(registry.disconnect)(1, 'canal-a')
+        self.assertEqual(registry.online([1, 2]), {1})
+    
+    def test_shared_mode_replicates_other_workers(self):
+        worker_a = SharedPresenceRegistry(timeout=10)
+        worker_b = SharedPresenceRegistry(timeout=10)
+        
+        async def scenario():
+            await worker_b.ensure_listener(get_channel_layer())
+            await worker_a.connect(7, 'canal-a')
+            for _ in range(100):
+                if worker_b.is_online(7):
+                    break
+                await asyncio.sleep(0.01)
+            online = worker_b.is_online(7)
+            await worker_a.disconnect(7, 'canal-a')
+            for _ in range(100):
+                if not worker_b.is_online(7):
+                    break
+                await asyncio.sleep(0.01)
+            return online, worker_b.is_online(7)
+        
+        self.assertEqual(async_to_sync(scenario)(), (True, False))
+
+@override_settings(CHAT_WRITE_BEHIND=True, CHAT_WRITE_BEHIND_INTERVAL_MS=20)
+class ChatWriteBehindTests(TransactionTestCase):
+    """Tests de la escritura diferida de mensajes"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='wb_user', password='pass')
+        self.vet = User.objects.create_user(username='wb_vet', password='pass', is_staff=True)
+        self.room = ChatRoom.objects.create(user=self.user, veterinarian=self.vet)
+    
+    def test_broadcasts_provisional_ids_then_persists_in_order(self):
+        async def scenario():
+            communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/chat/{self.room.id}/')
+            communicator.scope['user'] = self.user
+            await communicator.connect()
+            for text in ('uno', 'dos', 'tres'):
+                await communicator.send_json_to({'type': 'chat_message', 'message': text})
+            frames = [await communicator.receive_json_from(timeout=2) for _ in range(7)]
+            await communicator.disconnect()
+            return frames
+        
+        frames = async_to_sync(scenario)()
+        broadcast = [frame for frame in frames if frame['type'] == 'chat_message']
+        persisted = [frame for frame in frames if frame['type'] == 'message_persisted']
+        
+        self.assertTrue(all(frame['provisional'] for frame in broadcast))
+        self.assertEqual(
+            [frame['provisional_id'] for frame in persisted],
+            [frame['message_id'] for frame in broadcast]
+        )
+        stored = list(ChatMessage.objects.filter(room=self.room).order_by('id'))
+        self.assertEqual([message.message for message in stored], ['uno', 'dos', 'tres'])
+        self.assertEqual([message.id for message in stored], [frame['message_id'] for frame in persisted])
+    
+    def test_batch_size_triggers_single_bulk_insert(self):
+        writer_holder = {}
+        
+        async def scenario():
+            writer = writer_holder['writer'] = MessageWriter(interval_ms=10000, batch_size=5)
+            for n in range(5):
+                writer.enqueue(self.room.id, self.user.id, self.vet.id, f'mensaje {n}')
+            await asyncio.sleep(0.2)
+        
+        with CaptureQueriesContext(connection) as queries:
+            async_to_sync(scenario)()
+        
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "chat_chatmessage"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(ChatMessage.objects.filter(room=self.room).count(), 5)
+        self.assertEqual(writer_holder['writer'].pending, [])
+    
+    def test_flush_sync_persists_pending_on_shutdown(self):
+        async def scenario():
+            writer = MessageWriter(interval_ms=10000)
+            writer.enqueue(self.room.id, self.user.id, self.vet.id, 'pendiente')
+            return writer
+        
+        writer = async_to_sync(scenario)()
+        self.assertFalse(ChatMessage.objects.exists())
+        writer.flush_sync()
+        self.assertEqual(ChatMessage.objects.get().message, 'pendiente')
+    
+    def test_poison_message_is_isolated_and_dead_lettered(self):
+        """Un mensaje que no se puede guardar no bloquea al resto del lote"""
+        async def scenario():
+            writer = MessageWriter(interval_ms=10000, max_attempts=2)
+            writer.enqueue(self.room.id, self.user.id, self.vet.id, 'antes')
+            writer.enqueue(self.room.id + 999, self.user.id, self.vet.id, 'sala inexistente')
+            writer.enqueue(self.room.id, self.user.id, self.vet.id, 'después')
+            first = await writer.flush()
+            retried = len(writer.pending)
+            second = await writer.flush()
+            return writer, first, retried, second
+        
+        with self.assertLogs('apps.chat.services.writer', level='ERROR'):
+            writer, first, retried, second = async_to_sync(scenario)()
+        
+        self.assertEqual((first, retried, second), (2, 1, 0))
+        self.assertEqual(writer.pending, [])
+        self.assertEqual([entry['message'] for entry in writer.dead_letters], ['sala inexistente'])
+        self.assertEqual(
+            list(ChatMessage.objects.order_by('id').values_list('message', flat=True)),
+            ['antes', 'después']
+        )
+    
+    def test_failed_message_holds_back_later_messages_of_its_room(self):
+        """Los mensajes posteriores de la sala no adelantan al que falló"""
+        other_room = ChatRoom.objects.create(user=self.vet, veterinarian=self.vet)
+        
+        async def scenario():
+            writer = MessageWriter(interval_ms=10000, max_attempts=2)
+            writer.enqueue(self.room.id, self.user.id, self.vet.id, 'uno')
+            writer.enqueue(self.room.id, self.user.id + 999, self.vet.id, 'remitente inexistente')
+            writer.enqueue(self.room.id, self.user.id, self.vet.id, 'tres')
+            writer.enqueue(other_room.id, self.vet.id, self.vet.id, 'otra sala')
+            rounds = []
+            for _ in range(3):
+                saved = await writer.flush()
+                stored = await database_sync_to_async(list)(
+                    ChatMessage.objects.order_by('id').values_list('message', flat=True)
+                )
+                rounds.append((saved, [entry['message'] for entry in writer.pending], stored))
+            return rounds
+        
+        with self.assertLogs('apps.chat.services.writer', level='ERROR'):
+            rounds = async_to_sync(scenario)()
+        
+        self.assertEqual(rounds, [
+            (2, ['remitente inexistente', 'tres'], ['uno', 'otra sala']),
+            (0, ['tres'], ['uno', 'otra sala']),
+            (1, [], ['uno', 'otra sala', 'tres']),
+        ])
+    
+    @override_settings(CHAT_WRITE_BEHIND_INTERVAL_MS=10000)
+    def test_disconnect_does_not_flush_the_writer(self):
+        async def scenario():
+            communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/chat/{self.room.id}/')
+            communicator.scope['user'] = self.user
+            await communicator.connect()
+            await communicator.send_json_to({'type': 'chat_message', 'message': 'en cola'})
+            await communicator.receive_json_from(timeout=2)
+            await communicator.receive_json_from(timeout=2)
+            await communicator.disconnect()
+            writer = get_message_writer()
+            stored = await database_sync_to_async(ChatMessage.objects.count)()
+            pending = len(writer.pending)
+            await writer.flush()
+            return stored, pending
+        
+        self.assertEqual(async_to_sync(scenario)(), (0, 1))
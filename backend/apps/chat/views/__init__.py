@@ -5,7 +5,16 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 from django.contrib.auth.models import User
 
+from core.pagination import KeysetPagination
+from apps.chat.pagination import ChatMessagePagination
 from apps.chat.models import ChatRoom, ChatMessage
+from apps.chat.services import (
+    broadcast_read_receipt,
+    broadcast_room_state,
+    get_unread_count,
+    mark_read_up_to,
+    reset_unread,
+)
 from apps.chat.serializers import (
     ChatRoomSerializer,
     ChatRoomCreateSerializer,
@@ -40,14 +49,19 @@ class ChatRoomListCreateView(generics.ListCreateAPIView):
     ordering = ['-updated_at']
     
     def get_queryset(self):
-        """Retorna salas donde el usuario es participante"""
+        """
+        Retorna salas donde el usuario es participante. El último mensaje y
+        los no leídos están desnormalizados en la sala: una sola consulta
+        """
         user = self.request.user
         if user.is_staff:
             # Veterinarios ven salas donde son el vet
-            return ChatRoom.objects.filter(veterinarian=user)
+            rooms = ChatRoom.objects.filter(veterinarian=user)
         else:
             # Usuarios normales ven sus propias salas
-            return ChatRoom.objects.filter(user=user)
+            rooms = ChatRoom.objects.filter(user=user)
+        
+        return rooms.select_related('user', 'veterinarian')
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -72,10 +86,11 @@ class ChatRoomDetailView(generics.RetrieveUpdateAPIView):
     def get_queryset(self):
         """Solo permite acceder a salas donde el usuario es participante"""
         user = self.request.user
+        # Los mensajes no se precargan: el serializer trae solo los últimos
         if user.is_staff:
-            return ChatRoom.objects.filter(veterinarian=user).prefetch_related('messages__sender')
+            return ChatRoom.objects.filter(veterinarian=user).select_related('user', 'veterinarian')
         else:
-            return ChatRoom.objects.filter(user=user).prefetch_related('messages__sender')
+            return ChatRoom.objects.filter(user=user).select_related('user', 'veterinarian')
     
     def update(self, request, *args, **kwargs):
         """Solo permite cambiar is_active"""
@@ -84,6 +99,8 @@ class ChatRoomDetailView(generics.RetrieveUpdateAPIView):
         if 'is_active' in request.data:
             instance.is_active = request.data['is_active']
             instance.save(update_fields=['is_active'])
+            reset_unread(instance.user_id, instance.veterinarian_id)
+            broadcast_room_state(instance)
         
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
@@ -91,12 +108,14 @@ class ChatRoomDetailView(generics.RetrieveUpdateAPIView):
 
 class ChatMessageListView(generics.ListAPIView):
     """
-    Lista mensajes de una sala específica
-    GET: /api/chat/rooms/{room_id}/messages/
+    Lista mensajes de una sala específica, por páginas en orden cronológico
+    GET: /api/chat/rooms/{room_id}/messages/  (la página más reciente)
+    GET: /api/chat/rooms/{room_id}/messages/?before={id} | ?after={id}
     """
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ChatMessageSerializer
-    ordering = ['timestamp']
+    pagination_class = ChatMessagePagination
+    ordering = ['timestamp', 'id']
     
     def get_queryset(self):
         room_id = self.kwargs.get('room_id')
@@ -122,8 +141,8 @@ class ChatMessageListView(generics.ListAPIView):
 
 class MarkMessagesAsReadView(APIView):
     """
-    Marca todos los mensajes de una sala como leídos
-    POST: /api/chat/rooms/{room_id}/mark-as-read/
+    Marca como leídos los mensajes de una sala, todos o hasta un id
+    POST: /api/chat/rooms/{room_id}/mark-as-read/  {"up_to": id opcional}
     """
     permission_classes = [permissions.IsAuthenticated]
     
@@ -142,15 +161,25 @@ class MarkMessagesAsReadView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Marcar mensajes como leídos (excepto los propios)
-        updated = ChatMessage.objects.filter(
-            room=room,
-            is_read=False
-        ).exclude(sender=user).update(is_read=True)
+        # Marcar como leídos (excepto los propios) hasta up_to, o todos
+        up_to = request.data.get('up_to')
+        if up_to is not None:
+            try:
+                up_to = int(up_to)
+            except (TypeError, ValueError):
+                return Response(
+                    {'up_to': 'Debe ser el id de un mensaje'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        updated, up_to = mark_read_up_to(room.id, user.id, up_to)
+        if updated:
+            broadcast_read_receipt(room.id, user.id, up_to)
         
         return Response({
             'message': f'{updated} mensajes marcados como leídos',
-            'updated_count': updated
+            'updated_count': updated,
+            'up_to': up_to
         })
 
 
@@ -162,31 +191,4 @@ class UnreadMessagesCountView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        user = request.user
-        
-        if user.is_staff:
-            # Veterinarios: mensajes de usuarios en sus salas
-            rooms = ChatRoom.objects.filter(veterinarian=user, is_active=True)
-        else:
-            # Usuarios: mensajes de veterinarios en sus salas
-            rooms = ChatRoom.objects.filter(user=user, is_active=True)
-        
-        total_unread = 0
-        for room in rooms:
-            if user.is_staff:
-                # Contar mensajes no leídos de usuarios
-                count = ChatMessage.objects.filter(
-                    room=room,
-                    is_read=False,
-                    sender=room.user
-                ).count()
-            else:
-                # Contar mensajes no leídos de veterinarios
-                count = ChatMessage.objects.filter(
-                    room=room,
-                    is_read=False,
-                    sender=room.veterinarian
-                ).count()
-            total_unread += count
-        
-        return Response({'unread_count': total_unread})
+        return Response({'unread_count': get_unread_count(request.user)})
@@ -0,0 +1,26 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.dashboard.services import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye la tabla DailySalesRollup a partir de los pedidos existentes. '
+        'Ejecutarlo tras modificar pedidos con QuerySet.update(), que no actualiza el resumen'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='Fecha inicial (YYYY-MM-DD), inclusive')
+        parser.add_argument('--end', help='Fecha final (YYYY-MM-DD), inclusive')
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as exc:
+            raise CommandError(f'Fecha inválida: {exc}')
+
+        rows = rebuild_sales_rollups(start=start, end=end)
+        self.stdout.write(self.style.SUCCESS(f'{rows} filas de resumen generadas'))
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.dashboard.services import QUERY_PLANS, explain_query_plans
+
+
+class Command(BaseCommand):
+    help = (
+        'Muestra el plan de ejecución (EXPLAIN QUERY PLAN en SQLite) de cada '
+        'consulta registrada de listados y dashboard y señala los recorridos completos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Consultas a explicar (por defecto todas)')
+        parser.add_argument('--sql', action='store_true', help='Muestra también el SQL de cada consulta')
+        parser.add_argument(
+            '--fail-on-scan',
+            action='store_true',
+            help='Termina con error si alguna consulta recorre una tabla completa',
+        )
+
+    def handle(self, *args, **options):
+        unknown = sorted(set(options['names']) - set(QUERY_PLANS))
+        if unknown:
+            raise CommandError(f"Consultas no registradas: {', '.join(unknown)}")
+
+        results = explain_query_plans(options['names'])
+        scans = allowed = 0
+        for result in results:
+            self.stdout.write(self.style.MIGRATE_HEADING(result['name']))
+            if options['sql']:
+                self.stdout.write(f"  {result['sql']}")
+            for line in result['plan'].splitlines():
+                self.stdout.write(f'    {line}')
+            for line in result['full_scans']:
+                if result['allow_scan']:
+                    self.stdout.write(self.style.NOTICE(f'  recorrido completo permitido: {line.strip()}'))
+                else:
+                    self.stdout.write(self.style.ERROR(f'  recorrido completo: {line.strip()}'))
+            for line in result['sorts']:
+                self.stdout.write(self.style.WARNING(f'  orden en memoria: {line.strip()}'))
+            scans += bool(result['full_scans']) and not result['allow_scan']
+            allowed += bool(result['full_scans']) and result['allow_scan']
+
+        if scans:
+            message = f'{scans} de {len(results)} consultas recorren una tabla completa'
+            if options['fail_on_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            message = f'{len(results)} consultas sin recorridos completos'
+            if allowed:
+                message += f' ({allowed} con recorridos permitidos)'
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.3 on 2026-10-18 08:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('status', models.CharField(max_length=20, verbose_name='Estado del pedido')),
+                ('orders', models.IntegerField(default=0, verbose_name='Pedidos')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ingresos')),
+            ],
+            options={
+                'verbose_name': 'Resumen diario de ventas',
+                'verbose_name_plural': 'Resúmenes diarios de ventas',
+                'ordering': ['date', 'status'],
+                'indexes': [models.Index(fields=['status', 'date'], name='dashboard_d_status_0f351b_idx')],
+                'unique_together': {('date', 'status')},
+            },
+        ),
+    ]
@@ -1,3 +1,25 @@
 from django.db import models
 
-# Create your models here.
+
+class DailySalesRollup(models.Model):
+    """
+    Resumen diario de pedidos (cantidad e ingresos) por estado.
+    Se mantiene de forma incremental desde los guardados de Order y se
+    reconstruye con el comando backfill_sales_rollups.
+    """
+    date = models.DateField(verbose_name='Fecha')
+    status = models.CharField(max_length=20, verbose_name='Estado del pedido')
+    orders = models.IntegerField(default=0, verbose_name='Pedidos')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Ingresos')
+
+    class Meta:
+        ordering = ['date', 'status']
+        verbose_name = 'Resumen diario de ventas'
+        verbose_name_plural = 'Resúmenes diarios de ventas'
+        unique_together = ['date', 'status']
+        indexes = [
+            models.Index(fields=['status', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.status}: {self.orders} pedidos / {self.revenue}"
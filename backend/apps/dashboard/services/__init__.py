@@ -0,0 +1,26 @@
+from .services import get_dashboard_stats, query_budget, sales_over_time, upcoming_appointments
+from .rollups import (
+    apply_rollup_delta,
+    rebuild_sales_rollups,
+    record_order_deleted,
+    record_order_saved,
+    record_order_saving,
+    snapshot_order,
+)
+from .plans import QUERY_PLANS, explain_query_plans, register_query_plan
+
+__all__ = [
+    'get_dashboard_stats',
+    'query_budget',
+    'sales_over_time',
+    'upcoming_appointments',
+    'apply_rollup_delta',
+    'rebuild_sales_rollups',
+    'record_order_deleted',
+    'record_order_saved',
+    'record_order_saving',
+    'snapshot_order',
+    'QUERY_PLANS',
+    'explain_query_plans',
+    'register_query_plan',
+]
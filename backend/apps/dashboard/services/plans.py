@@ -0,0 +1,249 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection, models
+from django.db.models import QuerySet
+from django.db.models.functions import TruncDay
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.request import Request
+
+from apps.appointments.models import Appointment
+from apps.appointments.services import booked_rows, day_slots
+from apps.dashboard.services.services import get_dashboard_stats, sales_over_time, upcoming_appointments
+from apps.orders.models import Order
+from core.pagination import KeysetPagination
+
+# {nombre: función sin argumentos que arma la consulta a explicar}
+QUERY_PLANS = {}
+
+# Consultas que recorren la tabla completa a propósito (sin filtro)
+SCAN_ALLOWED = set()
+
+# Ids de ejemplo: el plan depende de la forma de la consulta, no del valor
+SAMPLE_ID = 1
+
+
+def register_query_plan(name, allow_scan=False):
+    """
+    Registra una consulta de un listado o del dashboard para el comando
+    explain_queries. La función no recibe argumentos y arma la consulta con
+    el mismo código que la vista o el servicio: devuelve el queryset sin
+    ejecutarlo o ejecuta el servicio, y entonces se explica cada consulta
+    que emitió. Con allow_scan=True sus recorridos completos se informan
+    pero no cuentan como hallazgo.
+    """
+    def decorator(func):
+        QUERY_PLANS[name] = func
+        if allow_scan:
+            SCAN_ALLOWED.add(name)
+        else:
+            SCAN_ALLOWED.discard(name)
+        return func
+    return decorator
+
+
+def full_scans(plan):
+    """
+    Líneas del plan que recorren una tabla completa. En SQLite solo SEARCH
+    usa el índice para acotar filas: SCAN ... USING INDEX sigue leyendo todo
+    el índice, así que también cuenta.
+    """
+    if connection.vendor == 'postgresql':
+        return [line.strip() for line in plan.splitlines() if 'Seq Scan' in line]
+    return [line for line in plan.splitlines() if ' SCAN ' in f' {line} ']
+
+
+def in_memory_sorts(plan):
+    """Líneas del plan que ordenan en memoria en lugar de leer un índice en orden"""
+    if connection.vendor == 'postgresql':
+        return [line.strip() for line in plan.splitlines() if line.strip().startswith('Sort')]
+    return [line for line in plan.splitlines() if 'TEMP B-TREE' in line]
+
+
+class QueryRecorder:
+    """Wrapper de ejecución que guarda el SQL y los parámetros emitidos"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def explain_sql(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+
+def query_statements(build):
+    """
+    (sql, plan) de una consulta registrada. Un queryset se explica sin
+    ejecutarlo; si la función ejecuta consultas (agregados del dashboard),
+    se explica cada una con el SQL y los parámetros que emitió.
+    """
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        result = build()
+    if isinstance(result, QuerySet):
+        return [(str(result.query), result.explain())]
+    return [(sql, explain_sql(sql, params)) for sql, params in recorder.queries]
+
+
+def explain_query_plans(names=None):
+    """
+    Ejecuta EXPLAIN (EXPLAIN QUERY PLAN en SQLite) para las consultas
+    registradas y devuelve por cada una su SQL, el plan y los hallazgos.
+    """
+    results = []
+    for name, build in QUERY_PLANS.items():
+        if names and name not in names:
+            continue
+        statements = query_statements(build)
+        plan = '\n'.join(plan for _, plan in statements)
+        results.append({
+            'name': name,
+            'sql': '\n'.join(sql for sql, _ in statements),
+            'plan': plan,
+            'full_scans': full_scans(plan),
+            'allow_scan': name in SCAN_ALLOWED,
+            'sorts': in_memory_sorts(plan),
+        })
+    return results
+
+
+def sample_user(is_staff=False):
+    return User(pk=SAMPLE_ID, username='explain', is_staff=is_staff)
+
+
+def sample_value(field):
+    """Valor de ejemplo para una posición de cursor"""
+    if isinstance(field, models.DateTimeField):
+        return timezone.now()
+    if isinstance(field, models.DateField):
+        return timezone.localdate()
+    return SAMPLE_ID
+
+
+def view_queryset(view_class, user, cursor=False, **params):
+    """
+    Queryset que arma la vista para un GET con params: su get_queryset y
+    sus filter_backends. Si pagina con KeysetPagination devuelve la página
+    con su LIMIT; con cursor=True, la siguiente página con el predicado del
+    cursor.
+    """
+    view = view_class()
+    view.args, view.kwargs, view.format_kwarg = (), {}, None
+    view.request = Request(RequestFactory().get('/', params))
+    view.request.user = user
+    queryset = view.filter_queryset(view.get_queryset())
+
+    pagination_class = getattr(view, 'pagination_class', None)
+    if pagination_class is None or not issubclass(pagination_class, KeysetPagination):
+        return queryset
+    paginator = pagination_class()
+    page = paginator.get_page_queryset(queryset, view.request, view)
+    if not cursor:
+        return page
+
+    position = [sample_value(field) for field in paginator.fields]
+    params[paginator.cursor_query_param] = paginator.encode_position(position, reverse=False)
+    request = Request(RequestFactory().get('/', params))
+    request.user = user
+    return paginator.get_page_queryset(queryset, request, view)
+
+
+# --------------------------------------------------
+# Citas (AppointmentListCreateView y disponibilidad)
+# --------------------------------------------------
+
+def appointments_view(user, **params):
+    from apps.appointments.views import AppointmentListCreateView
+    return view_queryset(AppointmentListCreateView, user, **params)
+
+
+@register_query_plan('appointments.list_owner')
+def appointments_list_owner():
+    return appointments_view(sample_user())
+
+
+@register_query_plan('appointments.list_owner_status')
+def appointments_list_owner_status():
+    return appointments_view(sample_user(), status=Appointment.STATUS_SCHEDULED)
+
+
+@register_query_plan('appointments.list_pet')
+def appointments_list_pet():
+    # El filtro ?pet= de DjangoFilterBackend valida que la mascota exista;
+    # se aplica el mismo pet_id sobre la consulta de la vista
+    return appointments_view(sample_user(is_staff=True)).filter(pet_id=SAMPLE_ID)
+
+
+@register_query_plan('appointments.list_staff_status')
+def appointments_list_staff_status():
+    return appointments_view(sample_user(is_staff=True), status=Appointment.STATUS_SCHEDULED)
+
+
+@register_query_plan('appointments.availability')
+def appointments_availability():
+    # Próximo lunes: un día con horario de atención
+    today = timezone.localdate()
+    slots = day_slots(today + timedelta(days=7 - today.weekday()))
+    return booked_rows(slots[0], slots[-1])
+
+
+# --------------------------------------------------
+# Pedidos (OrderListCreateView con KeysetPagination)
+# --------------------------------------------------
+
+def orders_view(user, cursor=False, **params):
+    from apps.orders.views import OrderListCreateView
+    return view_queryset(OrderListCreateView, user, cursor=cursor, **params)
+
+
+@register_query_plan('orders.list_customer')
+def orders_list_customer():
+    return orders_view(sample_user())
+
+
+@register_query_plan('orders.list_customer_next')
+def orders_list_customer_next():
+    return orders_view(sample_user(), cursor=True)
+
+
+@register_query_plan('orders.list_customer_status')
+def orders_list_customer_status():
+    return orders_view(sample_user(), status=Order.STATUS_PENDING)
+
+
+@register_query_plan('orders.list_staff_status')
+def orders_list_staff_status():
+    return orders_view(sample_user(is_staff=True), status=Order.STATUS_PENDING)
+
+
+@register_query_plan('orders.list_staff_status_next')
+def orders_list_staff_status_next():
+    return orders_view(sample_user(is_staff=True), cursor=True, status=Order.STATUS_PENDING)
+
+
+# --------------------------------------------------
+# Dashboard
+# --------------------------------------------------
+
+@register_query_plan('dashboard.stats', allow_scan=True)
+def dashboard_stats():
+    # Agregación condicional sobre cada tabla completa: recorrerla es el plan esperado
+    get_dashboard_stats()
+
+
+@register_query_plan('dashboard.upcoming_appointments')
+def dashboard_upcoming_appointments():
+    return upcoming_appointments()
+
+
+@register_query_plan('dashboard.sales_over_time')
+def dashboard_sales_over_time():
+    today = timezone.localdate()
+    return sales_over_time(today - timedelta(days=30), today, TruncDay)
@@ -0,0 +1,153 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.orders.models import Order
+from apps.dashboard.models import DailySalesRollup
+
+
+def rollup_date(created_at):
+    """Fecha local (TIME_ZONE) a la que se imputa un pedido"""
+    if timezone.is_aware(created_at):
+        return timezone.localdate(created_at)
+    return created_at.date()
+
+
+def apply_rollup_delta(day, status, orders, revenue):
+    """
+    Suma orders/revenue a la fila (day, status) con una sola UPDATE con F();
+    crea la fila si todavía no existe.
+    """
+    if not orders and not revenue:
+        return
+    revenue = Decimal(revenue)
+    rows = DailySalesRollup.objects.filter(date=day, status=status)
+    if rows.update(orders=F('orders') + orders, revenue=F('revenue') + revenue):
+        return
+    try:
+        with transaction.atomic():
+            DailySalesRollup.objects.create(date=day, status=status, orders=orders, revenue=revenue)
+    except IntegrityError:
+        # Otro proceso creó la fila entre la UPDATE y el INSERT
+        rows.update(orders=F('orders') + orders, revenue=F('revenue') + revenue)
+
+
+ROLLUP_FIELDS = ('created_at', 'status', 'total')
+# updated_at no alimenta el rollup: delata una recarga con refresh_from_db
+SNAPSHOT_FIELDS = ROLLUP_FIELDS + ('updated_at',)
+
+
+def rollup_key(created_at, status, total):
+    return rollup_date(created_at), status, Decimal(total)
+
+
+def snapshot_order(order, update_fields=None):
+    """
+    Guarda en la instancia los valores con los que el pedido está en la base
+    para calcular la diferencia en el siguiente guardado sin consultarla.
+    Lee de __dict__ para no disparar consultas sobre campos diferidos; los
+    que falten (o que un guardado con update_fields no escribió) quedan en
+    None y se leerán de la base cuando hagan falta.
+    """
+    values = order.__dict__
+    order._rollup_snapshot = tuple(
+        values.get(name) if update_fields is None or name in update_fields else None
+        for name in SNAPSHOT_FIELDS
+    )
+
+
+def stored_rollup_values(order):
+    """
+    (created_at, status, total) con los que el pedido está guardado. Salen
+    de la instantánea si está completa y la instancia no se recargó desde
+    entonces (refresh_from_db trae otro updated_at); si no, de la base.
+    """
+    snapshot = getattr(order, '_rollup_snapshot', None)
+    if snapshot and None not in snapshot and snapshot[-1] == order.__dict__.get('updated_at'):
+        return snapshot[:-1]
+    return Order.objects.filter(pk=order.pk).values_list(*ROLLUP_FIELDS).first()
+
+
+def rollup_change(order, update_fields=None):
+    """
+    (anteriores, nuevos) valores del rollup si este guardado los modifica, o
+    None. Los campos diferidos o fuera de update_fields no se escriben y
+    conservan el valor guardado.
+    """
+    values = order.__dict__
+    written = [name in values and (update_fields is None or name in update_fields) for name in ROLLUP_FIELDS]
+    if not any(written):
+        return None
+    old = stored_rollup_values(order)
+    if old is None:
+        return None
+    new = tuple(values[name] if write else value for name, write, value in zip(ROLLUP_FIELDS, written, old))
+    if rollup_key(*old) == rollup_key(*new):
+        return None
+    return old, new
+
+
+def record_order_saving(order, update_fields=None):
+    """pre_save: anota en la instancia el cambio que el guardado hará al rollup"""
+    order._rollup_change = None if order._state.adding else rollup_change(order, update_fields)
+
+
+def record_order_saved(order, created, update_fields=None):
+    """post_save: aplica al rollup la diferencia anotada en pre_save"""
+    change = order.__dict__.pop('_rollup_change', None)
+    if created:
+        apply_rollup_delta(rollup_date(order.created_at), order.status, 1, order.total)
+    elif change is not None:
+        (old_day, old_status, old_total), (new_day, new_status, new_total) = map(
+            lambda values: rollup_key(*values), change
+        )
+        apply_rollup_delta(old_day, old_status, -1, -old_total)
+        apply_rollup_delta(new_day, new_status, 1, new_total)
+
+    snapshot_order(order, update_fields)
+
+
+def record_order_deleted(order):
+    """pre_delete: descuenta el pedido de su fila del rollup con los valores guardados"""
+    stored = stored_rollup_values(order)
+    if stored is None:
+        return
+    day, status, total = rollup_key(*stored)
+    apply_rollup_delta(day, status, -1, -total)
+
+
+def rebuild_sales_rollups(start=None, end=None):
+    """
+    Recalcula los rollups desde la tabla de pedidos para el rango de fechas
+    indicado (ambos extremos opcionales e inclusivos). Devuelve la cantidad de
+    filas generadas.
+    """
+    rollups = DailySalesRollup.objects.all()
+    orders = Order.objects.all()
+    if start:
+        rollups = rollups.filter(date__gte=start)
+        orders = orders.filter(created_at__date__gte=start)
+    if end:
+        rollups = rollups.filter(date__lte=end)
+        orders = orders.filter(created_at__date__lte=end)
+
+    grouped = orders.annotate(day=TruncDate('created_at')).values('day', 'status').annotate(
+        count=Count('id'),
+        amount=Sum('total'),
+    ).order_by()
+
+    with transaction.atomic():
+        rollups.delete()
+        created = DailySalesRollup.objects.bulk_create(
+            DailySalesRollup(
+                date=row['day'],
+                status=row['status'],
+                orders=row['count'],
+                revenue=row['amount'] or 0,
+            )
+            for row in grouped
+        )
+    return len(created)
@@ -0,0 +1,143 @@
+import logging
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.orders.models import Order
+from apps.products.models import Product
+from apps.pets.models import Pet
+from apps.appointments.models import Appointment
+from apps.payments.models import Payment
+from apps.dashboard.models import DailySalesRollup
+
+logger = logging.getLogger(__name__)
+
+LOW_STOCK_THRESHOLD = 10
+UPCOMING_DAYS = 7
+
+
+class QueryCounter:
+    """Wrapper de ejecución que cuenta las consultas SQL emitidas"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def query_budget(budget, label='dashboard'):
+    """
+    Cuenta las consultas ejecutadas dentro del bloque y registra un warning
+    si superan el presupuesto indicado.
+    """
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        yield counter
+    if counter.count > budget:
+        logger.warning(
+            '%s: %d consultas ejecutadas, presupuesto %d',
+            label, counter.count, budget
+        )
+
+
+def get_dashboard_stats(now=None):
+    """
+    Calcula las secciones overview, current_month, orders_by_status y
+    payments del dashboard
+    con una consulta de agregación condicional por tabla.
+    """
+    now = now or timezone.now()
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    completed = Q(status=Order.STATUS_COMPLETED)
+    this_month = Q(created_at__gte=month_start)
+
+    orders = Order.objects.aggregate(
+        count=Count('id'),
+        **{
+            f'status_{status}': Count('id', filter=Q(status=status))
+            for status, _ in Order.STATUS_CHOICES
+        },
+        revenue=Sum('total', filter=completed),
+        month_orders=Count('id', filter=this_month),
+        month_revenue=Sum('total', filter=completed & this_month),
+    )
+    users = User.objects.aggregate(active=Count('id', filter=Q(is_active=True)))
+    pets = Pet.objects.aggregate(total=Count('id'))
+    products = Product.objects.aggregate(
+        total=Count('id'),
+        low_stock=Count('id', filter=Q(stock__lte=LOW_STOCK_THRESHOLD)),
+    )
+    appointments = Appointment.objects.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status=Appointment.STATUS_SCHEDULED)),
+    )
+    payments = Payment.objects.aggregate(
+        total=Count('id'),
+        successful=Count('id', filter=Q(status=Payment.STATUS_COMPLETED)),
+        amount=Sum('amount', filter=Q(status=Payment.STATUS_COMPLETED)),
+    )
+
+    return {
+        'overview': {
+            'total_orders': orders['count'],
+            'total_revenue': float(orders['revenue'] or 0),
+            'active_users': users['active'],
+            'total_pets': pets['total'],
+            'total_products': products['total'],
+            'low_stock_products': products['low_stock'],
+            'total_appointments': appointments['total'],
+            'pending_appointments': appointments['pending'],
+        },
+        'current_month': {
+            'orders': orders['month_orders'],
+            'revenue': float(orders['month_revenue'] or 0),
+        },
+        'orders_by_status': [
+            {'status': status, 'count': orders[f'status_{status}']}
+            for status, _ in Order.STATUS_CHOICES
+        ],
+        'payments': {
+            'total': payments['total'],
+            'successful': payments['successful'],
+            'total_amount': float(payments['amount'] or 0),
+        },
+    }
+
+
+def upcoming_appointments(today=None, days=UPCOMING_DAYS):
+    """
+    Citas programadas de hoy a dentro de days días, ambos inclusive en la
+    hora local. El rango va sobre scheduled_at con datetimes de inicio de
+    día, no con scheduled_at__date, para que use el índice por estado y
+    fecha en lugar de convertir cada fila.
+    """
+    today = today or timezone.localdate()
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(today, time.min), tz)
+    end = timezone.make_aware(datetime.combine(today + timedelta(days=days + 1), time.min), tz)
+    return Appointment.objects.filter(
+        status=Appointment.STATUS_SCHEDULED,
+        scheduled_at__gte=start,
+        scheduled_at__lt=end,
+    )
+
+
+def sales_over_time(start_date, end_date, trunc_func):
+    """Ventas completadas por período sumando los resúmenes diarios del rango"""
+    return DailySalesRollup.objects.filter(
+        status=Order.STATUS_COMPLETED,
+        date__gte=start_date,
+        date__lte=end_date,
+    ).annotate(
+        period=trunc_func('date')
+    ).values('period').annotate(
+        total_orders=Sum('orders'),
+        total_revenue=Sum('revenue')
+    ).order_by('period')
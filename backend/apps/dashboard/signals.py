@@ -0,0 +1,43 @@
+"""
+Mantenimiento incremental de DailySalesRollup a partir de los pedidos.
+
+Solo cubre save() y delete() de instancias (también QuerySet.delete, que
+envía las señales por pedido). QuerySet.update() y bulk_create/bulk_update
+no envían señales: después de usarlos sobre created_at, status o total hay
+que ejecutar backfill_sales_rollups para el rango de fechas afectado.
+"""
+from django.db.models.signals import post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.orders.models import Order
+from apps.dashboard.services import (
+    record_order_deleted,
+    record_order_saved,
+    record_order_saving,
+    snapshot_order,
+)
+
+
+@receiver(post_init, sender=Order)
+def order_loaded(sender, instance, **kwargs):
+    snapshot_order(instance)
+
+
+@receiver(pre_save, sender=Order)
+def order_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    record_order_saving(instance, update_fields)
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    record_order_saved(instance, created, update_fields)
+
+
+@receiver(pre_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    # Antes del DELETE, para poder leer de la base los campos diferidos
+    record_order_deleted(instance)
@@ -1,3 +1,345 @@
+from decimal import Decimal
+from io import StringIO
+from datetime import datetime, time, timedelta
+
 from django.test import TestCase
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+
+from apps.orders.models import Order
+from apps.products.models import Product
+from apps.pets.models import Pet
+from apps.appointments.models import Appointment
+from apps.payments.models import Payment
+from apps.dashboard.models import DailySalesRollup
+from apps.inventory.models import StockMovement
+from apps.dashboard.services import (
+    QUERY_PLANS,
+    explain_query_plans,
+    get_dashboard_stats,
+    query_budget,
+    register_query_plan,
+    upcoming_appointments,
+)
+from apps.dashboard.services.plans import SCAN_ALLOWED, full_scans
+
+
+class DashboardStatsEngineTests(TestCase):
+    """Tests del motor de agregación condicional del dashboard"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='pass123')
+        User.objects.create_user(username='inactive', password='pass123', is_active=False)
+
+        Product.objects.create(name='Alimento', price=Decimal('50.00'), stock=40)
+        Product.objects.create(name='Collar', price=Decimal('20.00'), stock=3)
+
+        Order.objects.create(customer=self.user, total=Decimal('100.00'), status=Order.STATUS_COMPLETED)
+        Order.objects.create(customer=self.user, total=Decimal('30.00'), status=Order.STATUS_PENDING)
+        old_order = Order.objects.create(customer=self.user, total=Decimal('70.00'), status=Order.STATUS_COMPLETED)
+        Order.objects.filter(pk=old_order.pk).update(created_at=timezone.now() - timedelta(days=62))
+
+        pet = Pet.objects.create(name='Firulais', species='Perro', age=3, owner=self.user)
+        Appointment.objects.create(owner=self.user, pet=pet, scheduled_at=timezone.now(), reason='Chequeo')
+        Appointment.objects.create(
+            owner=self.user, pet=pet, scheduled_at=timezone.now(),
+            reason='Vacuna', status=Appointment.STATUS_COMPLETED
+        )
+
+        Payment.objects.create(user=self.user, amount=Decimal('100.00'), payment_method='CARD', status=Payment.STATUS_COMPLETED)
+        Payment.objects.create(user=self.user, amount=Decimal('30.00'), payment_method='CASH')
+
+    def test_one_query_per_table(self):
+        with self.assertNumQueries(6):
+            get_dashboard_stats()
+
+    def test_overview_values(self):
+        overview = get_dashboard_stats()['overview']
+        self.assertEqual(overview['total_orders'], 3)
+        self.assertEqual(overview['total_revenue'], 170.0)
+        self.assertEqual(overview['active_users'], 1)
+        self.assertEqual(overview['total_pets'], 1)
+        self.assertEqual(overview['total_products'], 2)
+        self.assertEqual(overview['low_stock_products'], 1)
+        self.assertEqual(overview['total_appointments'], 2)
+        self.assertEqual(overview['pending_appointments'], 1)
+
+    def test_current_month_and_payments(self):
+        stats = get_dashboard_stats()
+        self.assertEqual(stats['current_month']['orders'], 2)
+        self.assertEqual(stats['current_month']['revenue'], 100.0)
+        self.assertEqual(stats['payments'], {'total': 2, 'successful': 1, 'total_amount': 100.0})
+
+    def test_empty_tables_return_zero(self):
+        Order.objects.all().delete()
+        Payment.objects.all().delete()
+        stats = get_dashboard_stats()
+        self.assertEqual(stats['overview']['total_revenue'], 0.0)
+        self.assertEqual(stats['payments']['total_amount'], 0.0)
+
+    def test_orders_by_status(self):
+        stats = get_dashboard_stats()
+        self.assertEqual(stats['orders_by_status'], [
+            {'status': Order.STATUS_PENDING, 'count': 1},
+            {'status': Order.STATUS_COMPLETED, 'count': 2},
+            {'status': Order.STATUS_CANCELLED, 'count': 0},
+        ])
+
+    def test_stats_endpoint(self):
+        """El endpoint responde con las mismas consultas que el servicio"""
+        staff = User.objects.create_user(username='staff', password='pass123', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(user=staff)
+        with self.assertNumQueries(6):
+            response = client.get('/api/dashboard/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['overview']['total_orders'], 3)
+        self.assertEqual(response.data['orders_by_status'][1], {'status': Order.STATUS_COMPLETED, 'count': 2})
+        self.assertEqual(response.data['payments']['successful'], 1)
+
+    def test_upcoming_appointments_local_day_range(self):
+        """De hoy a hoy + 7 días en hora local, sin cast a fecha"""
+        Appointment.objects.all().delete()
+        pet = Pet.objects.get()
+        today = timezone.localdate()
+        tz = timezone.get_current_timezone()
+
+        def at(days, hour, minute=0):
+            day = today + timedelta(days=days)
+            return timezone.make_aware(datetime.combine(day, time(hour, minute)), tz)
+
+        for scheduled_at in (at(-1, 23, 59), at(0, 0), at(7, 23, 59), at(8, 0)):
+            Appointment.objects.create(owner=self.user, pet=pet, scheduled_at=scheduled_at, reason='Control')
+
+        queryset = upcoming_appointments(today)
+        self.assertEqual(queryset.count(), 2)
+        self.assertNotIn('django_datetime_cast_date', str(queryset.query))
+
+    def test_query_budget_warns_when_exceeded(self):
+        with self.assertLogs('apps.dashboard.services.services', level='WARNING'):
+            with query_budget(1, label='test') as counter:
+                Order.objects.count()
+                Order.objects.count()
+        self.assertEqual(counter.count, 2)
+
+
+class DailySalesRollupTests(APITestCase):
+    """Tests del resumen diario de ventas y su mantenimiento incremental"""
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username='admin', password='admin123', is_staff=True)
+        self.user = User.objects.create_user(username='buyer', password='pass123')
+        self.today = timezone.localdate()
+
+    def rollup(self, status):
+        return DailySalesRollup.objects.filter(date=self.today, status=status).first()
+
+    def test_order_creation_updates_rollup(self):
+        Order.objects.create(customer=self.user, total=Decimal('40.00'), status=Order.STATUS_COMPLETED)
+        Order.objects.create(customer=self.user, total=Decimal('60.00'), status=Order.STATUS_COMPLETED)
+
+        row = self.rollup(Order.STATUS_COMPLETED)
+        self.assertEqual(row.orders, 2)
+        self.assertEqual(row.revenue, Decimal('100.00'))
+
+    def test_status_change_moves_order_between_rollups(self):
+        order = Order.objects.create(customer=self.user, total=Decimal('25.00'))
+        order = Order.objects.get(pk=order.pk)
+        order.status = Order.STATUS_COMPLETED
+        order.save()
+
+        self.assertEqual(self.rollup(Order.STATUS_PENDING).orders, 0)
+        self.assertEqual(self.rollup(Order.STATUS_COMPLETED).orders, 1)
+        self.assertEqual(self.rollup(Order.STATUS_COMPLETED).revenue, Decimal('25.00'))
+
+    def test_save_after_refresh_uses_reloaded_values(self):
+        """refresh_from_db renueva la base: el pedido no se mueve dos veces"""
+        order = Order.objects.create(customer=self.user, total=Decimal('25.00'))
+        other = Order.objects.get(pk=order.pk)
+        other.status = Order.STATUS_COMPLETED
+        other.save()
+
+        order.refresh_from_db()
+        order.status = Order.STATUS_CANCELLED
+        order.save()
+
+        self.assertEqual(self.rollup(Order.STATUS_PENDING).orders, 0)
+        self.assertEqual(self.rollup(Order.STATUS_COMPLETED).orders, 0)
+        self.assertEqual(self.rollup(Order.STATUS_CANCELLED).orders, 1)
+
+    def test_partial_refresh_keeps_other_snapshot_values(self):
+        order = Order.objects.create(customer=self.user, total=Decimal('25.00'))
+        Order.objects.filter(pk=order.pk).update(notes='Recargado')
+        order.status = Order.STATUS_COMPLETED
+        order.refresh_from_db(fields=['notes'])
+        order.save()
+
+        self.assertEqual(self.rollup(Order.STATUS_PENDING).orders, 0)
+        self.assertEqual(self.rollup(Order.STATUS_COMPLETED).orders, 1)
+
+    def test_deferred_load_reads_previous_values_from_db(self):
+        """Un pedido cargado con only() no deja el cambio de estado fuera del rollup"""
+        order = Order.objects.create(customer=self.user, total=Decimal('25.00'))
+        deferred = Order.objects.only('id', 'notes').get(pk=order.pk)
+        deferred.status = Order.STATUS_COMPLETED
+        deferred.save()
+
+        self.assertEqual(self.rollup(Order.STATUS_PENDING).orders, 0)
+        self.assertEqual(self.rollup(Order.STATUS_COMPLETED).orders, 1)
+        self.assertEqual(self.rollup(Order.STATUS_COMPLETED).revenue, Decimal('25.00'))
+
+    def test_deferred_delete_decrements_rollup(self):
+        order = Order.objects.create(customer=self.user, total=Decimal('25.00'), status=Order.STATUS_COMPLETED)
+        Order.objects.only('id').get(pk=order.pk).delete()
+        self.assertEqual(self.rollup(Order.STATUS_COMPLETED).orders, 0)
+
+    def test_update_fields_save_leaves_unsaved_fields(self):
+        order = Order.objects.create(customer=self.user, total=Decimal('25.00'))
+        order.status = Order.STATUS_COMPLETED
+        order.notes = 'Solo notas'
+        order.save(update_fields=['notes'])
+        self.assertEqual(self.rollup(Order.STATUS_PENDING).orders, 1)
+
+        order.refresh_from_db()
+        order.status = Order.STATUS_CANCELLED
+        order.save()
+        self.assertEqual(self.rollup(Order.STATUS_PENDING).orders, 0)
+        self.assertEqual(self.rollup(Order.STATUS_CANCELLED).orders, 1)
+
+    def test_repeated_saves_apply_delta_once(self):
+        order = Order.objects.create(customer=self.user, total=Decimal('25.00'))
+        order.status = Order.STATUS_COMPLETED
+        order.save()
+        order.save()
+
+        self.assertEqual(self.rollup(Order.STATUS_PENDING).orders, 0)
+        self.assertEqual(self.rollup(Order.STATUS_COMPLETED).orders, 1)
+
+    def test_unchanged_save_does_not_touch_rollup(self):
+        order = Order.objects.create(customer=self.user, total=Decimal('25.00'))
+        order.notes = 'Sin cambios de estado'
+        with self.assertNumQueries(1):
+            order.save()
+
+    def test_delete_decrements_rollup(self):
+        order = Order.objects.create(customer=self.user, total=Decimal('25.00'), status=Order.STATUS_COMPLETED)
+        order.delete()
+        row = self.rollup(Order.STATUS_COMPLETED)
+        self.assertEqual(row.orders, 0)
+        self.assertEqual(row.revenue, Decimal('0.00'))
+
+    def test_backfill_command_rebuilds_from_orders(self):
+        Order.objects.create(customer=self.user, total=Decimal('10.00'), status=Order.STATUS_COMPLETED)
+        Order.objects.create(customer=self.user, total=Decimal('15.00'))
+        DailySalesRollup.objects.all().delete()
+
+        call_command('backfill_sales_rollups', stdout=StringIO())
+
+        self.assertEqual(self.rollup(Order.STATUS_COMPLETED).orders, 1)
+        self.assertEqual(self.rollup(Order.STATUS_PENDING).revenue, Decimal('15.00'))
+
+    def test_sales_over_time_reads_rollups(self):
+        DailySalesRollup.objects.create(
+            date=self.today - timedelta(days=1), status=Order.STATUS_COMPLETED,
+            orders=3, revenue=Decimal('90.00')
+        )
+        DailySalesRollup.objects.create(
+            date=self.today - timedelta(days=1), status=Order.STATUS_PENDING,
+            orders=5, revenue=Decimal('500.00')
+        )
+        self.client.force_authenticate(user=self.staff)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/dashboard/sales-over-time/?period=monthly')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(item['orders'] for item in response.data['data']), 3)
+        self.assertEqual(sum(item['revenue'] for item in response.data['data']), 90.0)
+
+
+class StockOutflowViewTests(APITestCase):
+    """Tests del ranking de salidas de stock"""
+
+    def test_sums_every_outflow_at_current_price(self):
+        staff = User.objects.create_user(username='admin', password='admin123', is_staff=True)
+        collar = Product.objects.create(name='Collar', price=Decimal('20.00'), stock=10)
+        food = Product.objects.create(name='Alimento', price=Decimal('50.00'), stock=10)
+        StockMovement.objects.create(product=collar, movement_type='OUT', quantity=2, reason='Venta')
+        StockMovement.objects.create(product=collar, movement_type='OUT', quantity=3, reason='Merma')
+        StockMovement.objects.create(product=food, movement_type='OUT', quantity=1, reason='Venta')
+        StockMovement.objects.create(product=food, movement_type='IN', quantity=9, reason='Compra')
+        self.client.force_authenticate(user=staff)
+
+        response = self.client.get('/api/dashboard/stock-outflow/')
+
+        self.assertEqual(response.status_code, 200)
+        first, second = response.data['products']
+        self.assertEqual(
+            (first['product_name'], first['quantity_out'], first['movements'], first['outflow_value']),
+            ('Collar', 5, 2, 100.0)
+        )
+        self.assertEqual((second['product_name'], second['quantity_out']), ('Alimento', 1))
+
+
+class ExplainQueriesCommandTests(TestCase):
+    """Tests del comando explain_queries"""
+
+    def test_registered_queries_use_indexes(self):
+        out = StringIO()
+        call_command('explain_queries', stdout=out)
+        output = out.getvalue()
+        for name in QUERY_PLANS:
+            self.assertIn(name, output)
+        self.assertIn(f'{len(QUERY_PLANS)} consultas sin recorridos completos', output)
+
+    def test_plans_come_from_views_and_services(self):
+        results = {result['name']: result for result in explain_query_plans(
+            ['orders.list_customer_next', 'dashboard.stats']
+        )}
+        # La página siguiente lleva el predicado del cursor de KeysetPagination
+        self.assertIn('"orders_order"."created_at" <', results['orders.list_customer_next']['sql'])
+        self.assertIn('LIMIT 21', results['orders.list_customer_next']['sql'])
+        # El agregado del dashboard se explica con las consultas que ejecuta
+        stats = results['dashboard.stats']
+        self.assertEqual(len(stats['sql'].splitlines()), 6)
+        self.assertTrue(stats['full_scans'])
+        self.assertTrue(stats['allow_scan'])
+
+    def test_full_scan_detection(self):
+        self.assertEqual(full_scans('2 0 0 SCAN pets_pet'), ['2 0 0 SCAN pets_pet'])
+        self.assertEqual(
+            full_scans('3 0 0 SCAN orders_order USING INDEX orders_idx'),
+            ['3 0 0 SCAN orders_order USING INDEX orders_idx']
+        )
+        self.assertEqual(
+            full_scans('5 0 0 SCAN orders_order USING COVERING INDEX orders_idx'),
+            ['5 0 0 SCAN orders_order USING COVERING INDEX orders_idx']
+        )
+        self.assertEqual(full_scans('4 0 0 SEARCH orders_order USING INDEX orders_idx (status=?)'), [])
+
+    def test_fail_on_scan(self):
+        register_query_plan('test.full_scan')(lambda: Pet.objects.filter(name='Max'))
+        self.addCleanup(QUERY_PLANS.pop, 'test.full_scan')
+
+        out = StringIO()
+        call_command('explain_queries', 'test.full_scan', stdout=out)
+        self.assertIn('recorrido completo', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('explain_queries', 'test.full_scan', '--fail-on-scan', stdout=StringIO())
+
+    def test_allowed_scan_does_not_fail(self):
+        register_query_plan('test.allowed_scan', allow_scan=True)(lambda: Pet.objects.all())
+        self.addCleanup(QUERY_PLANS.pop, 'test.allowed_scan')
+        self.addCleanup(SCAN_ALLOWED.discard, 'test.allowed_scan')
+
+        out = StringIO()
+        call_command('explain_queries', 'test.allowed_scan', '--fail-on-scan', stdout=out)
+        self.assertIn('recorrido completo permitido', out.getvalue())
+        self.assertIn('1 consultas sin recorridos completos', out.getvalue())
 
-# Create your tests here.
+    def test_unknown_query(self):
+        with self.assertRaises(CommandError):
+            call_command('explain_queries', 'no.existe', stdout=StringIO())
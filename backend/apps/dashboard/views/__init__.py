@@ -1,16 +1,16 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from django.db.models import Sum, Count, Q, Avg
-from django.db.models.functions import TruncDate, TruncWeek, TruncMonth
-from django.contrib.auth.models import User
+from django.db.models import Sum, Count, F
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
+from django.conf import settings
 from django.utils import timezone
-from datetime import timedelta, date
-from apps.orders.models import Order, OrderItem
+from datetime import timedelta
+from apps.orders.models import Order
 from apps.products.models import Product
-from apps.pets.models import Pet
 from apps.appointments.models import Appointment
-from apps.payments.models import Payment
+from apps.inventory.models import StockMovement
+from apps.dashboard.services import get_dashboard_stats, query_budget, sales_over_time, upcoming_appointments
 
 
 class DashboardStatsView(APIView):
@@ -21,70 +21,15 @@ class DashboardStatsView(APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
     
     def get(self, request):
-        # Calcular estadísticas generales
-        total_orders = Order.objects.count()
-        total_revenue = Order.objects.filter(status='COMPLETED').aggregate(
-            total=Sum('total')
-        )['total'] or 0
-        
-        active_users = User.objects.filter(is_active=True).count()
-        total_pets = Pet.objects.count()
-        total_products = Product.objects.count()
-        low_stock_products = Product.objects.filter(stock__lte=10).count()
-        
-        # Estadísticas de pedidos por estado
-        orders_by_status = Order.objects.values('status').annotate(
-            count=Count('id')
-        )
-        
-        # Estadísticas de envíos
-        orders_by_shipping_status = Order.objects.values('shipping_status').annotate(
-            count=Count('id')
-        )
-        
-        # Citas
-        total_appointments = Appointment.objects.count()
-        pending_appointments = Appointment.objects.filter(status__in=['SCHEDULED', 'CONFIRMED']).count()
-        
-        # Estadísticas del mes actual
-        current_month_start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        current_month_orders = Order.objects.filter(
-            created_at__gte=current_month_start
-        ).count()
-        current_month_revenue = Order.objects.filter(
-            created_at__gte=current_month_start,
-            status='COMPLETED'
-        ).aggregate(total=Sum('total'))['total'] or 0
-        
-        # Pagos
-        total_payments = Payment.objects.count()
-        successful_payments = Payment.objects.filter(status='COMPLETED').count()
-        total_payments_amount = Payment.objects.filter(
-            status='COMPLETED'
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        budget = getattr(settings, 'DASHBOARD_STATS_QUERY_BUDGET', 8)
+        with query_budget(budget, label='DashboardStatsView'):
+            stats = get_dashboard_stats()
         
         return Response({
-            'overview': {
-                'total_orders': total_orders,
-                'total_revenue': float(total_revenue),
-                'active_users': active_users,
-                'total_pets': total_pets,
-                'total_products': total_products,
-                'low_stock_products': low_stock_products,
-                'total_appointments': total_appointments,
-                'pending_appointments': pending_appointments,
-            },
-            'current_month': {
-                'orders': current_month_orders,
-                'revenue': float(current_month_revenue),
-            },
-            'orders_by_status': list(orders_by_status),
-            'orders_by_shipping_status': list(orders_by_shipping_status),
-            'payments': {
-                'total': total_payments,
-                'successful': successful_payments,
-                'total_amount': float(total_payments_amount),
-            }
+            'overview': stats['overview'],
+            'current_month': stats['current_month'],
+            'orders_by_status': stats['orders_by_status'],
+            'payments': stats['payments'],
         })
 
 
@@ -116,30 +61,21 @@ class SalesOverTimeView(APIView):
         
         # Determinar función de truncado según período
         trunc_functions = {
-            'daily': TruncDate,
+            'daily': TruncDay,
             'weekly': TruncWeek,
             'monthly': TruncMonth,
         }
         
-        trunc_func = trunc_functions.get(period, TruncDate)
+        trunc_func = trunc_functions.get(period, TruncDay)
         
-        # Consultar ventas agrupadas
-        sales = Order.objects.filter(
-            created_at__gte=start_date,
-            created_at__lte=end_date,
-            status='COMPLETED'
-        ).annotate(
-            period=trunc_func('created_at')
-        ).values('period').annotate(
-            total_orders=Count('id'),
-            total_revenue=Sum('total')
-        ).order_by('period')
+        # Sumar los resúmenes diarios: el costo depende de los días, no de los pedidos
+        sales = sales_over_time(start_date.date(), end_date.date(), trunc_func)
         
         # Formatear respuesta
         result = [
             {
                 'date': item['period'].isoformat() if item['period'] else None,
-                'orders': item['total_orders'],
+                'orders': item['total_orders'] or 0,
                 'revenue': float(item['total_revenue'] or 0)
             }
             for item in sales
@@ -153,9 +89,12 @@ class SalesOverTimeView(APIView):
         })
 
 
-class PopularProductsView(APIView):
+class StockOutflowView(APIView):
     """
-    Productos más vendidos.
+    Productos con más salida de stock. No son ventas: los pedidos no guardan
+    líneas por producto, así que se suman todos los movimientos OUT (ventas,
+    mermas y salidas manuales). outflow_value valoriza las unidades al
+    precio actual del producto, no al de cada salida.
     Parámetros:
     - limit: cantidad de productos (default: 10)
     """
@@ -164,16 +103,16 @@ class PopularProductsView(APIView):
     def get(self, request):
         limit = int(request.query_params.get('limit', 10))
         
-        # Calcular productos más vendidos
-        from django.db.models import F
-        popular_products = OrderItem.objects.values(
+        outflow = StockMovement.objects.filter(
+            movement_type='OUT'
+        ).values(
             'product__id',
             'product__name',
             'product__price'
         ).annotate(
             total_quantity=Sum('quantity'),
-            total_revenue=Sum(F('unit_price') * F('quantity')),
-            times_ordered=Count('order', distinct=True)
+            total_value=Sum(F('product__price') * F('quantity')),
+            movements=Count('id')
         ).order_by('-total_quantity')[:limit]
         
         result = [
@@ -181,11 +120,11 @@ class PopularProductsView(APIView):
                 'product_id': item['product__id'],
                 'product_name': item['product__name'],
                 'price': float(item['product__price']),
-                'quantity_sold': item['total_quantity'],
-                'revenue': float(item['total_revenue']),
-                'times_ordered': item['times_ordered']
+                'quantity_out': item['total_quantity'],
+                'outflow_value': float(item['total_value']),
+                'movements': item['movements']
             }
-            for item in popular_products
+            for item in outflow
         ]
         
         return Response({
@@ -208,19 +147,14 @@ class AppointmentsStatsView(APIView):
         )
         
         # Citas próximas (próximos 7 días)
-        today = timezone.now().date()
-        upcoming = Appointment.objects.filter(
-            appointment_date__gte=today,
-            appointment_date__lte=today + timedelta(days=7),
-            status__in=['SCHEDULED', 'CONFIRMED']
-        ).count()
+        upcoming = upcoming_appointments().count()
         
         # Citas por mes (últimos 6 meses)
         six_months_ago = timezone.now() - timedelta(days=180)
         appointments_by_month = Appointment.objects.filter(
-            appointment_date__gte=six_months_ago.date()
+            scheduled_at__gte=six_months_ago
         ).annotate(
-            month=TruncMonth('appointment_date')
+            month=TruncMonth('scheduled_at')
         ).values('month').annotate(
             count=Count('id')
         ).order_by('month')
@@ -253,12 +187,12 @@ class RecentActivityView(APIView):
         limit = int(request.query_params.get('limit', 20))
         
         # Órdenes recientes
-        recent_orders = Order.objects.select_related('user').order_by('-created_at')[:limit]
+        recent_orders = Order.objects.select_related('customer').order_by('-created_at')[:limit]
         orders_data = [
             {
                 'type': 'order',
                 'id': order.id,
-                'user': order.user.username,
+                'user': order.customer.username,
                 'status': order.status,
                 'amount': float(order.total),
                 'timestamp': order.created_at.isoformat()
@@ -267,14 +201,14 @@ class RecentActivityView(APIView):
         ]
         
         # Citas recientes
-        recent_appointments = Appointment.objects.select_related('user', 'pet').order_by('-created_at')[:limit]
+        recent_appointments = Appointment.objects.select_related('owner', 'pet').order_by('-created_at')[:limit]
         appointments_data = [
             {
                 'type': 'appointment',
                 'id': apt.id,
-                'user': apt.user.username,
+                'user': apt.owner.username,
                 'pet': apt.pet.name,
-                'date': apt.appointment_date.isoformat(),
+                'date': apt.scheduled_at.isoformat(),
                 'status': apt.status,
                 'timestamp': apt.created_at.isoformat()
             }
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.services import reconcile_stock
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula el stock de cada producto a partir del log de StockMovement, '
+        'desde su último ajuste, y muestra las diferencias. Los productos sin '
+        'ajuste de saldo inicial se informan como no conciliables y no se tocan.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Corrige Product.stock con el valor calculado',
+        )
+
+    def handle(self, *args, **options):
+        differences, unreconcilable = reconcile_stock(fix=options['fix'])
+        for product_id, current, computed in differences:
+            self.stdout.write(f'Producto {product_id}: stock {current}, según movimientos {computed}')
+        for product_id, reason in unreconcilable:
+            self.stdout.write(self.style.WARNING(f'Producto {product_id}: no conciliable, {reason}'))
+
+        if unreconcilable:
+            self.stdout.write(self.style.WARNING(f'{len(unreconcilable)} productos no conciliables'))
+        if not differences:
+            self.stdout.write(self.style.SUCCESS('El stock coincide con el log de movimientos'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'{len(differences)} productos corregidos'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(differences)} productos con diferencias (use --fix)'))
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from apps.products.models import Product
 
@@ -24,15 +24,12 @@ class StockMovement(models.Model):
         return f"{self.get_movement_type_display()} - {self.product.name} ({self.quantity})"
     
     def save(self, *args, **kwargs):
-        # Update product stock when movement is saved
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
+        # Los movimientos nuevos se aplican al stock con el ledger, en la
+        # misma transacción que el INSERT del movimiento
+        if self.pk is not None:
+            return super().save(*args, **kwargs)
         
-        if is_new:
-            if self.movement_type == 'IN':
-                self.product.stock += self.quantity
-            elif self.movement_type == 'OUT':
-                self.product.stock -= self.quantity
-            elif self.movement_type == 'ADJUSTMENT':
-                self.product.stock = self.quantity
-            self.product.save()
+        from apps.inventory.services import apply_movement
+        with transaction.atomic():
+            apply_movement(self)
+            super().save(*args, **kwargs)
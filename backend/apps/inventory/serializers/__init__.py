@@ -1,8 +1,19 @@
 from rest_framework import serializers
 from apps.inventory.models import StockMovement
+from apps.inventory.services import InsufficientStockError
 from apps.products.serializers import ProductSerializer
 
 
+def validate_movement_quantity(attrs):
+    quantity = attrs.get('quantity')
+    if attrs.get('movement_type') == 'ADJUSTMENT':
+        if quantity is not None and quantity < 0:
+            raise serializers.ValidationError({'quantity': 'El ajuste no puede ser negativo.'})
+    elif quantity is not None and quantity <= 0:
+        raise serializers.ValidationError({'quantity': 'La cantidad debe ser mayor a cero.'})
+    return attrs
+
+
 class StockMovementSerializer(serializers.ModelSerializer):
     product_detail = ProductSerializer(source='product', read_only=True)
     user_username = serializers.CharField(source='user.username', read_only=True)
@@ -11,3 +22,26 @@ class StockMovementSerializer(serializers.ModelSerializer):
         model = StockMovement
         fields = ['id', 'product', 'product_detail', 'movement_type', 'quantity', 'reason', 'user', 'user_username', 'created_at']
         read_only_fields = ['user', 'created_at']
+    
+    def validate(self, attrs):
+        return validate_movement_quantity(attrs)
+    
+    def create(self, validated_data):
+        try:
+            return super().create(validated_data)
+        except InsufficientStockError as exc:
+            raise serializers.ValidationError({'quantity': str(exc)})
+
+
+class BulkStockMovementSerializer(serializers.Serializer):
+    """
+    Fila de una carga masiva. El producto se recibe como id y su existencia
+    se valida para todo el lote con una sola consulta en la vista.
+    """
+    product = serializers.IntegerField(min_value=1)
+    movement_type = serializers.ChoiceField(choices=StockMovement.MOVEMENT_TYPES)
+    quantity = serializers.IntegerField()
+    reason = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+    
+    def validate(self, attrs):
+        return validate_movement_quantity(attrs)
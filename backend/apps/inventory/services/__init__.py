@@ -0,0 +1,17 @@
+from .ledger import (
+    InsufficientStockError,
+    apply_movement,
+    apply_stock_delta,
+    reconcile_stock,
+)
+from .bulk import MAX_BULK_MOVEMENTS, fold_movements, ingest_movements
+
+__all__ = [
+    'InsufficientStockError',
+    'apply_movement',
+    'apply_stock_delta',
+    'reconcile_stock',
+    'MAX_BULK_MOVEMENTS',
+    'fold_movements',
+    'ingest_movements',
+]
@@ -0,0 +1,77 @@
+from django.db import connection, transaction
+from django.db.models import F
+
+from apps.products.models import Product
+from apps.inventory.services.ledger import InsufficientStockError
+
+MAX_BULK_MOVEMENTS = 1000
+
+
+def fold_movements(rows, stock):
+    """
+    Recorre los movimientos en orden y los reduce a una operación por
+    producto: ('set', valor) si hubo un ajuste, ('delta', n) si solo hubo
+    entradas y salidas. Valida que el stock nunca quede negativo.
+    """
+    running = dict(stock)
+    plan = {}
+    for index, row in enumerate(rows):
+        product_id = row['product']
+        quantity = row['quantity']
+        mode, value = plan.get(product_id, ('delta', 0))
+
+        if row['movement_type'] == 'ADJUSTMENT':
+            running[product_id] = quantity
+            plan[product_id] = ('set', quantity)
+            continue
+
+        step = quantity if row['movement_type'] == 'IN' else -quantity
+        if running[product_id] + step < 0:
+            raise InsufficientStockError(product_id, quantity, running[product_id], index=index)
+        running[product_id] += step
+        plan[product_id] = (mode, value + step)
+    return plan
+
+
+def ingest_movements(rows, user=None):
+    """
+    Registra un lote de movimientos ya validados en una sola transacción:
+    bloquea los productos involucrados, aplica una UPDATE por producto con
+    el efecto neto del lote y crea los movimientos con bulk_create.
+    Devuelve (movimientos creados, {product_id: stock final}).
+    """
+    from apps.inventory.models import StockMovement
+
+    product_ids = sorted({row['product'] for row in rows})
+    with transaction.atomic():
+        products = Product.objects.filter(pk__in=product_ids).order_by('pk')
+        if connection.features.has_select_for_update:
+            products = products.select_for_update()
+        stock = dict(products.values_list('id', 'stock'))
+        missing = [product_id for product_id in product_ids if product_id not in stock]
+        if missing:
+            raise Product.DoesNotExist(f'Productos inexistentes: {missing}')
+
+        plan = fold_movements(rows, stock)
+        for product_id, (mode, value) in plan.items():
+            queryset = Product.objects.filter(pk=product_id)
+            if mode == 'set':
+                queryset.update(stock=value)
+            elif value > 0:
+                queryset.update(stock=F('stock') + value)
+            elif value < 0 and not queryset.filter(stock__gte=-value).update(stock=F('stock') + value):
+                # Solo posible sin bloqueo de filas: otra salida ganó la carrera
+                raise InsufficientStockError(product_id, -value, stock[product_id])
+
+        movements = StockMovement.objects.bulk_create([
+            StockMovement(
+                product_id=row['product'],
+                movement_type=row['movement_type'],
+                quantity=row['quantity'],
+                reason=row.get('reason', ''),
+                user=user,
+            )
+            for row in rows
+        ])
+        final_stock = dict(Product.objects.filter(pk__in=product_ids).values_list('id', 'stock'))
+    return movements, final_stock
@@ -0,0 +1,123 @@
+from django.db import connection, transaction
+from django.db.models import F
+
+from apps.products.models import Product
+
+
+class InsufficientStockError(Exception):
+    """La salida dejaría el stock del producto en negativo"""
+
+    def __init__(self, product_id, requested, available, index=None):
+        self.product_id = product_id
+        self.requested = requested
+        self.available = available
+        self.index = index
+        prefix = f'Fila {index}: ' if index is not None else ''
+        super().__init__(
+            f'{prefix}Stock insuficiente para el producto {product_id}: '
+            f'solicitado {requested}, disponible {available}'
+        )
+
+
+def lock_product(product_id):
+    """
+    Bloquea la fila del producto hasta el fin de la transacción en las bases
+    que soportan SELECT ... FOR UPDATE. En SQLite la escritura ya serializa.
+    """
+    queryset = Product.objects.filter(pk=product_id)
+    if connection.features.has_select_for_update:
+        queryset = queryset.select_for_update()
+    return queryset.values_list('stock', flat=True).get()
+
+
+def apply_stock_delta(product_id, movement_type, quantity):
+    """
+    Aplica un movimiento al stock con una UPDATE sobre la columna stock.
+    Las salidas usan una UPDATE condicional (stock >= cantidad), así dos
+    salidas concurrentes nunca dejan el stock en negativo.
+    """
+    products = Product.objects.filter(pk=product_id)
+    if movement_type == 'IN':
+        products.update(stock=F('stock') + quantity)
+    elif movement_type == 'OUT':
+        if not products.filter(stock__gte=quantity).update(stock=F('stock') - quantity):
+            available = products.values_list('stock', flat=True).first()
+            raise InsufficientStockError(product_id, quantity, available)
+    elif movement_type == 'ADJUSTMENT':
+        products.update(stock=quantity)
+
+
+def apply_movement(movement):
+    """
+    Aplica al stock un movimiento que todavía no se guardó. Debe ejecutarse
+    dentro de la misma transacción que el INSERT del movimiento (ver
+    StockMovement.save); si el stock no alcanza lanza InsufficientStockError.
+    """
+    lock_product(movement.product_id)
+    apply_stock_delta(movement.product_id, movement.movement_type, movement.quantity)
+
+    # Mantener coherente la instancia de producto ya cargada
+    if movement.__class__.product.is_cached(movement):
+        movement.product.refresh_from_db(fields=['stock'])
+
+
+def replay_stock(movements):
+    """
+    Calcula el stock resultante de una secuencia ordenada de movimientos
+    (movement_type, quantity). El saldo parte del último ajuste, que fija el
+    valor; entradas y salidas posteriores suman o restan. Sin ningún ajuste
+    no hay saldo inicial conocido y devuelve None.
+    """
+    stock = None
+    for movement_type, quantity in movements:
+        if movement_type == 'ADJUSTMENT':
+            stock = quantity
+        elif stock is None:
+            continue
+        elif movement_type == 'IN':
+            stock += quantity
+        elif movement_type == 'OUT':
+            stock -= quantity
+    return stock
+
+
+def reconcile_stock(fix=False):
+    """
+    Recalcula el stock de cada producto con movimientos a partir del log
+    (orden created_at, id), tomando como saldo inicial su último ajuste.
+    Devuelve (diferencias, no_conciliables):
+
+    - diferencias: (product_id, stock_actual, stock_calculado); con fix=True
+      se corrigen.
+    - no_conciliables: (product_id, motivo) para los productos sin ningún
+      ajuste (p. ej. creados con stock inicial y sin movimiento de apertura)
+      o cuyo log da un stock negativo. Nunca se modifican.
+    """
+    from apps.inventory.models import StockMovement
+
+    rows = StockMovement.objects.order_by('product_id', 'created_at', 'id').values_list(
+        'product_id', 'movement_type', 'quantity'
+    )
+    logs = {}
+    for product_id, movement_type, quantity in rows.iterator():
+        logs.setdefault(product_id, []).append((movement_type, quantity))
+
+    stock = dict(Product.objects.filter(pk__in=logs).values_list('id', 'stock'))
+    differences = []
+    unreconcilable = []
+    for product_id, log in sorted(logs.items()):
+        if product_id not in stock:
+            continue
+        computed = replay_stock(log)
+        if computed is None:
+            unreconcilable.append((product_id, 'sin ajuste de saldo inicial'))
+        elif computed < 0:
+            unreconcilable.append((product_id, f'el log da stock negativo ({computed})'))
+        elif stock[product_id] != computed:
+            differences.append((product_id, stock[product_id], computed))
+
+    if fix:
+        with transaction.atomic():
+            for product_id, _, computed in differences:
+                Product.objects.filter(pk=product_id).update(stock=computed)
+    return differences, unreconcilable
@@ -1,8 +1,13 @@
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth.models import User
 from apps.products.models import Product
 from apps.inventory.models import StockMovement
+from apps.inventory.services import reconcile_stock
 
 
 class InventoryIntegrationTests(APITestCase):
@@ -58,4 +63,149 @@ class InventoryIntegrationTests(APITestCase):
         url = '/api/inventory/movements/'
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 1)
+        self.assertGreaterEqual(len(response.data['results']), 1)
+    
+    def test_out_movement_cannot_drive_stock_negative(self):
+        self.authenticate()
+        url = '/api/inventory/movements/'
+        data = {'product': self.product.id, 'movement_type': 'OUT', 'quantity': 51, 'reason': 'Sale'}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('quantity', response.data)
+        # Ni el stock ni el log cambian
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 50)
+        self.assertFalse(StockMovement.objects.filter(movement_type='OUT').exists())
+    
+    def test_movement_quantity_must_be_positive(self):
+        self.authenticate()
+        url = '/api/inventory/movements/'
+        data = {'product': self.product.id, 'movement_type': 'IN', 'quantity': -5}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_movement_updates_only_stock_column(self):
+        # Un Product en memoria desactualizado no pisa otros campos
+        stale = Product.objects.get(pk=self.product.pk)
+        Product.objects.filter(pk=self.product.pk).update(name='Renamed')
+        StockMovement.objects.create(product=stale, movement_type='IN', quantity=5)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.name, 'Renamed')
+        self.assertEqual(self.product.stock, 55)
+        self.assertEqual(stale.stock, 55)
+    
+    def test_reconcile_stock_command(self):
+        StockMovement.objects.create(product=self.product, movement_type='ADJUSTMENT', quantity=40)
+        StockMovement.objects.create(product=self.product, movement_type='IN', quantity=10)
+        StockMovement.objects.create(product=self.product, movement_type='OUT', quantity=5)
+        Product.objects.filter(pk=self.product.pk).update(stock=999)
+        
+        out = StringIO()
+        call_command('reconcile_stock', stdout=out)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 999)
+        self.assertIn('45', out.getvalue())
+        
+        call_command('reconcile_stock', '--fix', stdout=StringIO())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 45)
+    
+    def test_reconcile_keeps_opening_stock_without_adjustment(self):
+        # Producto creado con stock 50 y sin movimiento de apertura
+        StockMovement.objects.create(product=self.product, movement_type='OUT', quantity=5)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 45)
+
+        differences, unreconcilable = reconcile_stock(fix=True)
+        self.assertEqual(differences, [])
+        self.assertEqual(unreconcilable, [(self.product.id, 'sin ajuste de saldo inicial')])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 45)
+
+        out = StringIO()
+        call_command('reconcile_stock', '--fix', stdout=out)
+        self.assertIn('no conciliable', out.getvalue())
+
+    def test_reconcile_replays_from_last_adjustment(self):
+        StockMovement.objects.create(product=self.product, movement_type='OUT', quantity=20)
+        StockMovement.objects.create(product=self.product, movement_type='ADJUSTMENT', quantity=10)
+        StockMovement.objects.create(product=self.product, movement_type='IN', quantity=3)
+        self.assertEqual(reconcile_stock(), ([], []))
+
+    def test_reconcile_does_not_write_negative_stock(self):
+        StockMovement.objects.create(product=self.product, movement_type='ADJUSTMENT', quantity=2)
+        # Salida registrada por fuera del ledger (sin validar stock)
+        StockMovement.objects.bulk_create([
+            StockMovement(product=self.product, movement_type='OUT', quantity=5)
+        ])
+        differences, unreconcilable = reconcile_stock(fix=True)
+        self.assertEqual(differences, [])
+        self.assertEqual(unreconcilable, [(self.product.id, 'el log da stock negativo (-3)')])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 2)
+
+    def test_bulk_create_json_folds_stock_updates(self):
+        self.authenticate()
+        other = Product.objects.create(name='Other Product', price='5.00', stock=0)
+        data = [
+            {'product': self.product.id, 'movement_type': 'OUT', 'quantity': 20},
+            {'product': other.id, 'movement_type': 'IN', 'quantity': 8, 'reason': 'Compra'},
+            {'product': self.product.id, 'movement_type': 'IN', 'quantity': 5},
+            {'product': other.id, 'movement_type': 'ADJUSTMENT', 'quantity': 3},
+            {'product': other.id, 'movement_type': 'IN', 'quantity': 2},
+        ]
+        response = self.client.post('/api/inventory/movements/bulk/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 5)
+        self.assertEqual(response.data['stock'], {str(self.product.id): 35, str(other.id): 5})
+        self.assertEqual(StockMovement.objects.count(), 5)
+        self.assertEqual(StockMovement.objects.filter(user=self.user).count(), 5)
+    
+    def test_bulk_create_query_count_does_not_grow_with_rows(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from apps.inventory.services import ingest_movements
+        
+        rows = [{'product': self.product.id, 'movement_type': 'IN', 'quantity': 1}]
+        with CaptureQueriesContext(connection) as small:
+            ingest_movements(rows, user=self.user)
+        with CaptureQueriesContext(connection) as large:
+            ingest_movements(rows * 50, user=self.user)
+        self.assertEqual(len(small), len(large))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 101)
+    
+    def test_bulk_create_csv_upload(self):
+        self.authenticate()
+        content = f'product,movement_type,quantity,reason\n{self.product.id},IN,7,Proveedor\n{self.product.id},OUT,2,\n'
+        upload = SimpleUploadedFile('movements.csv', content.encode('utf-8'), content_type='text/csv')
+        response = self.client.post('/api/inventory/movements/bulk/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 55)
+        self.assertEqual(StockMovement.objects.filter(reason='Proveedor').count(), 1)
+    
+    def test_bulk_create_is_all_or_nothing(self):
+        self.authenticate()
+        data = [
+            {'product': self.product.id, 'movement_type': 'IN', 'quantity': 10},
+            {'product': self.product.id, 'movement_type': 'OUT', 'quantity': 100},
+        ]
+        response = self.client.post('/api/inventory/movements/bulk/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('quantity', response.data[1])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 50)
+        self.assertFalse(StockMovement.objects.exists())
+    
+    def test_bulk_create_reports_errors_per_row(self):
+        self.authenticate()
+        data = [
+            {'product': self.product.id, 'movement_type': 'IN', 'quantity': 10},
+            {'product': self.product.id, 'movement_type': 'OUT', 'quantity': 0},
+            {'product': 9999, 'movement_type': 'IN', 'quantity': 1},
+        ]
+        response = self.client.post('/api/inventory/movements/bulk/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('quantity', response.data[1])
+        self.assertFalse(StockMovement.objects.exists())
@@ -1,7 +1,12 @@
 from django.urls import path
-from apps.inventory.views import StockMovementListCreateView, StockMovementDetailView
+from apps.inventory.views import (
+    StockMovementListCreateView,
+    StockMovementDetailView,
+    StockMovementBulkCreateView,
+)
 
 urlpatterns = [
     path('movements/', StockMovementListCreateView.as_view(), name='stock_movement_list_create'),
+    path('movements/bulk/', StockMovementBulkCreateView.as_view(), name='stock_movement_bulk_create'),
     path('movements/<int:pk>/', StockMovementDetailView.as_view(), name='stock_movement_detail'),
 ]
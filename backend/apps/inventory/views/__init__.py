@@ -1,12 +1,23 @@
-from rest_framework import generics, permissions
+import csv
+import io
+
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from core.pagination import KeysetPagination
 from apps.inventory.models import StockMovement
-from apps.inventory.serializers import StockMovementSerializer
+from apps.inventory.serializers import BulkStockMovementSerializer, StockMovementSerializer
+from apps.inventory.services import InsufficientStockError, MAX_BULK_MOVEMENTS, ingest_movements
+from apps.products.models import Product
 
 
 class StockMovementListCreateView(generics.ListCreateAPIView):
     queryset = StockMovement.objects.all()
     serializer_class = StockMovementSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -16,3 +27,67 @@ class StockMovementDetailView(generics.RetrieveAPIView):
     queryset = StockMovement.objects.all()
     serializer_class = StockMovementSerializer
     permission_classes = [permissions.IsAuthenticated]
+
+
+class StockMovementBulkCreateView(APIView):
+    """
+    Carga masiva de movimientos: un arreglo JSON (o {"movements": [...]})
+    o un archivo CSV en el campo "file" con columnas
+    product,movement_type,quantity,reason.
+    
+    Todo el lote se valida antes de escribir y se aplica en una sola
+    transacción: si una fila falla no se registra ninguna.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [JSONParser, MultiPartParser, FormParser]
+    
+    def get_rows(self, request):
+        upload = request.FILES.get('file')
+        if upload is not None:
+            try:
+                content = upload.read().decode('utf-8-sig')
+            except UnicodeDecodeError:
+                raise ValidationError({'file': 'El archivo debe estar codificado en UTF-8.'})
+            return list(csv.DictReader(io.StringIO(content)))
+        
+        data = request.data
+        if isinstance(data, dict):
+            data = data.get('movements')
+        if not isinstance(data, list):
+            raise ValidationError({'movements': 'Se espera una lista de movimientos o un archivo CSV.'})
+        return data
+    
+    def post(self, request):
+        rows = self.get_rows(request)
+        if not rows:
+            raise ValidationError({'movements': 'El lote está vacío.'})
+        if len(rows) > MAX_BULK_MOVEMENTS:
+            raise ValidationError({'movements': f'El lote no puede superar {MAX_BULK_MOVEMENTS} movimientos.'})
+        
+        serializer = BulkStockMovementSerializer(data=rows, many=True)
+        serializer.is_valid(raise_exception=True)
+        movements = serializer.validated_data
+        
+        product_ids = {row['product'] for row in movements}
+        existing = set(Product.objects.filter(pk__in=product_ids).values_list('id', flat=True))
+        errors = [
+            {'product': f'El producto {row["product"]} no existe.'} if row['product'] not in existing else {}
+            for row in movements
+        ]
+        if any(errors):
+            raise ValidationError(errors)
+        
+        try:
+            created, stock = ingest_movements(movements, user=request.user)
+        except InsufficientStockError as exc:
+            # Mismo formato que los errores de validación: una entrada por fila
+            errors = [{} for _ in movements]
+            errors[exc.index if exc.index is not None else 0] = {'quantity': str(exc)}
+            raise ValidationError(errors)
+        except Product.DoesNotExist as exc:
+            raise ValidationError({'product': str(exc)})
+        
+        return Response({
+            'created': len(created),
+            'stock': {str(product_id): value for product_id, value in stock.items()},
+        }, status=status.HTTP_201_CREATED)
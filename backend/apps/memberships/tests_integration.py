@@ -68,7 +68,7 @@ class MembershipIntegrationTests(APITestCase):
         
         response = self.client.get('/api/memberships/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
     
     def test_membership_detail(self):
         """Test obtener detalle de una membresía"""
@@ -124,11 +124,11 @@ class MembershipIntegrationTests(APITestCase):
         # Filtrar por ACTIVE
         response = self.client.get('/api/memberships/?status=ACTIVE')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['status'], 'ACTIVE')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['status'], 'ACTIVE')
         
         # Filtrar por EXPIRED
         response = self.client.get('/api/memberships/?status=EXPIRED')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['status'], 'EXPIRED')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['status'], 'EXPIRED')
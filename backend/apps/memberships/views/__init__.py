@@ -1,12 +1,14 @@
 from rest_framework import generics, filters
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from core.pagination import KeysetPagination
 from apps.memberships.models import Membership
 from apps.memberships.serializers import MembershipSerializer, MembershipCreateSerializer
 
 
 class MembershipListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['status', 'plan_name', 'auto_renew']
     ordering_fields = ['created_at', 'end_date', 'price']
@@ -0,0 +1,68 @@
+import json
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.db import database_sync_to_async
+from apps.notifications.services import get_unread_count, notification_group
+
+
+class NotificationConsumer(AsyncWebsocketConsumer):
+    """
+    WebSocket Consumer para notificaciones del usuario autenticado.
+    Reemplaza el sondeo de /api/notifications/unread-count/: al conectar
+    envía el conteo actual y luego solo las notificaciones nuevas y los
+    cambios del contador.
+    """
+    
+    async def connect(self):
+        """Conecta al WebSocket y se une al grupo del usuario"""
+        self.user = self.scope['user']
+        
+        if not self.user.is_authenticated:
+            await self.close()
+            return
+        
+        self.group_name = notification_group(self.user.id)
+        await self.channel_layer.group_add(
+            self.group_name,
+            self.channel_name
+        )
+        
+        await self.accept()
+        
+        await self.send(text_data=json.dumps({
+            'type': 'unread_count',
+            'unread_count': await self.get_unread_count()
+        }))
+    
+    async def disconnect(self, close_code):
+        """Desconecta del WebSocket"""
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(
+                self.group_name,
+                self.channel_name
+            )
+    
+    async def receive(self, text_data):
+        """El canal es solo de salida; las acciones siguen por la API REST"""
+        await self.send(text_data=json.dumps({
+            'type': 'error',
+            'message': 'Este canal no acepta mensajes'
+        }))
+    
+    async def notification_created(self, event):
+        """Envía una notificación nueva al WebSocket"""
+        await self.send(text_data=json.dumps({
+            'type': 'notification',
+            'notification': event['notification'],
+            'unread_delta': event['unread_delta']
+        }))
+    
+    async def unread_changed(self, event):
+        """Envía el cambio del contador de no leídas"""
+        await self.send(text_data=json.dumps({
+            'type': 'unread_count',
+            'delta': event['delta']
+        }))
+    
+    @database_sync_to_async
+    def get_unread_count(self):
+        return get_unread_count(self.user)
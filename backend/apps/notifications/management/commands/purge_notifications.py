@@ -0,0 +1,76 @@
+import gzip
+import io
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.notifications.models import Notification
+from apps.notifications.services import purge_read_notifications, retention_cutoff
+from apps.notifications.services.retention import ARCHIVE_FILE, ARCHIVE_NONE, ARCHIVE_TABLE
+
+
+def open_archive(path):
+    """
+    Abre el archivo JSONL en modo agregar; .gz se comprime con gzip y .zst
+    con zstandard (dependencia del proyecto en requirements.txt). zstandard
+    se importa solo al pedir un archivo .zst.
+    """
+    if path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise CommandError(
+                'zstandard no está instalado en este entorno; instala requirements.txt '
+                'o usa un archivo .jsonl.gz'
+            )
+        # Cada ejecución agrega un frame zstd nuevo; los frames concatenados se leen como uno
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(path, 'ab')), encoding='utf-8')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'at', encoding='utf-8')
+    return open(path, 'a', encoding='utf-8')
+
+
+class Command(BaseCommand):
+    help = (
+        'Archiva y borra en lotes las notificaciones leídas más antiguas que '
+        'NOTIFICATION_RETENTION_DAYS. Las no leídas nunca se tocan.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Antigüedad mínima en días (por defecto la configurada)')
+        parser.add_argument(
+            '--archive',
+            choices=[ARCHIVE_TABLE, ARCHIVE_FILE, ARCHIVE_NONE],
+            default=ARCHIVE_TABLE,
+            help='Destino de las filas: tabla NotificationArchive, archivo JSONL o ninguno',
+        )
+        parser.add_argument('--file', help='Ruta del archivo JSONL (.jsonl, .jsonl.gz o .jsonl.zst)')
+        parser.add_argument('--batch-size', type=int, help='Filas por lote (por defecto la configurada)')
+        parser.add_argument('--pause', type=float, default=0, help='Segundos de espera entre lotes')
+        parser.add_argument('--dry-run', action='store_true', help='Solo cuenta las filas que saldrían')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 0:
+            raise CommandError('--days no puede ser negativo')
+        if options['archive'] == ARCHIVE_FILE and not options['file']:
+            raise CommandError('--archive file necesita --file')
+        cutoff = retention_cutoff(options['days'])
+
+        if options['dry_run']:
+            count = Notification.objects.filter(is_read=True, created_at__lt=cutoff).count()
+            self.stdout.write(f'{count} notificaciones leídas anteriores a {cutoff:%Y-%m-%d}')
+            return
+
+        stream = open_archive(options['file']) if options['archive'] == ARCHIVE_FILE else None
+        try:
+            purged = purge_read_notifications(
+                cutoff,
+                archive=options['archive'],
+                stream=stream,
+                batch_size=options['batch_size'],
+                pause=options['pause'],
+            )
+        finally:
+            if stream is not None:
+                stream.close()
+
+        self.stdout.write(self.style.SUCCESS(f'{purged} notificaciones leídas sacadas de la tabla principal'))
@@ -43,7 +43,53 @@ class Notification(models.Model):
     def __str__(self):
         return f"{self.title} - {self.user.username} ({'Leída' if self.is_read else 'No leída'})"
     
+    def save(self, *args, **kwargs):
+        # Las notificaciones nuevas se empujan por WebSocket a su usuario
+        created = self.pk is None
+        super().save(*args, **kwargs)
+        if created:
+            from apps.notifications.services import push_notification
+            push_notification(self)
+    
     def mark_as_read(self):
-        """Marca la notificación como leída"""
+        """
+        Marca la notificación como leída. UPDATE condicional: si ya estaba
+        leída no escribe nada ni cambia el contador de no leídas.
+        """
+        from apps.notifications.services import push_unread_delta
+        updated = Notification.objects.filter(pk=self.pk, is_read=False).update(is_read=True)
         self.is_read = True
-        self.save(update_fields=['is_read'])
+        if updated:
+            push_unread_delta(self.user_id, -1)
+
+
+class NotificationArchive(models.Model):
+    """
+    Copia compacta de notificaciones leídas antiguas que se sacaron de la
+    tabla principal (ver el comando purge_notifications)
+    """
+    
+    original_id = models.BigIntegerField(verbose_name='Id original')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Usuario'
+    )
+    title = models.CharField(max_length=200, verbose_name='Título')
+    message = models.TextField(verbose_name='Mensaje')
+    notification_type = models.CharField(
+        max_length=10,
+        choices=Notification.TYPE_CHOICES,
+        verbose_name='Tipo'
+    )
+    created_at = models.DateTimeField(verbose_name='Fecha de creación')
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de archivo')
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Notificación archivada'
+        verbose_name_plural = 'Notificaciones archivadas'
+    
+    def __str__(self):
+        return f"{self.title} - archivada"
@@ -1,5 +1,9 @@
 from rest_framework import serializers
+from apps.memberships.models import Membership
 from apps.notifications.models import Notification
+from apps.notifications.services import AUDIENCE_CHOICES
+
+MAX_BULK_READ_IDS = 500
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -50,3 +54,49 @@ class NotificationCreateSerializer(serializers.ModelSerializer):
         if not value.strip():
             raise serializers.ValidationError("El mensaje no puede estar vacío")
         return value
+
+
+class NotificationBulkReadSerializer(serializers.Serializer):
+    """
+    Serializer para marcar varias notificaciones como leídas: una lista de
+    ids o todas las creadas hasta una fecha
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_READ_IDS,
+        required=False
+    )
+    before = serializers.DateTimeField(required=False)
+    
+    def validate(self, attrs):
+        """Exactamente uno de los dos criterios"""
+        if ('ids' in attrs) == ('before' in attrs):
+            raise serializers.ValidationError('Indica ids o before (solo uno de los dos)')
+        return attrs
+
+
+class NotificationBroadcastSerializer(serializers.Serializer):
+    """
+    Serializer para avisos masivos (admin): la misma notificación para
+    todos los usuarios activos, los dueños de una especie o los miembros
+    de un plan
+    """
+    audience = serializers.ChoiceField(choices=AUDIENCE_CHOICES)
+    species = serializers.CharField(max_length=50, required=False)
+    plan = serializers.ChoiceField(choices=Membership.PLAN_CHOICES, required=False)
+    title = serializers.CharField(max_length=200)
+    message = serializers.CharField()
+    notification_type = serializers.ChoiceField(choices=Notification.TYPE_CHOICES, default='INFO')
+    
+    validate_title = NotificationCreateSerializer.validate_title
+    validate_message = NotificationCreateSerializer.validate_message
+    
+    def validate(self, attrs):
+        """La audiencia por especie o por plan necesita su filtro"""
+        audience = attrs['audience']
+        if audience == 'species' and not attrs.get('species', '').strip():
+            raise serializers.ValidationError({'species': 'Indica la especie para esta audiencia'})
+        if audience == 'plan' and not attrs.get('plan'):
+            raise serializers.ValidationError({'plan': 'Indica el plan para esta audiencia'})
+        return attrs
@@ -0,0 +1,32 @@
+from .unread import (
+    adjust_unread,
+    count_unread_notifications,
+    get_unread_count,
+    reset_unread,
+)
+from .realtime import (
+    notification_event,
+    notification_group,
+    push_notification,
+    push_notifications,
+    push_unread_delta,
+)
+from .broadcast import AUDIENCE_CHOICES, audience_user_ids, broadcast_notification
+from .retention import purge_read_notifications, retention_cutoff
+
+__all__ = [
+    'adjust_unread',
+    'count_unread_notifications',
+    'get_unread_count',
+    'reset_unread',
+    'notification_event',
+    'notification_group',
+    'push_notification',
+    'push_notifications',
+    'push_unread_delta',
+    'AUDIENCE_CHOICES',
+    'audience_user_ids',
+    'broadcast_notification',
+    'purge_read_notifications',
+    'retention_cutoff',
+]
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from apps.notifications.models import Notification
+from apps.notifications.services.realtime import push_notifications
+
+BROADCAST_CHUNK_SIZE = 1000
+
+AUDIENCE_ALL = 'all'
+AUDIENCE_SPECIES = 'species'
+AUDIENCE_PLAN = 'plan'
+
+AUDIENCE_CHOICES = [
+    (AUDIENCE_ALL, 'Todos los usuarios activos'),
+    (AUDIENCE_SPECIES, 'Dueños de una especie'),
+    (AUDIENCE_PLAN, 'Miembros de un plan'),
+]
+
+
+def audience_user_ids(audience, species=None, plan=None):
+    """
+    Ids de los usuarios activos que reciben un aviso masivo:
+    todos, dueños de mascotas de una especie o miembros con una membresía
+    activa en un plan.
+    """
+    users = get_user_model().objects.filter(is_active=True)
+    if audience == AUDIENCE_SPECIES:
+        users = users.filter(pets__species__iexact=species)
+    elif audience == AUDIENCE_PLAN:
+        users = users.filter(memberships__plan_name=plan, memberships__status='ACTIVE')
+    elif audience != AUDIENCE_ALL:
+        raise ValueError(f'Audiencia desconocida: {audience}')
+    return users.order_by('id').values_list('id', flat=True).distinct()
+
+
+def broadcast_notification(user_ids, title, message, notification_type='INFO', chunk_size=None):
+    """
+    Crea la misma notificación para cada usuario del queryset user_ids
+    (ids ordenados, como los de audience_user_ids).
+
+    Los ids se leen por rangos de clave (id > último) y las filas se
+    insertan con bulk_create en lotes de NOTIFICATION_BROADCAST_CHUNK_SIZE,
+    cada lote en su propia transacción para no mantener bloqueos largos.
+    Cada lote se empuja por WebSocket de una vez al confirmarse. Devuelve
+    cuántas notificaciones se crearon.
+    """
+    chunk_size = chunk_size or getattr(settings, 'NOTIFICATION_BROADCAST_CHUNK_SIZE', BROADCAST_CHUNK_SIZE)
+    created = 0
+    last_id = 0
+    while True:
+        chunk = list(user_ids.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return created
+        with transaction.atomic():
+            notifications = Notification.objects.bulk_create([
+                Notification(user_id=user_id, title=title, message=message, notification_type=notification_type)
+                for user_id in chunk
+            ])
+            push_notifications(notifications)
+        created += len(notifications)
+        last_id = chunk[-1]
@@ -0,0 +1,71 @@
+import asyncio
+from collections import Counter
+from functools import partial
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from apps.notifications.services.unread import adjust_unread
+
+
+def notification_group(user_id):
+    """Grupo del channel layer con las conexiones abiertas de un usuario"""
+    return f'notifications_{user_id}'
+
+
+def notification_event(notification):
+    """Evento notification_created con la notificación ya serializada"""
+    from apps.notifications.serializers import NotificationSerializer
+    return {
+        'type': 'notification_created',
+        'notification': NotificationSerializer(notification).data,
+        'unread_delta': 0 if notification.is_read else 1,
+    }
+
+
+def _deliver(events, deltas):
+    """
+    Ajusta los contadores cacheados y envía los eventos, con un solo salto
+    al event loop para todo el lote
+    """
+    for user_id, delta in deltas.items():
+        adjust_unread(user_id, delta)
+    
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not events:
+        return
+    
+    async def send_all():
+        await asyncio.gather(*(
+            channel_layer.group_send(notification_group(user_id), event)
+            for user_id, event in events
+        ))
+    
+    async_to_sync(send_all)()
+
+
+def push_notification(notification):
+    """
+    Envía una notificación nueva a las pestañas abiertas de su usuario.
+    Se difunde al confirmar la transacción para no anunciar filas que
+    terminen revertidas; el contador cacheado se ajusta en el mismo momento.
+    """
+    push_notifications([notification])
+
+
+def push_notifications(notifications):
+    """Variante por lotes de push_notification para filas de bulk_create"""
+    events = [(notification.user_id, notification_event(notification)) for notification in notifications]
+    deltas = Counter(notification.user_id for notification in notifications if not notification.is_read)
+    transaction.on_commit(partial(_deliver, events, deltas))
+
+
+def push_unread_delta(user_id, delta):
+    """Envía el cambio del contador de no leídas (negativo al leer o borrar)"""
+    if not delta:
+        return
+    transaction.on_commit(partial(_deliver, [(user_id, {
+        'type': 'unread_changed',
+        'delta': delta,
+    })], {user_id: delta}))
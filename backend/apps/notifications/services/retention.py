@@ -0,0 +1,72 @@
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from apps.notifications.models import Notification, NotificationArchive
+
+RETENTION_DAYS = 90
+RETENTION_BATCH_SIZE = 500
+
+ARCHIVE_TABLE = 'table'
+ARCHIVE_FILE = 'file'
+ARCHIVE_NONE = 'none'
+
+ARCHIVE_FIELDS = ['id', 'user_id', 'title', 'message', 'notification_type', 'created_at']
+
+
+def retention_cutoff(days=None):
+    """Fecha antes de la cual una notificación leída deja la tabla principal"""
+    if days is None:
+        days = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', RETENTION_DAYS)
+    return timezone.now() - timedelta(days=days)
+
+
+def purge_read_notifications(cutoff, archive=ARCHIVE_TABLE, stream=None, batch_size=None, pause=0):
+    """
+    Saca de Notification las leídas creadas antes de cutoff.
+
+    Trabaja en lotes de NOTIFICATION_RETENTION_BATCH_SIZE filas, cada uno en
+    una transacción corta: se leen los ids del lote por rango de clave, se
+    archivan las filas (tabla NotificationArchive, una línea JSON por fila
+    en stream, o nada) y se borran. pause deja segundos libres entre lotes
+    para no acaparar la base de datos. Las no leídas nunca se tocan, así que
+    los contadores de no leídas no cambian. Devuelve cuántas filas se
+    sacaron.
+    """
+    if archive == ARCHIVE_FILE and stream is None:
+        raise ValueError('El archivo en disco necesita un stream de salida')
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_RETENTION_BATCH_SIZE', RETENTION_BATCH_SIZE)
+    expired = Notification.objects.filter(is_read=True, created_at__lt=cutoff).order_by('id')
+
+    purged = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            rows = list(expired.filter(id__gt=last_id).values(*ARCHIVE_FIELDS)[:batch_size])
+            if not rows:
+                return purged
+            if archive == ARCHIVE_TABLE:
+                NotificationArchive.objects.bulk_create([
+                    NotificationArchive(
+                        original_id=row['id'],
+                        user_id=row['user_id'],
+                        title=row['title'],
+                        message=row['message'],
+                        notification_type=row['notification_type'],
+                        created_at=row['created_at'],
+                    )
+                    for row in rows
+                ])
+            elif archive == ARCHIVE_FILE:
+                stream.writelines(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows)
+                stream.flush()
+            Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        purged += len(rows)
+        last_id = rows[-1]['id']
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,45 @@
+from django.core.cache import cache
+
+from apps.notifications.models import Notification
+
+UNREAD_CACHE_TIMEOUT = 60 * 5
+
+
+def unread_cache_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def count_unread_notifications(user_id):
+    return Notification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+def get_unread_count(user):
+    """Devuelve el contador cacheado; si no existe lo recalcula desde la BD"""
+    key = unread_cache_key(user.id)
+    count = cache.get(key)
+    if count is None:
+        count = count_unread_notifications(user.id)
+        cache.set(key, count, UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def adjust_unread(user_id, delta):
+    """
+    Suma delta (negativo al leer o borrar) al contador cacheado. Si no está
+    en caché no hace nada: la próxima lectura lo recalcula. Un valor
+    negativo delata un contador desfasado y se descarta.
+    """
+    if not delta:
+        return
+    key = unread_cache_key(user_id)
+    try:
+        count = cache.incr(key, delta)
+    except ValueError:
+        return
+    if count < 0:
+        cache.delete(key)
+
+
+def reset_unread(*user_ids):
+    """Invalida el contador para que se recalcule desde la BD"""
+    cache.delete_many([unread_cache_key(user_id) for user_id in user_ids])
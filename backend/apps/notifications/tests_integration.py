@@ -1,8 +1,31 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from importlib.util import find_spec
+from io import StringIO
+from unittest import skipUnless
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth import get_user_model
-from rest_framework.test import APITestCase
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
-from .models import Notification
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.chat.routing import websocket_urlpatterns
+from apps.memberships.models import Membership
+from apps.pets.models import Pet
+from .models import Notification, NotificationArchive
+from .services import audience_user_ids, broadcast_notification
 
 User = get_user_model()
 
@@ -14,6 +37,7 @@ class NotificationIntegrationTests(APITestCase):
     
     def setUp(self):
         """Configuración inicial para los tests"""
+        cache.clear()
         # Crear usuarios de prueba
         self.user1 = User.objects.create_user(
             username='testuser1',
@@ -58,10 +82,10 @@ class NotificationIntegrationTests(APITestCase):
         response = self.client.get('/api/notifications/')
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)  # Solo las de user1
+        self.assertEqual(len(response.data['results']), 2)  # Solo las de user1
         
         # Verificar que contiene los campos correctos
-        notification = response.data[0]
+        notification = response.data['results'][0]
         self.assertIn('id', notification)
         self.assertIn('title', notification)
         self.assertIn('message', notification)
@@ -156,12 +180,12 @@ class NotificationIntegrationTests(APITestCase):
         # Filtrar no leídas
         response = self.client.get('/api/notifications/?is_read=false')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)  # Solo notification1
+        self.assertEqual(len(response.data['results']), 1)  # Solo notification1
         
         # Filtrar leídas
         response = self.client.get('/api/notifications/?is_read=true')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)  # Solo notification2
+        self.assertEqual(len(response.data['results']), 1)  # Solo notification2
     
     def test_filter_notifications_by_type(self):
         """Test que filtra notificaciones por tipo"""
@@ -170,8 +194,8 @@ class NotificationIntegrationTests(APITestCase):
         # Filtrar por tipo SUCCESS
         response = self.client.get('/api/notifications/?notification_type=SUCCESS')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['notification_type'], 'SUCCESS')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['notification_type'], 'SUCCESS')
     
     def test_unread_count(self):
         """Test que obtiene el conteo de notificaciones no leídas"""
@@ -203,3 +227,395 @@ class NotificationIntegrationTests(APITestCase):
         # Intentar marcar como leída notificación de user2
         response = self.client.post(f'/api/notifications/{self.notification3.id}/mark-as-read/')
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class NotificationUnreadCacheTests(APITestCase):
+    """
+    Tests del contador de no leídas cacheado con escritura directa
+    """
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='cached', password='testpass123')
+        self.notification = Notification.objects.create(user=self.user, title='Uno', message='Sin leer')
+        Notification.objects.create(user=self.user, title='Dos', message='Sin leer')
+        self.client.force_authenticate(user=self.user)
+    
+    def unread_count(self):
+        return self.client.get('/api/notifications/unread-count/').data['unread_count']
+    
+    def test_count_is_served_from_cache(self):
+        self.assertEqual(self.unread_count(), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread_count(), 2)
+    
+    def test_writes_update_the_cached_count(self):
+        self.unread_count()
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(user=self.user, title='Tres', message='Sin leer')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread_count(), 3)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/notifications/{self.notification.id}/mark-as-read/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread_count(), 2)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/notifications/mark-all-as-read/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread_count(), 0)
+    
+    def test_miss_recounts_from_database(self):
+        self.unread_count()
+        # Cambio por fuera de los caminos que ajustan la caché
+        Notification.objects.filter(user=self.user).update(is_read=True)
+        cache.clear()
+        self.assertEqual(self.unread_count(), 0)
+
+
+class NotificationBulkReadTests(APITestCase):
+    """
+    Tests de marcar varias notificaciones como leídas en un solo UPDATE
+    """
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='bulk_reader', password='testpass123')
+        self.other = User.objects.create_user(username='bulk_other', password='testpass123')
+        self.notifications = [
+            Notification.objects.create(user=self.user, title=f'Aviso {n}', message='Sin leer') for n in range(4)
+        ]
+        self.foreign = Notification.objects.create(user=self.other, title='Ajena', message='Sin leer')
+        self.client.force_authenticate(user=self.user)
+    
+    def test_marks_selected_ids_in_one_update(self):
+        ids = [self.notifications[0].id, self.notifications[1].id, self.foreign.id]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/notifications/mark-as-read/', {'ids': ids}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # La ajena no se toca aunque venga en la lista
+        self.assertEqual(response.data['updated_count'], 2)
+        self.assertEqual(response.data['unread_count'], 2)
+        self.assertFalse(Notification.objects.get(pk=self.foreign.pk).is_read)
+        updates = [q for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+    
+    def test_marks_everything_before_timestamp(self):
+        old = timezone.now() - timedelta(days=2)
+        Notification.objects.filter(pk__in=[n.pk for n in self.notifications[:3]]).update(created_at=old)
+        before = (old + timedelta(hours=1)).isoformat()
+        response = self.client.post('/api/notifications/mark-as-read/', {'before': before}, format='json')
+        self.assertEqual(response.data['updated_count'], 3)
+        self.assertEqual(response.data['unread_count'], 1)
+    
+    def test_requires_exactly_one_criterion(self):
+        response = self.client.post('/api/notifications/mark-as-read/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(
+            '/api/notifications/mark-as-read/',
+            {'ids': [self.notifications[0].id], 'before': timezone.now().isoformat()},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_mark_as_read_twice_counts_once(self):
+        """Una notificación ya leída no vuelve a descontar del contador"""
+        notification = self.notifications[0]
+        self.client.get('/api/notifications/unread-count/')
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f'/api/notifications/{notification.id}/mark-as-read/')
+            self.assertTrue(response.data['is_read'])
+        response = self.client.get('/api/notifications/unread-count/')
+        self.assertEqual(response.data['unread_count'], 3)
+
+class NotificationPaginationTests(APITestCase):
+    """
+    Tests de la paginación por cursor (keyset) en el listado de notificaciones
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='pager', password='testpass123')
+        Notification.objects.bulk_create([
+            Notification(user=self.user, title=f'Aviso {i}', message='Mensaje')
+            for i in range(25)
+        ])
+        # Mismo created_at para todas: el desempate por id debe mantener el orden estable
+        Notification.objects.filter(user=self.user).update(created_at=timezone.now())
+        self.client.force_authenticate(user=self.user)
+    
+    def test_cursor_walks_every_row_once(self):
+        """Recorre todas las páginas con next sin repetir ni saltar filas"""
+        seen = []
+        url = '/api/notifications/?page_size=10'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        
+        expected = list(
+            Notification.objects.filter(user=self.user).order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+    
+    def test_previous_link_returns_prior_page(self):
+        """El enlace previous devuelve la página anterior en el mismo orden"""
+        first = self.client.get('/api/notifications/?page_size=10')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [item['id'] for item in back.data['results']],
+            [item['id'] for item in first.data['results']]
+        )
+        self.assertIsNone(first.data['previous'])
+    
+    def test_page_size_is_capped(self):
+        """page_size no puede superar el máximo configurado"""
+        Notification.objects.bulk_create([
+            Notification(user=self.user, title='Extra', message='Mensaje')
+            for _ in range(100)
+        ])
+        response = self.client.get('/api/notifications/?page_size=1000')
+        self.assertEqual(len(response.data['results']), 100)
+    
+    def test_invalid_cursor(self):
+        """Un cursor corrupto devuelve 404"""
+        response = self.client.get('/api/notifications/?cursor=no-es-un-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+
+class NotificationBroadcastTests(APITestCase):
+    """
+    Tests de los avisos masivos por audiencia
+    """
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.dog_owner = User.objects.create_user(username='dog_owner', password='testpass123')
+        self.cat_owner = User.objects.create_user(username='cat_owner', password='testpass123')
+        self.inactive = User.objects.create_user(username='inactive', password='testpass123', is_active=False)
+        Pet.objects.create(name='Rex', species='Perro', age=3, owner=self.dog_owner)
+        Pet.objects.create(name='Toby', species='Perro', age=5, owner=self.dog_owner)
+        Pet.objects.create(name='Michi', species='Gato', age=2, owner=self.cat_owner)
+        Pet.objects.create(name='Fido', species='Perro', age=1, owner=self.inactive)
+        end_date = timezone.now().date() + timedelta(days=30)
+        Membership.objects.create(user=self.cat_owner, plan_name='VIP', end_date=end_date, price=50)
+        Membership.objects.create(
+            user=self.dog_owner, plan_name='VIP', status='CANCELLED', end_date=end_date, price=50
+        )
+        self.client.force_authenticate(user=self.admin)
+    
+    def broadcast(self, **data):
+        payload = {'title': 'Campaña', 'message': 'Vacunación gratuita', **data}
+        return self.client.post('/api/notifications/broadcast/', payload, format='json')
+    
+    def recipients(self):
+        return set(Notification.objects.values_list('user__username', flat=True))
+    
+    def test_all_active_users(self):
+        response = self.broadcast(audience='all')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created_count'], 3)
+        self.assertEqual(self.recipients(), {'admin', 'dog_owner', 'cat_owner'})
+    
+    def test_species_owners_notified_once(self):
+        """Un dueño con dos perros recibe una sola notificación"""
+        response = self.broadcast(audience='species', species='perro')
+        self.assertEqual(response.data['created_count'], 1)
+        self.assertEqual(self.recipients(), {'dog_owner'})
+    
+    def test_plan_members_with_active_membership(self):
+        response = self.broadcast(audience='plan', plan='VIP', notification_type='WARNING')
+        self.assertEqual(response.data['created_count'], 1)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.user, self.cat_owner)
+        self.assertEqual(notification.notification_type, 'WARNING')
+    
+    def test_audience_filter_is_required(self):
+        response = self.broadcast(audience='species')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('species', response.data)
+        self.assertFalse(Notification.objects.exists())
+    
+    def test_requires_admin(self):
+        self.client.force_authenticate(user=self.dog_owner)
+        response = self.broadcast(audience='all')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_inserts_in_chunks(self):
+        """Un INSERT por lote, sin releer los ids ya enviados"""
+        for n in range(4):
+            User.objects.create_user(username=f'extra{n}', password='testpass123')
+        with CaptureQueriesContext(connection) as queries:
+            created = broadcast_notification(audience_user_ids('all'), 'Cierre', 'Cerrado el lunes', chunk_size=3)
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "notifications_notification"')]
+        self.assertEqual(created, 7)
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(Notification.objects.count(), 7)
+
+
+class NotificationRetentionTests(TestCase):
+    """
+    Tests del comando purge_notifications
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='retention', password='testpass123')
+        Notification.objects.bulk_create(
+            [Notification(user=self.user, title=f'Vieja {n}', message='Leída', is_read=True) for n in range(5)]
+            + [Notification(user=self.user, title='Vieja sin leer', message='Pendiente')]
+            + [Notification(user=self.user, title='Reciente', message='Leída', is_read=True)]
+        )
+        old = timezone.now() - timedelta(days=120)
+        Notification.objects.exclude(title='Reciente').update(created_at=old)
+    
+    def purge(self, *args):
+        out = StringIO()
+        call_command('purge_notifications', '--days=90', *args, stdout=out)
+        return out.getvalue()
+    
+    def test_archives_old_read_notifications_in_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            output = self.purge('--batch-size=2')
+        
+        self.assertIn('5 notificaciones', output)
+        self.assertEqual(
+            set(Notification.objects.values_list('title', flat=True)),
+            {'Vieja sin leer', 'Reciente'}
+        )
+        self.assertEqual(NotificationArchive.objects.count(), 5)
+        archived = NotificationArchive.objects.get(title='Vieja 0')
+        self.assertEqual(archived.user, self.user)
+        self.assertLess(archived.created_at, timezone.now() - timedelta(days=90))
+        deletes = [q for q in queries if q['sql'].startswith('DELETE FROM "notifications_notification"')]
+        self.assertEqual(len(deletes), 3)
+    
+    def test_archives_to_compressed_jsonl(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'notificaciones.jsonl.gz')
+            self.purge('--archive=file', f'--file={path}')
+            with gzip.open(path, 'rt', encoding='utf-8') as archive:
+                rows = [json.loads(line) for line in archive]
+        
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['user_id'], self.user.id)
+        self.assertFalse(NotificationArchive.objects.exists())
+        self.assertEqual(Notification.objects.count(), 2)
+    
+    @skipUnless(find_spec('zstandard'), 'zstandard no está instalado')
+    def test_archives_to_zstd_jsonl(self):
+        import zstandard
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'notificaciones.jsonl.zst')
+            self.purge('--archive=file', f'--file={path}')
+            with open(path, 'rb') as archive:
+                reader = zstandard.ZstdDecompressor().stream_reader(archive, read_across_frames=True)
+                rows = [json.loads(line) for line in reader.read().decode('utf-8').splitlines()]
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_dry_run_keeps_rows(self):
+        output = self.purge('--dry-run')
+        self.assertIn('5 notificaciones', output)
+        self.assertEqual(Notification.objects.count(), 7)
+
+
+class NotificationConsumerTests(TransactionTestCase):
+    """Tests del envío de notificaciones por WebSocket al grupo del usuario"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='ws_owner', password='testpass123')
+        self.other = User.objects.create_user(username='ws_other', password='testpass123')
+        Notification.objects.create(user=self.user, title='Previa', message='Sin leer')
+    
+    def communicator(self, user):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), '/ws/notifications/')
+        communicator.scope['user'] = user
+        return communicator
+    
+    def test_rejects_anonymous(self):
+        async def scenario():
+            communicator = self.communicator(AnonymousUser())
+            connected, _ = await communicator.connect()
+            await communicator.disconnect()
+            return connected
+        
+        self.assertFalse(async_to_sync(scenario)())
+    
+    def test_pushes_new_notifications_and_unread_deltas(self):
+        async def scenario():
+            communicator = self.communicator(self.user)
+            await communicator.connect()
+            snapshot = await communicator.receive_json_from()
+            
+            create = database_sync_to_async(Notification.objects.create)
+            # La de otro usuario no llega a este grupo
+            await create(user=self.other, title='Ajena', message='No llega')
+            notification = await create(user=self.user, title='Cita', message='Mañana a las 10')
+            pushed = await communicator.receive_json_from()
+            
+            await database_sync_to_async(notification.mark_as_read)()
+            read = await communicator.receive_json_from()
+            # Marcarla otra vez no cambia el contador
+            await database_sync_to_async(notification.mark_as_read)()
+            nothing_else = await communicator.receive_nothing()
+            await communicator.disconnect()
+            return snapshot, pushed, notification, read, nothing_else
+        
+        snapshot, pushed, notification, read, nothing_else = async_to_sync(scenario)()
+        self.assertEqual(snapshot, {'type': 'unread_count', 'unread_count': 1})
+        self.assertEqual(pushed['type'], 'notification')
+        self.assertEqual(pushed['notification']['id'], notification.id)
+        self.assertEqual(pushed['notification']['title'], 'Cita')
+        self.assertEqual(pushed['unread_delta'], 1)
+        self.assertEqual(read, {'type': 'unread_count', 'delta': -1})
+        self.assertTrue(nothing_else)
+    
+    def test_mark_all_as_read_pushes_one_delta(self):
+        Notification.objects.create(user=self.user, title='Otra', message='Sin leer')
+        
+        async def scenario():
+            communicator = self.communicator(self.user)
+            await communicator.connect()
+            snapshot = await communicator.receive_json_from()
+            
+            def mark_all():
+                client = APIClient()
+                client.force_authenticate(user=self.user)
+                return client.post('/api/notifications/mark-all-as-read/')
+            
+            response = await database_sync_to_async(mark_all)()
+            delta = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return snapshot, response, delta
+        
+        snapshot, response, delta = async_to_sync(scenario)()
+        self.assertEqual(snapshot['unread_count'], 2)
+        self.assertEqual(response.data['updated_count'], 2)
+        self.assertEqual(delta, {'type': 'unread_count', 'delta': -2})
+    
+    def test_broadcast_pushes_each_recipient(self):
+        async def scenario():
+            communicator = self.communicator(self.user)
+            await communicator.connect()
+            await communicator.receive_json_from()
+            
+            created = await database_sync_to_async(broadcast_notification)(
+                audience_user_ids('all'), 'Cierre', 'Cerrado el lunes', chunk_size=1
+            )
+            pushed = await communicator.receive_json_from()
+            nothing_else = await communicator.receive_nothing()
+            await communicator.disconnect()
+            return created, pushed, nothing_else
+        
+        created, pushed, nothing_else = async_to_sync(scenario)()
+        self.assertEqual(created, 2)
+        self.assertEqual(pushed['notification']['title'], 'Cierre')
+        self.assertEqual(pushed['unread_delta'], 1)
+        self.assertTrue(nothing_else)
@@ -3,7 +3,9 @@ from apps.notifications.views import (
     NotificationListCreateView,
     NotificationDetailView,
     MarkAsReadView,
+    MarkSelectedAsReadView,
     MarkAllAsReadView,
+    NotificationBroadcastView,
     UnreadCountView,
 )
 
@@ -11,6 +13,8 @@ urlpatterns = [
     path('', NotificationListCreateView.as_view(), name='notification-list-create'),
     path('<int:pk>/', NotificationDetailView.as_view(), name='notification-detail'),
     path('<int:pk>/mark-as-read/', MarkAsReadView.as_view(), name='notification-mark-as-read'),
+    path('mark-as-read/', MarkSelectedAsReadView.as_view(), name='notification-mark-selected-as-read'),
     path('mark-all-as-read/', MarkAllAsReadView.as_view(), name='notification-mark-all-as-read'),
+    path('broadcast/', NotificationBroadcastView.as_view(), name='notification-broadcast'),
     path('unread-count/', UnreadCountView.as_view(), name='notification-unread-count'),
 ]
@@ -1,12 +1,24 @@
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 
+from core.pagination import KeysetPagination
 from apps.notifications.models import Notification
-from apps.notifications.serializers import NotificationSerializer, NotificationCreateSerializer
+from apps.notifications.serializers import (
+    NotificationSerializer,
+    NotificationCreateSerializer,
+    NotificationBroadcastSerializer,
+    NotificationBulkReadSerializer,
+)
+from apps.notifications.services import (
+    audience_user_ids,
+    broadcast_notification,
+    get_unread_count,
+    push_unread_delta,
+)
 
 
 class NotificationListCreateView(generics.ListCreateAPIView):
@@ -16,6 +28,7 @@ class NotificationListCreateView(generics.ListCreateAPIView):
     POST: Crea una nueva notificación (solo admin)
     """
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['is_read', 'notification_type']
     ordering_fields = ['created_at']
@@ -43,6 +56,11 @@ class NotificationDetailView(generics.RetrieveDestroyAPIView):
     def get_queryset(self):
         """Solo permite acceder a las notificaciones del usuario autenticado"""
         return Notification.objects.filter(user=self.request.user)
+    
+    def perform_destroy(self, instance):
+        instance.delete()
+        if not instance.is_read:
+            push_unread_delta(instance.user_id, -1)
 
 
 class MarkAsReadView(APIView):
@@ -65,6 +83,33 @@ class MarkAsReadView(APIView):
             )
 
 
+class MarkSelectedAsReadView(APIView):
+    """
+    Vista para marcar varias notificaciones como leídas en un solo UPDATE
+    POST: /api/notifications/mark-as-read/
+    Body: {"ids": [1, 2, 3]} o {"before": "2025-01-31T00:00:00Z"}
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        serializer = NotificationBulkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        notifications = Notification.objects.filter(user=request.user, is_read=False)
+        if 'ids' in data:
+            notifications = notifications.filter(id__in=data['ids'])
+        else:
+            notifications = notifications.filter(created_at__lte=data['before'])
+        updated_count = notifications.update(is_read=True)
+        push_unread_delta(request.user.id, -updated_count)
+        
+        return Response({
+            'updated_count': updated_count,
+            'unread_count': get_unread_count(request.user)
+        })
+
+
 class MarkAllAsReadView(APIView):
     """
     Vista para marcar todas las notificaciones como leídas
@@ -77,6 +122,7 @@ class MarkAllAsReadView(APIView):
             user=request.user,
             is_read=False
         ).update(is_read=True)
+        push_unread_delta(request.user.id, -updated_count)
         
         return Response({
             'message': f'{updated_count} notificaciones marcadas como leídas',
@@ -84,6 +130,32 @@ class MarkAllAsReadView(APIView):
         })
 
 
+class NotificationBroadcastView(APIView):
+    """
+    Vista para enviar una notificación a muchos usuarios (solo admin)
+    POST: /api/notifications/broadcast/
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    
+    def post(self, request):
+        serializer = NotificationBroadcastSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        user_ids = audience_user_ids(data['audience'], species=data.get('species'), plan=data.get('plan'))
+        created_count = broadcast_notification(
+            user_ids,
+            title=data['title'],
+            message=data['message'],
+            notification_type=data['notification_type']
+        )
+        
+        return Response({
+            'message': f'{created_count} notificaciones enviadas',
+            'created_count': created_count
+        }, status=status.HTTP_201_CREATED)
+
+
 class UnreadCountView(APIView):
     """
     Vista para obtener el conteo de notificaciones no leídas
@@ -92,9 +164,5 @@ class UnreadCountView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        count = Notification.objects.filter(
-            user=request.user,
-            is_read=False
-        ).count()
-        
-        return Response({'unread_count': count})
+        # Contador cacheado: la tabla solo se consulta si falta en caché
+        return Response({'unread_count': get_unread_count(request.user)})
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Índices compuestos para los listados de pedidos. Depende de las dos
+    migraciones 0002 para unificar el grafo en un único nodo hoja.
+    """
+
+    dependencies = [
+        ('orders', '0002_order_delivered_date_order_estimated_delivery_date_and_more'),
+        ('orders', '0002_seed_demo_data'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', '-created_at', '-id'], name='orders_orde_custome_84ca43_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'status', '-created_at', '-id'], name='orders_orde_custome_3bef60_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='orders_orde_status_181fa1_idx'),
+        ),
+    ]
@@ -24,6 +24,14 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Listado del cliente, con o sin filtro de estado, en el orden de
+            # KeysetPagination (-created_at, -id)
+            models.Index(fields=['customer', '-created_at', '-id']),
+            models.Index(fields=['customer', 'status', '-created_at', '-id']),
+            # Listado de staff y dashboard: status / status__in con rango de fechas
+            models.Index(fields=['status', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"Order #{self.pk} - {self.customer.username}"
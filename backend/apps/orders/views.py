@@ -2,12 +2,14 @@ from rest_framework import generics, filters
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 
+from core.pagination import KeysetPagination
 from apps.orders.models import Order
 from apps.orders.serializers import OrderSerializer, OrderCreateSerializer
 
 
 class OrderListCreateView(generics.ListCreateAPIView):
 	permission_classes = [IsAuthenticated]
+	pagination_class = KeysetPagination
 	filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
 	filterset_fields = ['status']
 	ordering_fields = ['created_at', 'total']
@@ -10,18 +10,23 @@ class Payment(models.Model):
         ('YAPE', 'Yape/Plin'),
     ]
     
+    STATUS_PENDING = 'PENDING'
+    STATUS_COMPLETED = 'COMPLETED'
+    STATUS_FAILED = 'FAILED'
+    STATUS_REFUNDED = 'REFUNDED'
+
     STATUS_CHOICES = [
-        ('PENDING', 'Pendiente'),
-        ('COMPLETED', 'Completado'),
-        ('FAILED', 'Fallido'),
-        ('REFUNDED', 'Reembolsado'),
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_COMPLETED, 'Completado'),
+        (STATUS_FAILED, 'Fallido'),
+        (STATUS_REFUNDED, 'Reembolsado'),
     ]
     
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='payments')
     order = models.ForeignKey('orders.Order', on_delete=models.SET_NULL, null=True, blank=True, related_name='payments')
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD_CHOICES)
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
     transaction_id = models.CharField(max_length=100, blank=True, null=True, unique=True)
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
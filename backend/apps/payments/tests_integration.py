@@ -60,7 +60,7 @@ class PaymentIntegrationTests(APITestCase):
         
         response = self.client.get('/api/payments/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
     
     def test_payment_detail(self):
         """Test obtener detalle de un pago"""
@@ -104,10 +104,10 @@ class PaymentIntegrationTests(APITestCase):
         # Filtrar por COMPLETED
         response = self.client.get('/api/payments/?status=COMPLETED')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
         
         # Filtrar por PENDING
         response = self.client.get('/api/payments/?status=PENDING')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['status'], 'PENDING')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['status'], 'PENDING')
@@ -1,12 +1,14 @@
 from rest_framework import generics, filters
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from core.pagination import KeysetPagination
 from apps.payments.models import Payment
 from apps.payments.serializers import PaymentSerializer, PaymentCreateSerializer
 
 
 class PaymentListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['status', 'payment_method']
     ordering_fields = ['created_at', 'amount']
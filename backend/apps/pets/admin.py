@@ -1,5 +1,7 @@
 from django.contrib import admin
-from apps.pets.models import Pet, MedicalRecord, Vaccine
+from django.db.models import Q
+from apps.pets.models import Pet, MedicalRecord, Vaccine, VaccineReminder
+from apps.pets.services import search_medical_records
 
 
 @admin.register(Pet)
@@ -16,6 +18,14 @@ class MedicalRecordAdmin(admin.ModelAdmin):
     search_fields = ['pet__name', 'diagnosis', 'treatment']
     date_hierarchy = 'date'
     readonly_fields = ['created_at', 'updated_at']
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Diagnóstico, tratamiento y notas por el índice de texto completo
+        # en lugar de LIKE '%x%'; el nombre de la mascota sigue por LIKE
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        matches = search_medical_records(MedicalRecord.objects.all(), search_term).order_by().values('id')
+        return queryset.filter(Q(id__in=matches) | Q(pet__name__icontains=search_term)), False
 
 
 @admin.register(Vaccine)
@@ -25,3 +35,11 @@ class VaccineAdmin(admin.ModelAdmin):
     search_fields = ['pet__name', 'vaccine_name', 'batch_number']
     date_hierarchy = 'date_administered'
     readonly_fields = ['created_at']
+
+
+@admin.register(VaccineReminder)
+class VaccineReminderAdmin(admin.ModelAdmin):
+    list_display = ['vaccine', 'next_dose_date', 'sent_at']
+    search_fields = ['vaccine__pet__name', 'vaccine__vaccine_name']
+    date_hierarchy = 'next_dose_date'
+    readonly_fields = ['sent_at']
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.pets.services import send_vaccine_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        'Envía recordatorios de las próximas dosis de vacunas a los dueños. '
+        'Pensado para ejecutarse periódicamente (cron); lo ya avisado no se '
+        'repite y una dosis reprogramada se avisa de nuevo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lead-days', type=int, help='Días de anticipación (por defecto VACCINE_REMINDER_LEAD_DAYS)')
+
+    def handle(self, *args, **options):
+        if options['lead_days'] is not None and options['lead_days'] < 0:
+            raise CommandError('--lead-days no puede ser negativo')
+
+        run = send_vaccine_reminders(lead_days=options['lead_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{run.reminders_sent} recordatorios enviados (dosis hasta {run.horizon:%Y-%m-%d})'
+        ))
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.3 on 2026-10-18 08:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notificationarchive'),
+        ('pets', '0002_medicalrecord_vaccine'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VaccineReminderRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ran_at', models.DateTimeField(verbose_name='Fecha de ejecución')),
+                ('horizon', models.DateField(verbose_name='Dosis cubiertas hasta')),
+                ('reminders_sent', models.PositiveIntegerField(default=0, verbose_name='Recordatorios enviados')),
+            ],
+            options={
+                'verbose_name': 'Ejecución de recordatorios',
+                'verbose_name_plural': 'Ejecuciones de recordatorios',
+                'ordering': ['-ran_at'],
+                'get_latest_by': 'ran_at',
+            },
+        ),
+        migrations.CreateModel(
+            name='VaccineReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_dose_date', models.DateField(verbose_name='Dosis recordada')),
+                ('sent_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de envío')),
+                ('notification', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='notifications.notification', verbose_name='Notificación')),
+                ('vaccine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='pets.vaccine', verbose_name='Vacuna')),
+            ],
+            options={
+                'verbose_name': 'Recordatorio de vacuna',
+                'verbose_name_plural': 'Recordatorios de vacunas',
+                'constraints': [models.UniqueConstraint(fields=('vaccine', 'next_dose_date'), name='unique_vaccine_reminder')],
+            },
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.1.3 on 2026-10-18 08:49
+
+import apps.pets.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+FTS_TABLE = 'pets_medicalrecord_fts'
+PG_INDEX = 'pets_medicalrecord_search_gin'
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        diagnosis, treatment, notes,
+        content='pets_medicalrecord', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON pets_medicalrecord BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, diagnosis, treatment, notes)
+        VALUES (new.id, new.diagnosis, new.treatment, new.notes);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON pets_medicalrecord BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, diagnosis, treatment, notes)
+        VALUES ('delete', old.id, old.diagnosis, old.treatment, old.notes);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF diagnosis, treatment, notes ON pets_medicalrecord BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, diagnosis, treatment, notes)
+        VALUES ('delete', old.id, old.diagnosis, old.treatment, old.notes);
+        INSERT INTO {FTS_TABLE}(rowid, diagnosis, treatment, notes)
+        VALUES (new.id, new.diagnosis, new.treatment, new.notes);
+    END
+    """,
+    # Indexa los registros que ya existían
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def pg_index(schema_editor):
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+    # Debe coincidir con search_vector() de apps.pets.services.search
+    return GinIndex(SearchVector('diagnosis', 'treatment', 'notes', config='spanish'), name=PG_INDEX)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for statement in SQLITE_FORWARD:
+            schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('pets', 'MedicalRecord'), pg_index(schema_editor))
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for statement in SQLITE_BACKWARD:
+            schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('pets', 'MedicalRecord'), pg_index(schema_editor))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0003_vaccine_reminders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicalRecordSearch',
+            fields=[
+                ('record', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='pets.medicalrecord')),
+                ('document', apps.pets.models.FullTextField(db_column='pets_medicalrecord_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'pets_medicalrecord_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
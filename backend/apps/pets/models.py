@@ -40,6 +40,42 @@ class MedicalRecord(models.Model):
         return f"{self.pet.name} - {self.date} - {self.diagnosis[:50]}"
 
 
+class FullTextField(models.TextField):
+    """Columna oculta de una tabla FTS5 con el nombre de la tabla; admite el lookup match"""
+
+
+@FullTextField.register_lookup
+class FullTextMatch(models.Lookup):
+    lookup_name = 'match'
+    
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class MedicalRecordSearch(models.Model):
+    """
+    Índice de texto completo (FTS5 de SQLite) sobre diagnóstico, tratamiento
+    y notas de los registros médicos. La tabla virtual y los triggers que la
+    mantienen al día los crea la migración 0004; el modelo solo sirve para
+    unirla en las consultas (ver services.search).
+    """
+    record = models.OneToOneField(
+        MedicalRecord,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_entry'
+    )
+    document = FullTextField(db_column='pets_medicalrecord_fts')
+    rank = models.FloatField()
+    
+    class Meta:
+        managed = False
+        db_table = 'pets_medicalrecord_fts'
+
+
 class Vaccine(models.Model):
     """
     Registro de vacunación de mascotas
@@ -72,3 +108,50 @@ class Vaccine(models.Model):
         if self.next_dose_date:
             return self.next_dose_date >= timezone.now().date()
         return False
+
+
+class VaccineReminder(models.Model):
+    """
+    Recordatorio ya enviado para la próxima dosis de una vacuna. La fecha de
+    la dosis forma parte de la clave: si se reprograma, se avisa de nuevo.
+    """
+    vaccine = models.ForeignKey(Vaccine, on_delete=models.CASCADE, related_name='reminders', verbose_name='Vacuna')
+    next_dose_date = models.DateField(verbose_name='Dosis recordada')
+    notification = models.ForeignKey(
+        'notifications.Notification',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Notificación'
+    )
+    sent_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de envío')
+    
+    class Meta:
+        verbose_name = 'Recordatorio de vacuna'
+        verbose_name_plural = 'Recordatorios de vacunas'
+        constraints = [
+            models.UniqueConstraint(fields=['vaccine', 'next_dose_date'], name='unique_vaccine_reminder'),
+        ]
+    
+    def __str__(self):
+        return f"{self.vaccine} - recordatorio {self.next_dose_date}"
+
+
+class VaccineReminderRun(models.Model):
+    """
+    Ejecución del programador de recordatorios: cuándo corrió, hasta qué
+    fecha de dosis revisó y cuántos recordatorios envió.
+    """
+    ran_at = models.DateTimeField(verbose_name='Fecha de ejecución')
+    horizon = models.DateField(verbose_name='Dosis cubiertas hasta')
+    reminders_sent = models.PositiveIntegerField(default=0, verbose_name='Recordatorios enviados')
+    
+    class Meta:
+        ordering = ['-ran_at']
+        get_latest_by = 'ran_at'
+        verbose_name = 'Ejecución de recordatorios'
+        verbose_name_plural = 'Ejecuciones de recordatorios'
+    
+    def __str__(self):
+        return f"{self.ran_at:%Y-%m-%d %H:%M} - {self.reminders_sent} recordatorios"
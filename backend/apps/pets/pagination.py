@@ -0,0 +1,28 @@
+from rest_framework.pagination import PageNumberPagination
+
+from core.pagination import KeysetPagination
+
+
+class HistorySectionPagination(KeysetPagination):
+    """
+    Keyset por (fecha, id), de lo más reciente a lo más antiguo, para una
+    sección del historial compacto. Cada sección usa su propio parámetro de
+    cursor, así se puede avanzar en una sin mover la otra.
+    """
+
+    def __init__(self, cursor_query_param, date_field):
+        self.cursor_query_param = cursor_query_param
+        self.date_field = date_field
+
+    def get_ordering(self, request, queryset, view):
+        return (f'-{self.date_field}', '-id')
+
+
+class MedicalRecordSearchPagination(PageNumberPagination):
+    """
+    Páginas numeradas para resultados de búsqueda: el orden es por
+    relevancia, que no es una columna sobre la que se pueda hacer keyset.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -98,3 +98,45 @@ class PetDetailSerializer(serializers.ModelSerializer):
             'medical_records', 'vaccines'
         ]
         read_only_fields = ['id']
+
+
+class ProjectedFieldsMixin:
+    """Permite reducir los campos del serializer con fields=[...] al instanciarlo"""
+    
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class MedicalRecordCompactSerializer(ProjectedFieldsMixin, serializers.ModelSerializer):
+    """Registro médico sin los datos de la mascota, que van una sola vez"""
+    
+    class Meta:
+        model = MedicalRecord
+        fields = [
+            'id', 'date', 'diagnosis', 'treatment', 'veterinarian',
+            'notes', 'weight', 'temperature'
+        ]
+
+
+class VaccineCompactSerializer(ProjectedFieldsMixin, serializers.ModelSerializer):
+    """Vacuna sin los datos de la mascota, que van una sola vez"""
+    
+    class Meta:
+        model = Vaccine
+        fields = [
+            'id', 'vaccine_name', 'date_administered', 'next_dose_date',
+            'veterinarian', 'batch_number', 'notes'
+        ]
+
+
+class PetHistoryHeaderSerializer(serializers.ModelSerializer):
+    """Datos de la mascota y del dueño para el historial compacto"""
+    owner_username = serializers.CharField(source='owner.username', read_only=True)
+    owner_email = serializers.EmailField(source='owner.email', read_only=True)
+    
+    class Meta:
+        model = Pet
+        fields = ['id', 'name', 'species', 'age', 'owner', 'owner_username', 'owner_email']
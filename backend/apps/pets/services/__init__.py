@@ -0,0 +1,11 @@
+from .reminders import due_vaccines, send_vaccine_reminders
+from .search import search_medical_records
+from .vitals import downsample_vitals, lttb_indices
+
+__all__ = [
+    'due_vaccines',
+    'send_vaccine_reminders',
+    'search_medical_records',
+    'downsample_vitals',
+    'lttb_indices',
+]
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from apps.notifications.models import Notification
+from apps.notifications.services import push_notifications
+from apps.pets.models import Vaccine, VaccineReminder, VaccineReminderRun
+
+REMINDER_LEAD_DAYS = 7
+REMINDER_BATCH_SIZE = 500
+
+
+def due_vaccines(today, horizon):
+    """
+    Vacunas con la próxima dosis entre today y horizon que aún no tienen
+    recordatorio, ordenadas por (next_dose_date, id). Es un rango sobre el
+    índice de next_dose_date, acotado por los días de anticipación, y el
+    anti-join con VaccineReminder descarta lo ya avisado: una dosis
+    reprogramada dentro de la ventana vuelve a entrar aunque una ejecución
+    anterior ya la haya cubierto.
+    """
+    due = Vaccine.objects.filter(
+        next_dose_date__gte=today,
+        next_dose_date__lte=horizon,
+        pet__owner__is_active=True,
+    )
+    already_sent = VaccineReminder.objects.filter(
+        vaccine=OuterRef('pk'),
+        next_dose_date=OuterRef('next_dose_date'),
+    )
+    return due.exclude(Exists(already_sent)).order_by('next_dose_date', 'id').values(
+        'id', 'vaccine_name', 'next_dose_date', 'pet__name', 'pet__owner_id'
+    )
+
+
+def reminder_notification(row):
+    return Notification(
+        user_id=row['pet__owner_id'],
+        title='Recordatorio de vacuna',
+        message=(
+            f"{row['pet__name']} tiene la próxima dosis de {row['vaccine_name']} "
+            f"el {row['next_dose_date']:%d/%m/%Y}"
+        ),
+        notification_type='INFO',
+    )
+
+
+def send_vaccine_reminders(today=None, lead_days=None, batch_size=None):
+    """
+    Envía una notificación al dueño por cada dosis que vence en los próximos
+    VACCINE_REMINDER_LEAD_DAYS días y deja registrado cada recordatorio en
+    VaccineReminder para no repetirlo.
+
+    Cada ejecución revisa la ventana completa; lo ya enviado se descarta en
+    la consulta. Las filas se recorren por páginas de clave
+    (next_dose_date, id) y cada página se guarda con bulk_create en una
+    transacción. Devuelve la VaccineReminderRun creada.
+    """
+    today = today or timezone.localdate()
+    lead_days = getattr(settings, 'VACCINE_REMINDER_LEAD_DAYS', REMINDER_LEAD_DAYS) if lead_days is None else lead_days
+    batch_size = batch_size or getattr(settings, 'VACCINE_REMINDER_BATCH_SIZE', REMINDER_BATCH_SIZE)
+    horizon = today + timedelta(days=lead_days)
+    ran_at = timezone.now()
+
+    due = due_vaccines(today, horizon)
+    sent = 0
+    last = None
+    while True:
+        page = due
+        if last is not None:
+            page = page.filter(
+                Q(next_dose_date__gt=last['next_dose_date'])
+                | Q(next_dose_date=last['next_dose_date'], id__gt=last['id'])
+            )
+        rows = list(page[:batch_size])
+        if not rows:
+            break
+        with transaction.atomic():
+            notifications = Notification.objects.bulk_create([reminder_notification(row) for row in rows])
+            VaccineReminder.objects.bulk_create([
+                VaccineReminder(vaccine_id=row['id'], next_dose_date=row['next_dose_date'], notification=notification)
+                for row, notification in zip(rows, notifications)
+            ])
+            push_notifications(notifications)
+        sent += len(rows)
+        last = rows[-1]
+
+    return VaccineReminderRun.objects.create(ran_at=ran_at, horizon=horizon, reminders_sent=sent)
@@ -0,0 +1,54 @@
+import re
+
+from django.db import connection
+from django.db.models import F, Q
+
+SEARCH_CONFIG = 'spanish'
+SEARCH_FIELDS = ('diagnosis', 'treatment', 'notes')
+
+
+def search_terms(text):
+    """Palabras de la búsqueda, sin la sintaxis de consulta de cada motor"""
+    return re.findall(r'\w+', text or '')
+
+
+def search_vector():
+    """Vector de búsqueda de PostgreSQL; coincide con el índice GIN de la migración 0004"""
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector(*SEARCH_FIELDS, config=SEARCH_CONFIG)
+
+
+def search_medical_records(queryset, text):
+    """
+    Filtra queryset (de MedicalRecord) por texto en diagnóstico, tratamiento
+    y notas y lo ordena por relevancia. Todas las palabras deben aparecer.
+
+    - SQLite: une la tabla FTS5 pets_medicalrecord_fts; cada palabra se
+      busca como prefijo y sin acentos, ordenado por bm25.
+    - PostgreSQL: tsvector en español sobre el índice GIN, ordenado por
+      ts_rank.
+    - Otros motores: LIKE por palabra, del más reciente al más antiguo.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        # rank de FTS5 es bm25: menor es más relevante
+        return queryset.filter(search_entry__document__match=match).annotate(
+            rank=F('search_entry__rank')
+        ).order_by('rank', '-date', '-id')
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        vector = search_vector()
+        query = SearchQuery(' '.join(terms), config=SEARCH_CONFIG)
+        return queryset.annotate(search=vector).filter(search=query).annotate(
+            rank=SearchRank(vector, query)
+        ).order_by('-rank', '-date', '-id')
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(*[Q(**{f'{field}__icontains': term}) for field in SEARCH_FIELDS], _connector=Q.OR)
+    return queryset.filter(condition).order_by('-date', '-id')
@@ -0,0 +1,94 @@
+from datetime import date
+
+VITAL_SERIES = ('weight', 'temperature')
+
+
+def lttb_indices(xs, ys, threshold):
+    """
+    Largest-Triangle-Three-Buckets: índices de hasta threshold puntos que
+    conservan la forma de la serie (xs creciente). Siempre incluye el
+    primero y el último.
+    """
+    n = len(xs)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < 3:
+        return [0, n - 1][:max(threshold, 1)]
+
+    selected = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        # Promedio del cubo siguiente como tercer vértice del triángulo
+        next_end = min(int((i + 2) * every) + 1, n)
+        next_xs, next_ys = xs[end:next_end], ys[end:next_end]
+        avg_x = sum(next_xs) / len(next_xs)
+        avg_y = sum(next_ys) / len(next_ys)
+
+        best, best_area = start, -1
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+def _mean(values):
+    values = [value for value in values if value is not None]
+    return round(sum(values) / len(values), 2) if values else None
+
+
+def downsample_vitals(rows, points, method='lttb'):
+    """
+    Reduce filas (date, weight, temperature) en orden cronológico a unas
+    points filas y las devuelve en columnas alineadas:
+    {'dates': [...], 'weight': [...], 'temperature': [...]}.
+
+    - lttb: conserva filas reales; LTTB se aplica a cada serie por separado
+      con la mitad del presupuesto (la parte que una serie corta no usa pasa
+      a la otra) y se unen las filas elegidas, así que nunca hay más de
+      points filas.
+    - avg: points cubos con la misma cantidad de filas; cada uno se resume
+      en la fecha media y el promedio de cada serie (ignorando vacíos).
+    """
+    rows = [
+        (day, float(weight) if weight is not None else None, float(temperature) if temperature is not None else None)
+        for day, weight, temperature in rows
+    ]
+
+    if method == 'avg' and len(rows) > points:
+        size = len(rows) / points
+        buckets = [rows[int(i * size):int((i + 1) * size)] for i in range(points)]
+        rows = [
+            (
+                date.fromordinal(round(sum(day.toordinal() for day, _, _ in bucket) / len(bucket))),
+                _mean([weight for _, weight, _ in bucket]),
+                _mean([temperature for _, _, temperature in bucket]),
+            )
+            for bucket in buckets
+        ]
+    elif method == 'lttb':
+        present = [[i for i, row in enumerate(rows) if row[column] is not None] for column in (1, 2)]
+        weight_budget = min(len(present[0]), (points + 1) // 2)
+        temperature_budget = min(len(present[1]), points - weight_budget)
+        weight_budget = min(len(present[0]), points - temperature_budget)
+
+        keep = set()
+        for column, indices, budget in zip((1, 2), present, (weight_budget, temperature_budget)):
+            if not budget:
+                continue
+            xs = [rows[i][0].toordinal() for i in indices]
+            ys = [rows[i][column] for i in indices]
+            keep.update(indices[i] for i in lttb_indices(xs, ys, budget))
+        rows = [rows[i] for i in sorted(keep)]
+
+    return {
+        'dates': [day.isoformat() for day, _, _ in rows],
+        'weight': [weight for _, weight, _ in rows],
+        'temperature': [temperature for _, _, temperature in rows],
+    }
@@ -1,7 +1,15 @@
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth.models import User
-from apps.pets.models import Pet, MedicalRecord, Vaccine
+from apps.pets.models import Pet, MedicalRecord, Vaccine, VaccineReminder
+from apps.pets.services import lttb_indices, send_vaccine_reminders
+from apps.notifications.models import Notification
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from io import StringIO
 from datetime import date, timedelta
 
 
@@ -75,8 +83,8 @@ class MedicalRecordIntegrationTests(APITestCase):
         self.client.force_authenticate(user=self.user)
         response = self.client.get('/api/pets/medical-records/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['pet_name'], 'Firulais')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['pet_name'], 'Firulais')
     
     def test_staff_can_list_all_records(self):
         MedicalRecord.objects.create(
@@ -90,7 +98,7 @@ class MedicalRecordIntegrationTests(APITestCase):
         self.client.force_authenticate(user=self.staff)
         response = self.client.get('/api/pets/medical-records/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
     
     def test_staff_can_create_medical_record(self):
         self.client.force_authenticate(user=self.staff)
@@ -164,8 +172,8 @@ class MedicalRecordIntegrationTests(APITestCase):
         self.client.force_authenticate(user=self.user)
         response = self.client.get(f'/api/pets/medical-records/?pet={self.pet.id}')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['pet_name'], 'Firulais')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['pet_name'], 'Firulais')
 
 
 class VaccineIntegrationTests(APITestCase):
@@ -193,8 +201,8 @@ class VaccineIntegrationTests(APITestCase):
         self.client.force_authenticate(user=self.user)
         response = self.client.get('/api/pets/vaccines/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['vaccine_name'], 'Rabia')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['vaccine_name'], 'Rabia')
     
     def test_staff_can_create_vaccine(self):
         self.client.force_authenticate(user=self.staff)
@@ -318,3 +326,301 @@ class PetMedicalHistoryTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['owner_username'], 'testuser')
         self.assertEqual(response.data['owner_email'], 'user@test.com')
+
+
+class VaccineReminderTests(TestCase):
+    """Tests del programador de recordatorios de vacunas"""
+    
+    def setUp(self):
+        self.owner = User.objects.create_user(username='reminded', password='pw')
+        self.pet = Pet.objects.create(name='Firulais', species='Perro', age=3, owner=self.owner)
+        self.today = timezone.localdate()
+    
+    def vaccine(self, name, days, **kwargs):
+        return Vaccine.objects.create(
+            pet=self.pet,
+            vaccine_name=name,
+            date_administered=self.today - timedelta(days=300),
+            next_dose_date=self.today + timedelta(days=days) if days is not None else None,
+            veterinarian='Dr. Pérez',
+            **kwargs
+        )
+    
+    def test_sends_one_reminder_per_upcoming_dose(self):
+        soon = self.vaccine('Rabia', 3)
+        self.vaccine('Parvovirus', 30)
+        self.vaccine('Moquillo', -2)
+        self.vaccine('Sin refuerzo', None)
+        
+        run = send_vaccine_reminders(lead_days=7)
+        
+        self.assertEqual(run.reminders_sent, 1)
+        notification = Notification.objects.get(user=self.owner)
+        self.assertIn('Firulais', notification.message)
+        self.assertIn('Rabia', notification.message)
+        reminder = VaccineReminder.objects.get()
+        self.assertEqual((reminder.vaccine, reminder.notification), (soon, notification))
+    
+    def test_runs_never_duplicate(self):
+        self.vaccine('Rabia', 3)
+        send_vaccine_reminders(lead_days=7)
+        # Lo ya enviado no se repite
+        self.assertEqual(send_vaccine_reminders(lead_days=7).reminders_sent, 0)
+        
+        # Una vacuna registrada después de la última ejecución entra en la siguiente
+        self.vaccine('Leptospira', 5)
+        self.assertEqual(send_vaccine_reminders(lead_days=7).reminders_sent, 1)
+        # Al día siguiente la ventana avanza y toma las dosis nuevas
+        self.vaccine('Parvovirus', 8)
+        run = send_vaccine_reminders(today=self.today + timedelta(days=1), lead_days=7)
+        self.assertEqual(run.reminders_sent, 1)
+        self.assertEqual(Notification.objects.filter(user=self.owner).count(), 3)
+    
+    def test_rescheduled_dose_is_reminded_again(self):
+        """Reprogramar dentro de una ventana ya cubierta vuelve a avisar"""
+        vaccine = self.vaccine('Rabia', 2)
+        send_vaccine_reminders(lead_days=7)
+        vaccine.next_dose_date = self.today + timedelta(days=6)
+        vaccine.save()
+        self.assertEqual(send_vaccine_reminders(lead_days=7).reminders_sent, 1)
+        self.assertEqual(VaccineReminder.objects.filter(vaccine=vaccine).count(), 2)
+    
+    def test_writes_in_batches(self):
+        for n in range(5):
+            self.vaccine(f'Dosis {n}', n)
+        with CaptureQueriesContext(connection) as queries:
+            run = send_vaccine_reminders(lead_days=7, batch_size=2)
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "notifications_notification"')]
+        self.assertEqual(run.reminders_sent, 5)
+        self.assertEqual(len(inserts), 3)
+    
+    def test_command(self):
+        self.vaccine('Rabia', 1)
+        out = StringIO()
+        call_command('send_vaccine_reminders', '--lead-days=3', stdout=out)
+        self.assertIn('1 recordatorios enviados', out.getvalue())
+
+
+class PetHistoryTests(APITestCase):
+    """Tests del historial médico compacto"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='history_owner', password='pw', email='owner@test.com')
+        self.other = User.objects.create_user(username='history_other', password='pw')
+        self.pet = Pet.objects.create(name='Firulais', species='Perro', age=8, owner=self.user)
+        self.records = [
+            MedicalRecord.objects.create(
+                pet=self.pet,
+                date=date(2020, 1, 1) + timedelta(days=30 * n),
+                diagnosis=f'Control {n}',
+                treatment='Ninguno',
+                veterinarian='Dr. Pérez',
+                weight=10 + n
+            )
+            for n in range(5)
+        ]
+        # Misma fecha que el último: el desempate es el id
+        self.records.append(MedicalRecord.objects.create(
+            pet=self.pet, date=self.records[-1].date, diagnosis='Urgencia', treatment='Suero', veterinarian='Dr. Pérez'
+        ))
+        Vaccine.objects.create(
+            pet=self.pet, vaccine_name='Rabia', date_administered=date(2020, 3, 1), veterinarian='Dr. Pérez'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def url(self, query=''):
+        return f'/api/pets/{self.pet.id}/history/{query}'
+    
+    def test_pet_data_sent_once(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['pet']['name'], 'Firulais')
+        self.assertEqual(response.data['pet']['owner_username'], 'history_owner')
+        record = response.data['medical_records']['results'][0]
+        self.assertNotIn('pet_name', record)
+        self.assertNotIn('owner_username', record)
+        self.assertEqual(len(response.data['vaccines']['results']), 1)
+    
+    def test_sections_page_by_date_and_id(self):
+        seen = []
+        url = self.url('?sections=medical_records&page_size=2')
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn('vaccines', response.data)
+            seen.extend(item['id'] for item in response.data['medical_records']['results'])
+            url = response.data['medical_records']['next']
+        expected = [r.id for r in sorted(self.records, key=lambda r: (r.date, r.id), reverse=True)]
+        self.assertEqual(seen, expected)
+    
+    def test_field_projection_and_date_window(self):
+        response = self.client.get(self.url('?fields=date,weight&date_from=2020-01-15&date_to=2020-03-31'))
+        records = response.data['medical_records']['results']
+        self.assertEqual([set(record) for record in records], [{'id', 'date', 'weight'}] * 3)
+        self.assertEqual([record['date'] for record in records], ['2020-03-31', '2020-03-01', '2020-01-31'])
+        self.assertEqual(response.data['vaccines']['results'], [{'id': self.pet.vaccines.get().id}])
+    
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get(self.url('?fields=secreto')).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url('?sections=facturas')).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url('?date_from=ayer')).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_other_users_pet_not_found(self):
+        self.client.force_authenticate(user=self.other)
+        self.assertEqual(self.client.get(self.url()).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class MedicalRecordSearchTests(APITestCase):
+    """Tests de la búsqueda de texto completo en registros médicos"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='search_owner', password='pw')
+        self.other = User.objects.create_user(username='search_other', password='pw')
+        self.staff = User.objects.create_user(username='search_staff', password='pw', is_staff=True)
+        self.pet = Pet.objects.create(name='Firulais', species='Perro', age=4, owner=self.user)
+        self.other_pet = Pet.objects.create(name='Michi', species='Gato', age=2, owner=self.other)
+        self.otitis = self.record(self.pet, 'Otitis externa', 'Gotas óticas', 'Revisar oído izquierdo')
+        self.gastro = self.record(self.pet, 'Gastroenteritis', 'Dieta blanda', 'Presentó vómito y diarrea')
+        self.dermatitis = self.record(self.pet, 'Dermatitis alérgica', 'Antihistamínico', '')
+        self.other_otitis = self.record(self.other_pet, 'Otitis media', 'Antibiótico', '')
+        self.client.force_authenticate(user=self.user)
+    
+    def record(self, pet, diagnosis, treatment, notes):
+        return MedicalRecord.objects.create(
+            pet=pet, date=date(2024, 1, 1), diagnosis=diagnosis,
+            treatment=treatment, notes=notes, veterinarian='Dr. Pérez'
+        )
+    
+    def search(self, query):
+        response = self.client.get('/api/pets/medical-records/search/', {'q': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+    
+    def test_matches_words_prefixes_and_accents(self):
+        self.assertEqual(self.search('otitis'), [self.otitis.id])
+        self.assertEqual(self.search('derma'), [self.dermatitis.id])
+        # Sin acentos y en cualquiera de los tres campos
+        self.assertEqual(self.search('vomito'), [self.gastro.id])
+        self.assertEqual(self.search('otitis oido'), [self.otitis.id])
+        self.assertEqual(self.search('otitis diarrea'), [])
+    
+    def test_ranks_more_relevant_records_first(self):
+        strong = self.record(self.pet, 'Otitis crónica', 'Limpieza por otitis', 'Otitis recurrente')
+        self.assertEqual(self.search('otitis'), [strong.id, self.otitis.id])
+    
+    def test_index_follows_updates_and_deletes(self):
+        self.gastro.diagnosis = 'Pancreatitis'
+        self.gastro.save()
+        self.assertEqual(self.search('pancreatitis'), [self.gastro.id])
+        self.assertEqual(self.search('gastroenteritis'), [])
+        self.dermatitis.delete()
+        self.assertEqual(self.search('dermatitis'), [])
+    
+    def test_scoped_to_own_pets_unless_staff(self):
+        self.assertEqual(self.search('otitis'), [self.otitis.id])
+        self.client.force_authenticate(user=self.staff)
+        self.assertEqual(sorted(self.search('otitis')), sorted([self.otitis.id, self.other_otitis.id]))
+    
+    def test_query_is_required_and_syntax_is_ignored(self):
+        response = self.client.get('/api/pets/medical-records/search/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # Caracteres de la sintaxis de FTS no rompen la consulta
+        self.assertEqual(self.search('otitis" -(*'), [self.otitis.id])
+    
+    def test_results_are_paginated(self):
+        for n in range(3):
+            self.record(self.pet, f'Otitis {n}', 'Gotas', '')
+        response = self.client.get('/api/pets/medical-records/search/', {'q': 'otitis', 'page_size': 2})
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+
+class LttbTests(SimpleTestCase):
+    """Tests del muestreo Largest-Triangle-Three-Buckets"""
+    
+    def test_keeps_endpoints_and_budget(self):
+        xs = list(range(1000))
+        ys = [(x % 50) / 10 for x in xs]
+        indices = lttb_indices(xs, ys, 100)
+        self.assertEqual(len(indices), 100)
+        self.assertEqual((indices[0], indices[-1]), (0, 999))
+        self.assertEqual(indices, sorted(set(indices)))
+    
+    def test_keeps_spikes(self):
+        xs = list(range(300))
+        ys = [0.0] * 300
+        ys[150] = 40.0
+        self.assertIn(150, lttb_indices(xs, ys, 10))
+    
+    def test_small_series_untouched(self):
+        self.assertEqual(lttb_indices([1, 2, 3], [1, 2, 3], 10), [0, 1, 2])
+
+
+class PetVitalsTests(APITestCase):
+    """Tests de la serie de signos vitales"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='vitals_owner', password='pw')
+        self.pet = Pet.objects.create(name='Firulais', species='Perro', age=9, owner=self.user)
+        start = date(2018, 1, 1)
+        MedicalRecord.objects.bulk_create([
+            MedicalRecord(
+                pet=self.pet,
+                date=start + timedelta(days=7 * n),
+                diagnosis='Control',
+                treatment='Ninguno',
+                veterinarian='Dr. Pérez',
+                weight=20 + (n % 10) / 2,
+                temperature=38.5 if n % 3 else None
+            )
+            for n in range(400)
+        ])
+        # Visita sin signos vitales: no aparece en la serie
+        MedicalRecord.objects.create(
+            pet=self.pet, date=start, diagnosis='Papeles', treatment='-', veterinarian='Dr. Pérez'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def vitals(self, query=''):
+        response = self.client.get(f'/api/pets/{self.pet.id}/vitals/{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+    
+    def test_columnar_and_downsampled(self):
+        data = self.vitals('?points=50')
+        self.assertEqual(data['total'], 400)
+        self.assertEqual(len(data['dates']), len(data['weight']))
+        self.assertEqual(len(data['dates']), len(data['temperature']))
+        # Hasta 50 puntos entre las dos series, con la primera y la última visita
+        self.assertLessEqual(len(data['dates']), 50)
+        self.assertEqual(data['dates'][0], '2018-01-01')
+        self.assertEqual(data['dates'], sorted(data['dates']))
+        self.assertIsInstance(data['weight'][0], float)
+    
+    def test_point_budget_is_shared_between_series(self):
+        for points in (3, 7, 51):
+            data = self.vitals(f'?points={points}')
+            self.assertLessEqual(len(data['dates']), points)
+        # Sin temperaturas, el peso usa todo el presupuesto
+        MedicalRecord.objects.filter(pet=self.pet).update(temperature=None)
+        self.assertEqual(len(self.vitals('?points=30')['dates']), 30)
+    
+    def test_bucket_averages(self):
+        data = self.vitals('?points=40&method=avg')
+        self.assertEqual(len(data['dates']), 40)
+        self.assertEqual(data['weight'][0], 22.25)
+        self.assertEqual(data['temperature'][0], 38.5)
+    
+    def test_small_history_and_window(self):
+        data = self.vitals('?date_from=2018-01-01&date_to=2018-01-31')
+        self.assertEqual(data['dates'], ['2018-01-01', '2018-01-08', '2018-01-15', '2018-01-22', '2018-01-29'])
+        self.assertEqual(data['temperature'], [None, 38.5, 38.5, None, 38.5])
+    
+    def test_invalid_params_and_access(self):
+        url = f'/api/pets/{self.pet.id}/vitals/'
+        self.assertEqual(self.client.get(url + '?method=spline').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url + '?points=muchos').status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(user=User.objects.create_user(username='vitals_other', password='pw'))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
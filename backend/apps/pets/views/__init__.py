@@ -1,11 +1,20 @@
 from rest_framework import generics, filters, permissions
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
 from apps.pets.models import Pet, MedicalRecord, Vaccine
+from apps.pets.pagination import HistorySectionPagination, MedicalRecordSearchPagination
+from apps.pets.services import downsample_vitals, search_medical_records
+from core.pagination import KeysetPagination
 from apps.pets.serializers import PetSerializer
 from apps.pets.serializers import (
-    PetDetailSerializer, MedicalRecordSerializer, VaccineSerializer
+    PetDetailSerializer, MedicalRecordSerializer, VaccineSerializer,
+    PetHistoryHeaderSerializer, MedicalRecordCompactSerializer, VaccineCompactSerializer
 )
 
 
@@ -41,6 +50,7 @@ class MedicalRecordListCreateView(generics.ListCreateAPIView):
     """
     serializer_class = MedicalRecordSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['pet', 'date']
     ordering_fields = ['date', 'created_at']
@@ -55,6 +65,34 @@ class MedicalRecordListCreateView(generics.ListCreateAPIView):
         return MedicalRecord.objects.select_related('pet', 'pet__owner').filter(pet__owner=user)
 
 
+class MedicalRecordSearchView(generics.ListAPIView):
+    """
+    Búsqueda de texto completo en diagnóstico, tratamiento y notas.
+    GET /api/pets/medical-records/search/?q=otitis+externa[&pet=<id>]
+    Resultados ordenados por relevancia y paginados (?page=, ?page_size=).
+    - Staff: busca en todos los registros
+    - Usuario: solo en los registros de sus mascotas
+    """
+    serializer_class = MedicalRecordSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = MedicalRecordSearchPagination
+    
+    def get_queryset(self):
+        text = self.request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': 'Indica el texto a buscar'})
+        
+        records = MedicalRecord.objects.select_related('pet', 'pet__owner')
+        if not self.request.user.is_staff:
+            records = records.filter(pet__owner=self.request.user)
+        pet = self.request.query_params.get('pet')
+        if pet:
+            if not pet.isdigit():
+                raise ValidationError({'pet': 'Debe ser el id de una mascota'})
+            records = records.filter(pet_id=pet)
+        return search_medical_records(records, text)
+
+
 class MedicalRecordDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
     Detalle, actualiza y elimina un registro médico.
@@ -93,6 +131,7 @@ class VaccineListCreateView(generics.ListCreateAPIView):
     """
     serializer_class = VaccineSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['pet', 'vaccine_name', 'date_administered']
     ordering_fields = ['date_administered', 'next_dose_date', 'created_at']
@@ -151,3 +190,149 @@ class PetMedicalHistoryView(generics.RetrieveAPIView):
         if user.is_staff:
             return Pet.objects.prefetch_related('medical_records', 'vaccines').select_related('owner').all()
         return Pet.objects.prefetch_related('medical_records', 'vaccines').select_related('owner').filter(owner=user)
+
+
+class PetHistoryMixin:
+    """
+    Acceso a la mascota y ventana de fechas (date_from / date_to, YYYY-MM-DD)
+    para las vistas de historial
+    """
+    
+    def get_pet(self, request, pk):
+        # Staff puede ver cualquier mascota; el usuario solo las suyas
+        pets = Pet.objects.select_related('owner')
+        if not request.user.is_staff:
+            pets = pets.filter(owner=request.user)
+        return get_object_or_404(pets, pk=pk)
+    
+    def get_date_param(self, request, name):
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: 'Fecha inválida, use YYYY-MM-DD'})
+        return parsed
+    
+    def filter_date_window(self, request, queryset, date_field):
+        date_from = self.get_date_param(request, 'date_from')
+        date_to = self.get_date_param(request, 'date_to')
+        if date_from:
+            queryset = queryset.filter(**{f'{date_field}__gte': date_from})
+        if date_to:
+            queryset = queryset.filter(**{f'{date_field}__lte': date_to})
+        return queryset
+
+
+class PetHistoryView(PetHistoryMixin, APIView):
+    """
+    Historial médico compacto de una mascota.
+    GET /api/pets/{id}/history/
+    
+    Los datos de la mascota y del dueño van una sola vez en "pet"; cada
+    sección (medical_records, vaccines) trae solo sus columnas y se pagina
+    por (fecha, id) de lo más reciente a lo más antiguo.
+    
+    Parámetros:
+    - sections: secciones a incluir, separadas por comas (por defecto ambas)
+    - fields: columnas a incluir en cada sección; el id siempre va
+    - date_from / date_to: ventana de fechas (YYYY-MM-DD), inclusive
+    - page_size: filas por sección (máximo 100)
+    - records_cursor / vaccines_cursor: cursores de cada sección
+    
+    - Staff: puede ver cualquier mascota
+    - Usuario: solo puede ver sus propias mascotas
+    """
+    permission_classes = [IsAuthenticated]
+    # sección: (modelo, serializer, campo de fecha, parámetro del cursor)
+    sections = {
+        'medical_records': (MedicalRecord, MedicalRecordCompactSerializer, 'date', 'records_cursor'),
+        'vaccines': (Vaccine, VaccineCompactSerializer, 'date_administered', 'vaccines_cursor'),
+    }
+    
+    def get(self, request, pk):
+        pet = self.get_pet(request, pk)
+        
+        sections = self.get_list_param(request, 'sections') or list(self.sections)
+        unknown = set(sections) - set(self.sections)
+        if unknown:
+            raise ValidationError({'sections': f"Secciones desconocidas: {', '.join(sorted(unknown))}"})
+        
+        fields = self.get_list_param(request, 'fields')
+        if fields:
+            known = {name for _, serializer, _, _ in self.sections.values() for name in serializer.Meta.fields}
+            unknown = set(fields) - known
+            if unknown:
+                raise ValidationError({'fields': f"Campos desconocidos: {', '.join(sorted(unknown))}"})
+        
+        data = {'pet': PetHistoryHeaderSerializer(pet).data}
+        for name in sections:
+            model, serializer_class, date_field, cursor_param = self.sections[name]
+            queryset = self.filter_date_window(request, model.objects.filter(pet=pet), date_field)
+            
+            section_fields = None
+            if fields:
+                section_fields = ['id'] + [field for field in fields if field in serializer_class.Meta.fields]
+                # Solo se leen las columnas pedidas más las del orden
+                queryset = queryset.only(date_field, *section_fields)
+            
+            paginator = HistorySectionPagination(cursor_param, date_field)
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            data[name] = {
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'results': serializer_class(page, many=True, fields=section_fields).data,
+            }
+        return Response(data)
+    
+    def get_list_param(self, request, name):
+        value = request.query_params.get(name, '')
+        return [item.strip() for item in value.split(',') if item.strip()]
+
+
+class PetVitalsView(PetHistoryMixin, APIView):
+    """
+    Serie de peso y temperatura de una mascota para gráficos.
+    GET /api/pets/{id}/vitals/
+    
+    Devuelve columnas alineadas (dates, weight, temperature) en orden
+    cronológico, reducidas en el servidor a unos "points" puntos.
+    
+    Parámetros:
+    - points: presupuesto de puntos (por defecto 200, máximo 2000)
+    - method: lttb (conserva la forma con visitas reales) o avg (promedios por tramo)
+    - date_from / date_to: ventana de fechas (YYYY-MM-DD), inclusive
+    """
+    permission_classes = [IsAuthenticated]
+    default_points = 200
+    max_points = 2000
+    methods = ('lttb', 'avg')
+    
+    def get(self, request, pk):
+        pet = self.get_pet(request, pk)
+        
+        try:
+            points = int(request.query_params.get('points', self.default_points))
+        except ValueError:
+            raise ValidationError({'points': 'Debe ser un número entero'})
+        points = max(3, min(points, self.max_points))
+        method = request.query_params.get('method', 'lttb')
+        if method not in self.methods:
+            raise ValidationError({'method': f"Use {' o '.join(self.methods)}"})
+        
+        records = self.filter_date_window(request, MedicalRecord.objects.filter(pet=pet), 'date')
+        rows = list(
+            records.filter(Q(weight__isnull=False) | Q(temperature__isnull=False))
+            .order_by('date', 'id')
+            .values_list('date', 'weight', 'temperature')
+        )
+        
+        return Response({
+            'pet': pet.id,
+            'method': method,
+            'total': len(rows),
+            **downsample_vitals(rows, points, method),
+        })
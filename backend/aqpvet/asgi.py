@@ -20,6 +20,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'aqpvet.settings')
 django_asgi_app = get_asgi_application()
 
 from apps.chat.routing import websocket_urlpatterns
+from apps.chat.services.writer import lifespan_app
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
@@ -28,4 +29,5 @@ application = ProtocolTypeRouter({
             URLRouter(websocket_urlpatterns)
         )
     ),
+    "lifespan": lifespan_app,
 })
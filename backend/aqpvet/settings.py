@@ -1,6 +1,9 @@
+import os
 from pathlib import Path
 from datetime import timedelta
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'django-insecure-2jzi92xsdew!!@*y8$e#d5fqyn-=)3$-d!3ojil!nhad&i*ul!'
@@ -107,19 +110,113 @@ SIMPLE_JWT = {
 }
 
 # --------------------------------------------------
-# CHANNELS (WebSocket)
+# CACHE
 # --------------------------------------------------
-CHANNEL_LAYERS = {
+CACHES = {
     'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        # Para producción con varios procesos:
+        # 'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        # 'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
+}
+
+# --------------------------------------------------
+# CHANNELS (WebSocket)
+# --------------------------------------------------
+# Backend elegido con la variable de entorno CHANNEL_LAYER:
+#   memory  -> un solo proceso (desarrollo y tests)
+#   sqlite  -> varios workers en la misma máquina, sin servicios externos
+#   redis   -> producción (requiere channels_redis y REDIS_URL)
+CHANNEL_LAYER = os.environ.get('CHANNEL_LAYER', 'memory')
+
+CHANNEL_LAYER_BACKENDS = {
+    'memory': {
         'BACKEND': 'channels.layers.InMemoryChannelLayer',
-        # Para producción con Redis:
-        # 'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        # 'CONFIG': {
-        #     "hosts": [('127.0.0.1', 6379)],
-        # },
     },
+    'sqlite': {
+        'BACKEND': 'core.channel_layers.SQLiteChannelLayer',
+        'CONFIG': {
+            'path': os.environ.get('CHANNEL_LAYER_PATH', str(BASE_DIR / 'channels.sqlite3')),
+            'capacity': 1000,
+        },
+    },
+    'redis': {
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'CONFIG': {
+            'hosts': [os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/0')],
+            'capacity': 1000,
+            'expiry': 60,
+        },
+    },
+}
+
+if CHANNEL_LAYER not in CHANNEL_LAYER_BACKENDS:
+    raise ImproperlyConfigured(
+        f"CHANNEL_LAYER={CHANNEL_LAYER!r} no es válido; opciones: {', '.join(CHANNEL_LAYER_BACKENDS)}"
+    )
+
+CHANNEL_LAYERS = {
+    'default': CHANNEL_LAYER_BACKENDS[CHANNEL_LAYER],
 }
 
+# Escritura diferida de mensajes de chat: se difunden con un id provisional
+# y se guardan en lotes cada CHAT_WRITE_BEHIND_INTERVAL_MS milisegundos o
+# cada CHAT_WRITE_BEHIND_BATCH_SIZE mensajes. Un mensaje que no se puede
+# guardar se descarta tras CHAT_WRITE_BEHIND_MAX_ATTEMPTS intentos
+CHAT_WRITE_BEHIND = os.environ.get('CHAT_WRITE_BEHIND') == '1'
+CHAT_WRITE_BEHIND_INTERVAL_MS = 50
+CHAT_WRITE_BEHIND_BATCH_SIZE = 100
+CHAT_WRITE_BEHIND_MAX_ATTEMPTS = 3
+
+# Mensajes incluidos en GET /api/chat/rooms/{id}/; el resto se pagina
+CHAT_ROOM_DETAIL_MESSAGES = 50
+
+# Presencia: segundos sin latido para considerar a un usuario desconectado.
+# Con varios workers la presencia se replica por el channel layer
+CHAT_PRESENCE_TIMEOUT = 60
+CHAT_PRESENCE_SHARED = CHANNEL_LAYER != 'memory'
+
+# --------------------------------------------------
+# NOTIFICACIONES
+# --------------------------------------------------
+# Filas por INSERT (y por lote de envíos WebSocket) en los avisos masivos
+NOTIFICATION_BROADCAST_CHUNK_SIZE = 1000
+
+# Retención: las leídas con más de NOTIFICATION_RETENTION_DAYS días se
+# archivan y se borran en lotes (comando purge_notifications)
+NOTIFICATION_RETENTION_DAYS = 90
+NOTIFICATION_RETENTION_BATCH_SIZE = 500
+
+# --------------------------------------------------
+# MASCOTAS
+# --------------------------------------------------
+# Recordatorios de vacunas: días de anticipación con que se avisa de una
+# próxima dosis y filas por lote (comando send_vaccine_reminders)
+VACCINE_REMINDER_LEAD_DAYS = 7
+VACCINE_REMINDER_BATCH_SIZE = 500
+
+# --------------------------------------------------
+# CITAS
+# --------------------------------------------------
+# Horario de atención por día de la semana (0 = lunes) y duración de cada
+# turno; los veterinarios son los usuarios staff activos
+APPOINTMENT_WORKING_HOURS = {
+    0: [('09:00', '13:00'), ('15:00', '19:00')],
+    1: [('09:00', '13:00'), ('15:00', '19:00')],
+    2: [('09:00', '13:00'), ('15:00', '19:00')],
+    3: [('09:00', '13:00'), ('15:00', '19:00')],
+    4: [('09:00', '13:00'), ('15:00', '19:00')],
+    5: [('09:00', '13:00')],
+}
+APPOINTMENT_SLOT_MINUTES = 30
+
+# --------------------------------------------------
+# DASHBOARD
+# --------------------------------------------------
+# Máximo de consultas SQL esperadas por carga de /api/dashboard/stats/
+DASHBOARD_STATS_QUERY_BUDGET = 8
+
 # --------------------------------------------------
 # INTERNACIONALIZACIÓN
 # --------------------------------------------------
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import random
+import sqlite3
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+
+class SQLiteChannelLayer(BaseChannelLayer):
+    """
+    Channel layer sobre un archivo SQLite compartido.
+
+    Sustituto local de Redis: varios procesos (por ejemplo varios workers
+    de daphne/uvicorn en la misma máquina) que apunten al mismo archivo
+    comparten canales y grupos, así que un group_send en un worker llega
+    a los consumers conectados en otro. No está pensado para producción;
+    ahí se usa channels_redis.
+
+    Los group_send se agrupan: los que llegan dentro de batch_interval
+    segundos en el mismo event loop se resuelven y escriben juntos en una
+    sola transacción (un executemany), en lugar de una por mensaje.
+
+    receive() sondea con una lectura sin bloqueo (en modo WAL no compite con
+    los escritores) y solo toma el lock de escritura cuando hay un mensaje
+    que retirar. Las llamadas a SQLite corren en un pool de hilos propio del
+    layer, no en el executor por defecto del event loop.
+    """
+
+    extensions = ['groups', 'flush']
+
+    def __init__(self, path='channels.sqlite3', expiry=60, group_expiry=86400,
+                 capacity=100, channel_capacity=None, poll_interval=0.02, batch_interval=0.005,
+                 workers=4):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity)
+        self.channel_capacity = self.compile_capacities(self.channel_capacity)
+        self.path = str(path)
+        self.group_expiry = group_expiry
+        self.poll_interval = poll_interval
+        self.batch_interval = batch_interval
+        # Envíos a grupos pendientes por event loop: [(group, payload, future)]
+        self._pending = {}
+        self._flushers = {}
+        self.client_prefix = ''.join(random.choice(string.ascii_letters) for _ in range(12))
+        self.workers = workers
+        self._executor = None
+        self._local = threading.local()
+        # Conexiones abiertas en cualquier hilo, para cerrarlas todas en close()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._execute(self._create_tables)
+
+    # Acceso a SQLite (una conexión por hilo; las llamadas corren en hilos)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # check_same_thread=False solo para que close() pueda cerrarla
+            # desde otro hilo; cada conexión se usa únicamente en el suyo
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _execute(self, operation, *args):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            result = operation(connection, *args)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return result
+
+    async def _call(self, function, *args):
+        """Ejecuta function en el pool de hilos del layer"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix='sqlite-channel-layer'
+            )
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def _run(self, operation, *args):
+        """Ejecuta operation dentro de una transacción de escritura"""
+        return await self._call(self._execute, operation, *args)
+
+    @staticmethod
+    def _create_tables(connection):
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS layer_message ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, '
+            'payload TEXT NOT NULL, expires REAL NOT NULL)'
+        )
+        connection.execute(
+            'CREATE INDEX IF NOT EXISTS layer_message_channel ON layer_message (channel, id)'
+        )
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS layer_group ('
+            'name TEXT NOT NULL, channel TEXT NOT NULL, expires REAL NOT NULL, '
+            'PRIMARY KEY (name, channel))'
+        )
+
+    # Operaciones en el hilo de SQLite
+
+    def _enqueue(self, connection, rows):
+        """
+        Inserta [(channel, payload)] respetando la capacidad de cada canal.
+        Devuelve los canales que estaban llenos (sus mensajes se descartan).
+        """
+        now = time.time()
+        connection.execute('DELETE FROM layer_message WHERE expires < ?', (now,))
+        channels = {channel for channel, _ in rows}
+        placeholders = ','.join('?' * len(channels))
+        pending = dict(connection.execute(
+            f'SELECT channel, COUNT(*) FROM layer_message WHERE channel IN ({placeholders}) GROUP BY channel',
+            tuple(channels),
+        ).fetchall())
+
+        accepted, full = [], set()
+        for channel, payload in rows:
+            if pending.get(channel, 0) >= self.get_capacity(channel):
+                full.add(channel)
+                continue
+            pending[channel] = pending.get(channel, 0) + 1
+            accepted.append((channel, payload, now + self.expiry))
+        connection.executemany(
+            'INSERT INTO layer_message (channel, payload, expires) VALUES (?, ?, ?)', accepted
+        )
+        return full
+
+    def _poll(self, channel):
+        """
+        Comprueba con una lectura en autocommit si el canal tiene mensajes;
+        solo en ese caso abre la transacción de escritura para retirar uno.
+        """
+        pending = self._connection().execute(
+            'SELECT 1 FROM layer_message WHERE channel = ? AND expires >= ? LIMIT 1',
+            (channel, time.time()),
+        ).fetchone()
+        if pending is None:
+            return None
+        return self._execute(self._dequeue, channel)
+
+    def _dequeue(self, connection, channel):
+        row = connection.execute(
+            'SELECT id, payload FROM layer_message WHERE channel = ? AND expires >= ? ORDER BY id LIMIT 1',
+            (channel, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        connection.execute('DELETE FROM layer_message WHERE id = ?', (row[0],))
+        return row[1]
+
+    def _group_channels(self, connection, group):
+        return [
+            channel for (channel,) in connection.execute(
+                'SELECT channel FROM layer_group WHERE name = ? AND expires >= ?', (group, time.time())
+            )
+        ]
+
+    def _group_send(self, connection, items):
+        members = {}
+        rows = []
+        for group, payload in items:
+            if group not in members:
+                members[group] = self._group_channels(connection, group)
+            rows.extend((channel, payload) for channel in members[group])
+        if rows:
+            # En un grupo los canales llenos se ignoran, igual que en channels_redis
+            self._enqueue(connection, rows)
+
+    # API de channel layer
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), 'message is not a dict'
+        self.require_valid_channel_name(channel)
+        assert '__asgi_channel__' not in message
+        full = await self._run(self._enqueue, [(channel, json.dumps(message))])
+        if full:
+            raise ChannelFull(channel)
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+        while True:
+            payload = await self._call(self._poll, channel)
+            if payload is not None:
+                return json.loads(payload)
+            await asyncio.sleep(self.poll_interval)
+
+    async def new_channel(self, prefix='specific'):
+        suffix = ''.join(random.choice(string.ascii_letters) for _ in range(12))
+        return f'{prefix}.{self.client_prefix}!{suffix}'
+
+    async def flush(self):
+        def _flush(connection):
+            connection.execute('DELETE FROM layer_message')
+            connection.execute('DELETE FROM layer_group')
+        await self._run(_flush)
+
+    async def close(self):
+        """Detiene el pool de hilos y cierra las conexiones de todos los hilos"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+
+        def _add(connection):
+            connection.execute(
+                'INSERT OR REPLACE INTO layer_group (name, channel, expires) VALUES (?, ?, ?)',
+                (group, channel, time.time() + self.group_expiry),
+            )
+        await self._run(_add)
+
+    async def group_discard(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+
+        def _discard(connection):
+            connection.execute('DELETE FROM layer_group WHERE name = ? AND channel = ?', (group, channel))
+        await self._run(_discard)
+
+    async def group_send(self, group, message):
+        await self.group_send_many(group, [message])
+
+    async def group_send_many(self, group, messages):
+        """Encola varios mensajes para un grupo y espera a que se escriban"""
+        self.require_valid_group_name(group)
+        loop = asyncio.get_running_loop()
+        pending = self._pending.setdefault(loop, [])
+        futures = []
+        for message in messages:
+            future = loop.create_future()
+            pending.append((group, json.dumps(message), future))
+            futures.append(future)
+        flusher = self._flushers.get(loop)
+        if flusher is None or flusher.done():
+            self._flushers[loop] = loop.create_task(self._flush_pending(loop))
+        await asyncio.gather(*futures)
+
+    async def _flush_pending(self, loop):
+        await asyncio.sleep(self.batch_interval)
+        batch = self._pending.pop(loop, [])
+        self._flushers.pop(loop, None)
+        try:
+            await self._run(self._group_send, [(group, payload) for group, payload, _ in batch])
+        except Exception as exc:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+
+async def group_send_batch(layer, group, messages):
+    """
+    Envía una lista de mensajes a un grupo usando el envío por lotes del
+    layer si lo tiene; si no, lanza los group_send en paralelo.
+    """
+    if hasattr(layer, 'group_send_many'):
+        await layer.group_send_many(group, messages)
+    else:
+        await asyncio.gather(*(layer.group_send(group, message) for message in messages))
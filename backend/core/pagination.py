@@ -0,0 +1,199 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+import uuid
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _encode_value(value):
+    """Convierte un valor de posición a JSON sin perder precisión"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre el ordenamiento de la vista.
+
+    El cursor guarda los valores de la última fila devuelta para todos los
+    campos del ordenamiento, al que siempre se agrega la pk como desempate,
+    y la página siguiente se obtiene con un WHERE (campo1, ..., pk) < (...)
+    en lugar de un OFFSET. El costo de una página no depende del tamaño de
+    la tabla y el orden es estable aunque se inserten filas nuevas.
+
+    Respuesta: {"next": url, "previous": url, "results": [...]}
+    """
+    cursor_query_param = 'cursor'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        results = list(self.get_page_queryset(queryset, request, view))
+        position, reverse = self.position, self.reverse
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Consulta de la página pedida, sin ejecutarla: el predicado del
+        cursor, el ordenamiento y el LIMIT (una fila extra para saber si
+        hay más). explain_queries la usa para ver el plan de cada página.
+        """
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = self.get_ordering_fields(queryset.model, self.ordering)
+        self.position, self.reverse = self.decode_cursor(request)
+
+        if self.position is not None:
+            queryset = queryset.filter(self.keyset_filter(self.position, self.reverse))
+
+        ordering = self.invert_ordering(self.ordering) if self.reverse else self.ordering
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Usa el ordenamiento pedido vía OrderingFilter si la vista lo tiene,
+        si no el de la vista o el del modelo. Un ordenamiento que no sirve
+        como keyset (campos nulos o de relaciones) vuelve al de la vista.
+        """
+        default = getattr(view, 'ordering', None) or queryset.model._meta.ordering or ['-pk']
+        if isinstance(default, str):
+            default = [default]
+
+        ordering = default
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view) or default
+                break
+
+        if not self.is_keyset_ordering(queryset.model, ordering):
+            ordering = default
+
+        pk_name = queryset.model._meta.pk.name
+        ordering = [
+            f"{'-' if field.startswith('-') else ''}{pk_name}" if field.lstrip('-') == 'pk' else field
+            for field in ordering
+        ]
+        if pk_name not in [field.lstrip('-') for field in ordering]:
+            prefix = '-' if ordering and ordering[0].startswith('-') else ''
+            ordering.append(f'{prefix}{pk_name}')
+        return tuple(ordering)
+
+    def is_keyset_ordering(self, model, ordering):
+        for field in ordering:
+            name = field.lstrip('-')
+            if name == 'pk':
+                continue
+            try:
+                model_field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return False
+            if model_field.null or model_field.is_relation and not model_field.concrete:
+                return False
+        return True
+
+    def get_ordering_fields(self, model, ordering):
+        return [model._meta.get_field(field.lstrip('-')) for field in ordering]
+
+    def invert_ordering(self, ordering):
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+    def keyset_filter(self, position, reverse):
+        """
+        Condición lexicográfica "después de position" para el ordenamiento:
+        (a < x) OR (a = x AND b < y) OR ... respetando la dirección de cada campo.
+        """
+        condition = Q()
+        equal = {}
+        for field, model_field, value in zip(self.ordering, self.fields, position):
+            descending = field.startswith('-')
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= Q(**equal, **{f'{model_field.attname}__{lookup}': value})
+            equal[model_field.attname] = value
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values = payload['p']
+            reverse = bool(payload.get('r'))
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [field.to_python(value) for field, value in zip(self.fields, values)]
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_position(self, values, reverse):
+        payload = json.dumps(
+            {'p': [_encode_value(value) for value in values], 'r': int(reverse)}, separators=(',', ':')
+        )
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def encode_cursor(self, instance, reverse):
+        encoded = self.encode_position([getattr(instance, field.attname) for field in self.fields], reverse)
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
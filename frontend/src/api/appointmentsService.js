@@ -3,3 +3,5 @@ import api from "./axiosConfig";
 export const listAppointments = () => api.get("/appointments/");
 export const createAppointment = (payload) => api.post("/appointments/", payload);
 export const updateAppointment = (id, payload) => api.patch(`/appointments/${id}/`, payload);
+export const getAvailability = (date, params = {}) =>
+  api.get("/appointments/availability/", { params: { date, ...params } });
@@ -3,7 +3,12 @@ import { useForm } from "react-hook-form";
 import { TextField, Button, MenuItem } from "@mui/material";
 import { toast } from "react-toastify";
 
-import { listAppointments, createAppointment, updateAppointment } from "../api/appointmentsService";
+import {
+  listAppointments,
+  createAppointment,
+  updateAppointment,
+  getAvailability,
+} from "../api/appointmentsService";
 import { listPets } from "../api/catalogService";
 
 const STATUS_LABEL = {
@@ -18,6 +23,10 @@ const statusTone = {
   cancelled: "bg-rose-100 text-rose-700 border-rose-200",
 };
 
+function formatTime(value) {
+  return new Date(value).toLocaleTimeString("es-PE", { hour: "2-digit", minute: "2-digit" });
+}
+
 function formatDate(value) {
   try {
     return new Date(value).toLocaleString("es-PE", {
@@ -34,15 +43,20 @@ export default function Appointments() {
   const [pets, setPets] = useState([]);
   const [loading, setLoading] = useState(true);
   const [updatingId, setUpdatingId] = useState(null);
+  const [slots, setSlots] = useState([]);
+  const [loadingSlots, setLoadingSlots] = useState(false);
 
   const {
     register,
     handleSubmit,
     reset,
+    watch,
+    setValue,
     formState: { errors },
   } = useForm({
     defaultValues: {
       pet: "",
+      day: "",
       scheduled_at: "",
       reason: "",
       notes: "",
@@ -76,22 +90,50 @@ export default function Appointments() {
     loadData();
   }, []);
 
+  const selectedDay = watch("day");
+
+  async function loadSlots(day) {
+    setLoadingSlots(true);
+    try {
+      const { data } = await getAvailability(day);
+      setSlots(data.slots);
+    } catch (error) {
+      console.error("Error cargando horarios", error);
+      setSlots([]);
+    } finally {
+      setLoadingSlots(false);
+    }
+  }
+
+  // Los turnos libres dependen del día elegido
+  useEffect(() => {
+    setValue("scheduled_at", "");
+    if (!selectedDay) {
+      setSlots([]);
+      return;
+    }
+    loadSlots(selectedDay);
+  }, [selectedDay, setValue]);
+
   const onSubmit = async (formData) => {
     try {
       const payload = {
         pet: Number(formData.pet),
-        scheduled_at: new Date(formData.scheduled_at).toISOString(),
+        scheduled_at: formData.scheduled_at,
         reason: formData.reason,
         status: formData.status || "scheduled",
         notes: formData.notes,
       };
       await createAppointment(payload);
       toast.success("Cita registrada");
-      reset({ pet: "", scheduled_at: "", reason: "", notes: "", status: "scheduled" });
+      reset({ pet: "", day: "", scheduled_at: "", reason: "", notes: "", status: "scheduled" });
       loadData();
     } catch (error) {
       console.error("Error creando cita", error);
-      toast.error("No se pudo registrar la cita");
+      const detail = error?.response?.data?.scheduled_at;
+      toast.error(Array.isArray(detail) ? detail[0] : detail || "No se pudo registrar la cita");
+      // El turno pudo tomarse mientras se llenaba el formulario
+      if (formData.day) loadSlots(formData.day);
     }
   };
 
@@ -227,15 +269,39 @@ export default function Appointments() {
             </TextField>
 
             <TextField
-              label="Fecha y hora"
-              type="datetime-local"
+              label="Fecha"
+              type="date"
               size="small"
               fullWidth
               InputLabelProps={{ shrink: true }}
+              error={Boolean(errors.day)}
+              helperText={errors.day ? "Indica la fecha de la cita" : ""}
+              {...register("day", { required: true })}
+            />
+
+            <TextField
+              select
+              label="Horario"
+              size="small"
+              fullWidth
+              value={watch("scheduled_at")}
+              disabled={!selectedDay || loadingSlots}
               error={Boolean(errors.scheduled_at)}
-              helperText={errors.scheduled_at ? "Indica la fecha de la cita" : ""}
+              helperText={
+                errors.scheduled_at
+                  ? "Elige un horario disponible"
+                  : selectedDay && !loadingSlots && slots.length === 0
+                  ? "No hay horarios disponibles ese día"
+                  : ""
+              }
               {...register("scheduled_at", { required: true })}
-            />
+            >
+              {slots.map((slot) => (
+                <MenuItem key={slot.start} value={slot.start}>
+                  {formatTime(slot.start)} • {slot.available} disponible{slot.available === 1 ? "" : "s"}
+                </MenuItem>
+              ))}
+            </TextField>
 
             <TextField
               label="Motivo"
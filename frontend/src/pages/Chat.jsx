@@ -1,6 +1,11 @@
 import { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 
+// Sin teclear durante este tiempo se avisa que se dejó de escribir
+const TYPING_IDLE_MS = 3000;
+// El aviso del otro participante caduca si no se renueva (se reenvía cada 3 s)
+const PEER_TYPING_TTL_MS = 6000;
+
 const Chat = () => {
   const [rooms, setRooms] = useState([]);
   const [selectedRoom, setSelectedRoom] = useState(null);
@@ -11,7 +16,12 @@ const Chat = () => {
   const [selectedVet, setSelectedVet] = useState('');
   const [ws, setWs] = useState(null);
   const [isConnected, setIsConnected] = useState(false);
+  const [peerOnline, setPeerOnline] = useState(false);
+  const [peerTyping, setPeerTyping] = useState(false);
   const messagesEndRef = useRef(null);
+  const lastTypingRef = useRef(0);
+  const typingIdleRef = useRef(null);
+  const peerTypingTimeoutRef = useRef(null);
   const [currentUser, setCurrentUser] = useState(null);
 
   useEffect(() => {
@@ -78,7 +88,7 @@ const Chat = () => {
       const response = await axios.get(`http://localhost:8000/api/chat/rooms/${roomId}/messages/`, {
         headers: { Authorization: `Bearer ${token}` }
       });
-      setMessages(response.data);
+      setMessages(response.data.results);
       
       // Marcar mensajes como leídos
       await axios.post(
@@ -103,12 +113,17 @@ const Chat = () => {
     websocket.onopen = () => {
       console.log('WebSocket conectado');
       setIsConnected(true);
+      // Latido de presencia; sin él el servidor nos da por desconectados
+      websocket.heartbeat = setInterval(() => {
+        websocket.send(JSON.stringify({ type: 'heartbeat' }));
+      }, 25000);
     };
 
     websocket.onmessage = (event) => {
       const data = JSON.parse(event.data);
       
       if (data.type === 'chat_message') {
+        setPeerTyping(false);
         setMessages(prev => [...prev, {
           id: data.message_id,
           sender: data.sender_id,
@@ -121,6 +136,27 @@ const Chat = () => {
         setMessages(prev => prev.map(msg =>
           msg.id === data.message_id ? { ...msg, is_read: true } : msg
         ));
+      } else if (data.type === 'presence') {
+        setPeerOnline(data.online);
+        if (!data.online) setPeerTyping(false);
+      } else if (data.type === 'typing') {
+        clearTimeout(peerTypingTimeoutRef.current);
+        setPeerTyping(data.is_typing);
+        if (data.is_typing) {
+          peerTypingTimeoutRef.current = setTimeout(() => setPeerTyping(false), PEER_TYPING_TTL_MS);
+        }
+      } else if (data.type === 'messages_read') {
+        setMessages(prev => prev.map(msg =>
+          msg.id <= data.up_to && msg.sender !== data.reader_id ? { ...msg, is_read: true } : msg
+        ));
+      } else if (data.type === 'message_persisted') {
+        setMessages(prev => prev.map(msg =>
+          msg.id === data.provisional_id ? { ...msg, id: data.message_id, timestamp: data.timestamp } : msg
+        ));
+      } else if (data.type === 'message_failed') {
+        setMessages(prev => prev.map(msg =>
+          msg.id === data.provisional_id ? { ...msg, failed: true } : msg
+        ));
       } else if (data.type === 'error') {
         console.error('WebSocket error:', data.message);
         alert(data.message);
@@ -129,7 +165,13 @@ const Chat = () => {
 
     websocket.onclose = () => {
       console.log('WebSocket desconectado');
+      clearInterval(websocket.heartbeat);
+      clearTimeout(typingIdleRef.current);
+      clearTimeout(peerTypingTimeoutRef.current);
+      lastTypingRef.current = 0;
       setIsConnected(false);
+      setPeerOnline(false);
+      setPeerTyping(false);
     };
 
     websocket.onerror = (error) => {
@@ -140,10 +182,31 @@ const Chat = () => {
     setWs(websocket);
   };
 
+  const notifyTyping = () => {
+    if (!ws || !isConnected) return;
+    // Aviso de escritura, como máximo uno cada 3 segundos
+    if (Date.now() - lastTypingRef.current > 3000) {
+      lastTypingRef.current = Date.now();
+      ws.send(JSON.stringify({ type: 'typing', is_typing: true }));
+    }
+    clearTimeout(typingIdleRef.current);
+    typingIdleRef.current = setTimeout(stopTyping, TYPING_IDLE_MS);
+  };
+
+  const stopTyping = () => {
+    clearTimeout(typingIdleRef.current);
+    if (!lastTypingRef.current) return;
+    lastTypingRef.current = 0;
+    if (ws && ws.readyState === WebSocket.OPEN) {
+      ws.send(JSON.stringify({ type: 'typing', is_typing: false }));
+    }
+  };
+
   const sendMessage = (e) => {
     e.preventDefault();
     if (!messageText.trim() || !ws || !isConnected) return;
 
+    stopTyping();
     ws.send(JSON.stringify({
       type: 'chat_message',
       message: messageText
@@ -273,6 +336,11 @@ const Chat = () => {
                     ) : (
                       <span className="text-red-600">● Desconectado</span>
                     )}
+                    {isConnected && (
+                      <span className="ml-2">
+                        {peerTyping ? 'escribiendo…' : peerOnline ? 'en línea' : 'fuera de línea'}
+                      </span>
+                    )}
                   </p>
                 </div>
               </div>
@@ -312,7 +380,7 @@ const Chat = () => {
                               <p>{msg.message}</p>
                               <p className={`text-xs mt-1 ${isMyMessage ? 'text-blue-100' : 'text-gray-400'}`}>
                                 {formatTime(msg.timestamp)}
-                                {isMyMessage && (msg.is_read ? ' ✓✓' : ' ✓')}
+                                {isMyMessage && (msg.failed ? ' · No enviado' : msg.is_read ? ' ✓✓' : ' ✓')}
                               </p>
                             </div>
                           </div>
@@ -330,7 +398,11 @@ const Chat = () => {
                   <input
                     type="text"
                     value={messageText}
-                    onChange={(e) => setMessageText(e.target.value)}
+                    onChange={(e) => {
+                      setMessageText(e.target.value);
+                      notifyTyping();
+                    }}
+                    onBlur={stopTyping}
                     placeholder="Escribe un mensaje..."
                     className="flex-1 border rounded-lg px-4 py-2 focus:outline-none focus:ring-2 focus:ring-blue-500"
                     disabled={!isConnected}
@@ -4,7 +4,7 @@ import axios from 'axios';
 function Dashboard() {
   const [stats, setStats] = useState(null);
   const [salesData, setSalesData] = useState(null);
-  const [popularProducts, setPopularProducts] = useState([]);
+  const [stockOutflow, setStockOutflow] = useState([]);
   const [appointmentsStats, setAppointmentsStats] = useState(null);
   const [recentActivity, setRecentActivity] = useState([]);
   const [lowStock, setLowStock] = useState([]);
@@ -72,7 +72,7 @@ function Dashboard() {
       ] = await Promise.all([
         axios.get('http://localhost:8000/api/dashboard/stats/', config),
         axios.get(`http://localhost:8000/api/dashboard/sales-over-time/?period=${period}`, config),
-        axios.get('http://localhost:8000/api/dashboard/popular-products/?limit=5', config),
+        axios.get('http://localhost:8000/api/dashboard/stock-outflow/?limit=5', config),
         axios.get('http://localhost:8000/api/dashboard/appointments-stats/', config),
         axios.get('http://localhost:8000/api/dashboard/recent-activity/?limit=10', config),
         axios.get('http://localhost:8000/api/dashboard/low-stock/?threshold=10', config)
@@ -80,7 +80,7 @@ function Dashboard() {
 
       setStats(statsRes.data);
       setSalesData(salesRes.data);
-      setPopularProducts(productsRes.data.products);
+      setStockOutflow(productsRes.data.products);
       setAppointmentsStats(appointmentsRes.data);
       setRecentActivity(activityRes.data.activities);
       setLowStock(stockRes.data.products);
@@ -260,31 +260,31 @@ function Dashboard() {
       </div>
 
       <div className="grid grid-cols-1 lg:grid-cols-2 gap-6 mb-8">
-        {/* Popular Products */}
+        {/* Stock Outflow */}
         <div className="bg-white rounded-lg shadow p-6">
-          <h2 className="text-xl font-bold mb-4">Productos Más Vendidos</h2>
-          {popularProducts.length > 0 ? (
+          <h2 className="text-xl font-bold mb-4">Mayor Salida de Stock</h2>
+          {stockOutflow.length > 0 ? (
             <div className="space-y-3">
-              {popularProducts.map((product, index) => (
+              {stockOutflow.map((product, index) => (
                 <div key={product.product_id} className="flex items-center justify-between p-3 bg-gray-50 rounded">
                   <div className="flex items-center gap-3">
                     <span className="text-2xl font-bold text-gray-300">#{index + 1}</span>
                     <div>
                       <div className="font-semibold">{product.product_name}</div>
                       <div className="text-sm text-gray-600">
-                        {product.quantity_sold} unidades vendidas
+                        {product.quantity_out} unidades salidas
                       </div>
                     </div>
                   </div>
                   <div className="text-right">
-                    <div className="font-bold text-green-600">{formatCurrency(product.revenue)}</div>
-                    <div className="text-xs text-gray-500">{product.times_ordered} pedidos</div>
+                    <div className="font-bold text-green-600">{formatCurrency(product.outflow_value)}</div>
+                    <div className="text-xs text-gray-500">{product.movements} movimientos</div>
                   </div>
                 </div>
               ))}
             </div>
           ) : (
-            <p className="text-gray-500 text-center py-8">No hay productos vendidos</p>
+            <p className="text-gray-500 text-center py-8">No hay salidas de stock</p>
           )}
         </div>
 
@@ -3,6 +3,7 @@ import axios from 'axios';
 
 const Inventory = () => {
   const [movements, setMovements] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [products, setProducts] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -31,7 +32,8 @@ const Inventory = () => {
         axios.get('/api/products/')
       ]);
       
-      setMovements(movementsRes.data);
+      setMovements(movementsRes.data.results);
+      setNextPage(movementsRes.data.next);
       setProducts(productsRes.data);
       setError(null);
     } catch (err) {
@@ -42,6 +44,20 @@ const Inventory = () => {
     }
   };
 
+  // La lista está paginada por cursor: cada página sigue el enlace next
+  const loadMoreMovements = async () => {
+    try {
+      const token = localStorage.getItem('access_token');
+      const response = await axios.get(nextPage, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setMovements(prev => [...prev, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (err) {
+      console.error('Error al cargar más movimientos:', err);
+    }
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     try {
@@ -257,6 +273,16 @@ const Inventory = () => {
             </table>
           </div>
         )}
+        {nextPage && (
+          <div className="px-6 py-4 border-t border-gray-200">
+            <button
+              onClick={loadMoreMovements}
+              className="text-blue-600 hover:underline"
+            >
+              Cargar más movimientos
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
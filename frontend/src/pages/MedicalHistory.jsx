@@ -65,10 +65,17 @@ function MedicalHistory() {
     setError(null);
     try {
       const token = localStorage.getItem('access');
-      const response = await axios.get(`http://localhost:8000/api/pets/${petId}/medical-history/`, {
+      // Historial compacto: la mascota una vez y cada sección paginada
+      const response = await axios.get(`http://localhost:8000/api/pets/${petId}/history/`, {
         headers: { Authorization: `Bearer ${token}` }
       });
-      setMedicalHistory(response.data);
+      const { pet, medical_records, vaccines } = response.data;
+      setMedicalHistory({
+        ...pet,
+        medical_records: medical_records.results,
+        vaccines: vaccines.results,
+        next: { medical_records: medical_records.next, vaccines: vaccines.next }
+      });
     } catch (error) {
       console.error('Error fetching medical history:', error);
       setError('Error al cargar el historial médico');
@@ -77,6 +84,27 @@ function MedicalHistory() {
     }
   };
 
+  const loadMore = async (section) => {
+    try {
+      const token = localStorage.getItem('access');
+      const url = new URL(medicalHistory.next[section]);
+      url.searchParams.set('sections', section);
+      const response = await axios.get(url.toString(), {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setMedicalHistory(prev => ({
+        ...prev,
+        [section]: [...prev[section], ...response.data[section].results],
+        next: { ...prev.next, [section]: response.data[section].next }
+      }));
+    } catch (error) {
+      console.error('Error loading more history:', error);
+    }
+  };
+
+  const isNextDosePending = (vaccine) =>
+    vaccine.next_dose_date && new Date(vaccine.next_dose_date) >= new Date(new Date().toDateString());
+
   const handlePetSelect = (pet) => {
     setSelectedPet(pet);
     fetchMedicalHistory(pet.id);
@@ -241,6 +269,14 @@ function MedicalHistory() {
                     ))}
                   </div>
                 )}
+                {medicalHistory.next.medical_records && (
+                  <button
+                    onClick={() => loadMore('medical_records')}
+                    className="mt-4 text-blue-600 hover:underline"
+                  >
+                    Ver registros anteriores
+                  </button>
+                )}
               </div>
 
               {/* Vacunas */}
@@ -277,7 +313,7 @@ function MedicalHistory() {
                             <td className="px-4 py-3">{formatDate(vaccine.date_administered)}</td>
                             <td className="px-4 py-3">
                               {vaccine.next_dose_date ? (
-                                <span className={vaccine.is_next_dose_pending ? 'text-orange-600 font-semibold' : ''}>
+                                <span className={isNextDosePending(vaccine) ? 'text-orange-600 font-semibold' : ''}>
                                   {formatDate(vaccine.next_dose_date)}
                                 </span>
                               ) : (
@@ -292,6 +328,14 @@ function MedicalHistory() {
                     </table>
                   </div>
                 )}
+                {medicalHistory.next.vaccines && (
+                  <button
+                    onClick={() => loadMore('vaccines')}
+                    className="mt-4 text-green-600 hover:underline"
+                  >
+                    Ver vacunas anteriores
+                  </button>
+                )}
               </div>
             </div>
           ) : null}
@@ -3,6 +3,7 @@ import axios from 'axios';
 
 const Memberships = () => {
   const [memberships, setMemberships] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [showForm, setShowForm] = useState(false);
@@ -56,7 +57,8 @@ const Memberships = () => {
         headers: { Authorization: `Bearer ${token}` }
       });
       
-      setMemberships(response.data);
+      setMemberships(response.data.results);
+      setNextPage(response.data.next);
       setError(null);
     } catch (err) {
       setError(err.response?.data?.detail || 'Error al cargar membresías');
@@ -66,6 +68,20 @@ const Memberships = () => {
     }
   };
 
+  // La lista está paginada por cursor: cada página sigue el enlace next
+  const loadMoreMemberships = async () => {
+    try {
+      const token = localStorage.getItem('access_token');
+      const response = await axios.get(nextPage, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setMemberships(prev => [...prev, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (err) {
+      console.error('Error al cargar más membresías:', err);
+    }
+  };
+
   const handlePlanSelect = (plan) => {
     setFormData({
       ...formData,
@@ -355,6 +371,16 @@ const Memberships = () => {
             </table>
           </div>
         )}
+        {nextPage && (
+          <div className="px-6 py-4 border-t border-gray-200">
+            <button
+              onClick={loadMoreMemberships}
+              className="text-blue-600 hover:underline"
+            >
+              Cargar más membresías
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
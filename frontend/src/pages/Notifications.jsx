@@ -3,15 +3,42 @@ import axios from 'axios';
 
 const Notifications = () => {
   const [notifications, setNotifications] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [filterRead, setFilterRead] = useState('');
   const [filterType, setFilterType] = useState('');
   const [unreadCount, setUnreadCount] = useState(0);
 
   useEffect(() => {
     fetchNotifications();
-    fetchUnreadCount();
   }, [filterRead, filterType]);
 
+  // Conteo y notificaciones nuevas llegan por WebSocket, sin sondeo
+  useEffect(() => {
+    const token = localStorage.getItem('token');
+    const websocket = new WebSocket(`ws://localhost:8000/ws/notifications/?token=${token}`);
+
+    websocket.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+
+      if (data.type === 'unread_count') {
+        setUnreadCount(prev => data.unread_count ?? prev + data.delta);
+      } else if (data.type === 'notification') {
+        setUnreadCount(prev => prev + data.unread_delta);
+        setNotifications(prev => [data.notification, ...prev]);
+      }
+    };
+
+    websocket.onclose = () => {
+      // Sin WebSocket se recurre a la API para no mostrar un conteo viejo
+      fetchUnreadCount();
+    };
+
+    return () => {
+      websocket.onclose = null;
+      websocket.close();
+    };
+  }, []);
+
   const fetchNotifications = async () => {
     try {
       const token = localStorage.getItem('token');
@@ -28,12 +55,27 @@ const Notifications = () => {
       const response = await axios.get(url, {
         headers: { Authorization: `Bearer ${token}` }
       });
-      setNotifications(response.data);
+      setNotifications(response.data.results);
+      setNextPage(response.data.next);
     } catch (error) {
       console.error('Error al cargar notificaciones:', error);
     }
   };
 
+  // La lista está paginada por cursor: cada página sigue el enlace next
+  const loadMoreNotifications = async () => {
+    try {
+      const token = localStorage.getItem('token');
+      const response = await axios.get(nextPage, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setNotifications(prev => [...prev, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (error) {
+      console.error('Error al cargar más notificaciones:', error);
+    }
+  };
+
   const fetchUnreadCount = async () => {
     try {
       const token = localStorage.getItem('token');
@@ -53,12 +95,33 @@ const Notifications = () => {
         headers: { Authorization: `Bearer ${token}` }
       });
       fetchNotifications();
-      fetchUnreadCount();
     } catch (error) {
       console.error('Error al marcar como leída:', error);
     }
   };
 
+  const markPageAsRead = async () => {
+    const ids = notifications.filter(notif => !notif.is_read).map(notif => notif.id);
+    if (ids.length === 0) return;
+
+    try {
+      const token = localStorage.getItem('token');
+      // Un POST por cada 500 ids (límite del endpoint) para lo visible,
+      // que puede abarcar varias páginas cargadas.
+      // El nuevo conteo llega como delta por el WebSocket
+      for (let start = 0; start < ids.length; start += 500) {
+        await axios.post('http://localhost:8000/api/notifications/mark-as-read/', { ids: ids.slice(start, start + 500) }, {
+          headers: { Authorization: `Bearer ${token}` }
+        });
+      }
+      setNotifications(prev => prev.map(notif =>
+        ids.includes(notif.id) ? { ...notif, is_read: true } : notif
+      ));
+    } catch (error) {
+      console.error('Error al marcar la página como leída:', error);
+    }
+  };
+
   const markAllAsRead = async () => {
     try {
       const token = localStorage.getItem('token');
@@ -66,7 +129,6 @@ const Notifications = () => {
         headers: { Authorization: `Bearer ${token}` }
       });
       fetchNotifications();
-      fetchUnreadCount();
       alert('Todas las notificaciones marcadas como leídas');
     } catch (error) {
       console.error('Error al marcar todas como leídas:', error);
@@ -82,7 +144,6 @@ const Notifications = () => {
         headers: { Authorization: `Bearer ${token}` }
       });
       fetchNotifications();
-      fetchUnreadCount();
     } catch (error) {
       console.error('Error al eliminar:', error);
     }
@@ -140,12 +201,20 @@ const Notifications = () => {
           )}
         </div>
         {unreadCount > 0 && (
-          <button
-            onClick={markAllAsRead}
-            className="bg-blue-500 text-white px-4 py-2 rounded hover:bg-blue-600"
-          >
-            ✓ Marcar todas como leídas
-          </button>
+          <div className="flex gap-2">
+            <button
+              onClick={markPageAsRead}
+              className="bg-white border border-blue-500 text-blue-600 px-4 py-2 rounded hover:bg-blue-50"
+            >
+              Marcar esta página
+            </button>
+            <button
+              onClick={markAllAsRead}
+              className="bg-blue-500 text-white px-4 py-2 rounded hover:bg-blue-600"
+            >
+              ✓ Marcar todas como leídas
+            </button>
+          </div>
         )}
       </div>
 
@@ -245,6 +314,14 @@ const Notifications = () => {
             </div>
           ))
         )}
+        {nextPage && (
+          <button
+            onClick={loadMoreNotifications}
+            className="w-full py-2 text-blue-600 hover:underline"
+          >
+            Cargar notificaciones anteriores
+          </button>
+        )}
       </div>
 
       {/* Resumen */}
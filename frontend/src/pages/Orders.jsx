@@ -3,6 +3,7 @@ import axios from 'axios';
 
 const Orders = () => {
   const [orders, setOrders] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [products, setProducts] = useState([]);
   const [cart, setCart] = useState([]);
   const [notes, setNotes] = useState('');
@@ -25,12 +26,27 @@ const Orders = () => {
       const response = await axios.get(url, {
         headers: { Authorization: `Bearer ${token}` }
       });
-      setOrders(response.data);
+      setOrders(response.data.results);
+      setNextPage(response.data.next);
     } catch (error) {
       console.error('Error al cargar pedidos:', error);
     }
   };
 
+  // La lista está paginada por cursor: cada página sigue el enlace next
+  const loadMoreOrders = async () => {
+    try {
+      const token = localStorage.getItem('access');
+      const response = await axios.get(nextPage, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setOrders(prev => [...prev, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (error) {
+      console.error('Error al cargar más pedidos:', error);
+    }
+  };
+
   const fetchProducts = async () => {
     try {
       const response = await axios.get('http://localhost:8000/api/products/');
@@ -346,6 +362,14 @@ const Orders = () => {
             ))}
           </div>
         )}
+        {nextPage && (
+          <button
+            onClick={loadMoreOrders}
+            className="mt-4 text-blue-600 hover:underline"
+          >
+            Cargar más pedidos
+          </button>
+        )}
       </div>
     </div>
   );
@@ -3,6 +3,7 @@ import axios from 'axios';
 
 const Payments = () => {
   const [payments, setPayments] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [showForm, setShowForm] = useState(false);
@@ -35,7 +36,8 @@ const Payments = () => {
         headers: { Authorization: `Bearer ${token}` }
       });
       
-      setPayments(response.data);
+      setPayments(response.data.results);
+      setNextPage(response.data.next);
       setError(null);
     } catch (err) {
       setError(err.response?.data?.detail || 'Error al cargar pagos');
@@ -45,6 +47,20 @@ const Payments = () => {
     }
   };
 
+  // La lista está paginada por cursor: cada página sigue el enlace next
+  const loadMorePayments = async () => {
+    try {
+      const token = localStorage.getItem('access_token');
+      const response = await axios.get(nextPage, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setPayments(prev => [...prev, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (err) {
+      console.error('Error al cargar más pagos:', err);
+    }
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     try {
@@ -311,6 +327,16 @@ const Payments = () => {
             </table>
           </div>
         )}
+        {nextPage && (
+          <div className="px-6 py-4 border-t border-gray-200">
+            <button
+              onClick={loadMorePayments}
+              className="text-blue-600 hover:underline"
+            >
+              Cargar más pagos
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );